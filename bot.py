@@ -4,6 +4,7 @@ from discord import app_commands
 
 from py_base.utility import CWD
 from py_base.ari_logger import ari_logger
+from py_base import sqlcounter
 from py_discord import warnings
 from py_discord.bot_base import BotBase
 
@@ -14,6 +15,7 @@ class AriBot(BotBase):
         self._ready_flag = False
         
     async def setup_hook(self):
+        await super().setup_hook()
         for file in (CWD / "cogs").iterdir():
             if file.is_file() and file.suffix == ".py":
                 await self.load_extension(f"cogs.{file.stem}")
@@ -22,12 +24,6 @@ class AriBot(BotBase):
         await self.wait_until_ready()
         await self.change_presence(status=discord.Status.online, activity=discord.Game("아리슬레나 가꾸기"))
         
-        # data 폴더의 .db-journal 파일 제거
-        # commit이 제대로 되지 않고 남아있는 파일이므로 제거
-        for file in (CWD / "data").iterdir():
-            if file.is_file() and file.suffix == ".db-journal":
-                file.unlink()
-        
         for guild in self.guilds:
             self._add_server_manager(guild.id)
         
@@ -81,6 +77,9 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
         embed_value = f"`{error.__str__()}`"
 
         print(traceback.format_exc()) # 오류 출력
+
+    # 오류가 난 명령어의 sql 집계도 끝냄 (N+1 경고는 오류와 관계없이 남김)
+    sqlcounter.finish_interaction()
     
     embed = discord.Embed(color=embed_color)
     embed.add_field(name=embed_name, value=embed_value)
@@ -100,6 +99,9 @@ async def on_app_command_completion(interaction: discord.Interaction, command: U
     # 명령어 사용자, 닉네임, 명령어 이름, 명령어 인자
     # tab을 기준으로 정렬
     line = f"user id: {interaction.user.id}\n\tuser name: {interaction.user.name}\n\tuser nick: {interaction.user.nick}\n\tinteraction data: {interaction.data['name']}\n\tcommand: {command.name}"
+    # 명령어가 실행한 sql 문의 수, 시간, 행 수 (같은 꼴의 sql 문이 반복되면 N+1 경고가 따로 남음)
+    if (stats := sqlcounter.finish_interaction()) is not None:
+        line += f"\n\t{stats.get_summary()}"
     ari_logger.info(line)
 
 
@@ -129,7 +131,7 @@ async def exit_bot(interaction: discord.Interaction):
 )
 async def elapse_turn(interaction: discord.Interaction):
     aribot.check_admin_or_raise(interaction)
-    await aribot.get_server_manager(interaction.guild_id).end_turn()
+    await aribot.turn_scheduler.run_turn_end(aribot.get_server_manager(interaction.guild_id))
     await interaction.response.send_message(f"턴이 넘어갔습니다. (현재 턴: {aribot.get_server_manager(interaction.guild_id).chalkboard.now_turn})")
 
 
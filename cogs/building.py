@@ -29,16 +29,19 @@ class FacilityCommand(GroupCog, name="시설"):
     )
     async def build(self, interaction: discord.Interaction, facility_category: app_commands.Choice[int], facility_name: str):\
         
-        database = self.bot.get_database(interaction.guild_id)
+        async_database = self.bot.get_async_database(interaction.guild_id)
         
-        faction = Faction.fetch_or_raise(database, warnings.NoFaction(), user_id=interaction.user.id)
+        if (faction_data := await async_database.fetch(Faction.table_name, user_id=interaction.user.id)) is None:
+            raise warnings.NoFaction()
+        faction = Faction.from_data(faction_data)
         
-        territory_list = database.fetch_many("territory", faction_id=faction.id)
+        territory_list = await async_database.fetch_many(Territory.table_name, faction_id=faction.id)
         
         if len(territory_list) == 0:
             await interaction.response.send_message("건설할 영토가 없습니다.", ephemeral=True)
+            return
             
-        facility_name_list = database.cursor.execute("SELECT name FROM facility").fetchall()
+        facility_name_list = await async_database.fetch_column(Facility.table_name, Facility.name.name)
         if facility_name in facility_name_list: raise warnings.AlreadyExist("그 이름의 시설")
         
         await interaction.response.send_message(
@@ -1,10 +1,11 @@
 import discord
 from discord.ext.commands import GroupCog
 from discord import app_commands
-from sqlite3 import Row
 import random
 
 from py_base.ari_enum import FacilityCategory, CommandCategory
+from py_base.dbmanager import DatabaseManager
+from py_base.yamlobj import Detail
 from py_discord.bot_base import BotBase
 from py_discord import views, func
 from py_base import warnings
@@ -26,23 +27,40 @@ class CrewCommand(GroupCog, name="대원"):
     async def recruit(self, interaction: discord.Interaction, try_count:int = 1):
         # 다음 턴이 시작할 때 일정 수(0~2)의 대원을 추가한다. 매 턴 1회 가능하다. 팩션이 소유 중인 모병소에 따라 턴 당 최대 횟수가 증가한다.
         
-        database = self.bot.get_database(interaction.guild_id)
+        async_database = self.bot.get_async_database(interaction.guild_id)
+        
+        if (faction_data := await async_database.fetch(Faction.table_name, user_id=interaction.user.id)) is None:
+            raise warnings.NoFaction()
+        faction = Faction.from_data(faction_data)
+        
+        # 데이터베이스 작업은 쓰기 스레드에서 하나의 트랜잭션으로 실행함
+        try_count, members_recruited = await async_database.transaction(
+            self._recruit, faction, try_count, self.bot.get_server_manager(interaction.guild_id).detail
+        )
+        
+        if try_count == 0: await interaction.response.send_message("남은 모집 횟수가 없습니다."); return
         
-        faction = Faction.fetch_or_raise(database, warnings.NoFaction(), user_id=interaction.user.id).set_database(database)
+        await interaction.response.send_message(f"모집 횟수를 {try_count}회 사용해 새 인원을 {members_recruited}명 모집했습니다.")
+    
+    def _recruit(self, database: DatabaseManager, faction: Faction, try_count: int, detail: Detail) -> tuple[int, int]:
+        """
+        모집 횟수를 사용해 새 대원을 추가하고, (사용한 모집 횟수, 모집한 인원 수)를 반환함
+        """
+        faction.set_database(database)
         
         recruit_counter:CommandCounter = faction.get_command_counter(CommandCategory.RECRUIT)
         recruit_counter.set_database(database)
-        territory_ids:list[Row] = database.connection.execute(f"SELECT id FROM territory WHERE faction_id = {faction.id}").fetchall()
+        territory_ids:list[int] = database.fetch_column("territory", "id", faction_id=faction.id)
         recruit_limit = 1
         for territory_id in territory_ids:
-            recruit_limit += database.fetch_many(
-                "facility", category=FacilityCategory.RECRUITING_CAMP.value, territory_id=territory_id["id"]
-            ).__len__()
+            recruit_limit += database.count(
+                "facility", category=FacilityCategory.RECRUITING_CAMP.value, territory_id=territory_id
+            )
         
         if try_count + recruit_counter.amount > recruit_limit: try_count = recruit_limit - recruit_counter.amount
         else: recruit_counter.amount += try_count
         
-        if try_count == 0: await interaction.response.send_message("남은 모집 횟수가 없습니다."); return
+        if try_count == 0: return 0, 0
         
         members_recruited = 0
         for _ in range(try_count):
@@ -50,12 +68,10 @@ class CrewCommand(GroupCog, name="대원"):
             members_recruited += random.choices([0, 1, 2], [0.2, 0.7, 0.1])[0]
         
         for _ in range(members_recruited):
-            func.make_and_push_new_crew_package(database, Crew.new(faction.id), self.bot.get_server_manager(interaction.guild_id).detail)
-        
-        await interaction.response.send_message(f"모집 횟수를 {try_count}회 사용해 새 인원을 {members_recruited}명 모집했습니다.")
+            func.make_and_push_new_crew_package(database, Crew.new(faction.id), detail)
         
         recruit_counter.push()
-        database.connection.commit()
+        return try_count, members_recruited
     
     @app_commands.command(
         name = "열람",
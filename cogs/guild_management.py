@@ -2,6 +2,8 @@ import discord
 from discord.ext.commands import GroupCog
 from discord import app_commands, Colour
 
+from py_base.dbmanager import DatabaseManager
+from py_system.tableobj import GuildSetting
 from py_discord.bot_base import BotBase
 
 def get_mention_or_default(obj: discord.Role | discord.TextChannel):
@@ -64,7 +66,6 @@ class GuildManagement(GroupCog, name="서버설정"):
         admin_role:discord.Role,
         announce_channel:discord.TextChannel
     ):
-        database = self.bot.get_database(interaction.guild_id)
         server_manager = self.bot.get_server_manager(interaction.guild_id)
         server_manager.guild_setting.user_role_id = user_role.id
         server_manager.guild_setting.admin_role_id = admin_role.id
@@ -80,8 +81,11 @@ class GuildManagement(GroupCog, name="서버설정"):
         
         await interaction.response.send_message(embed=result_embed)
         
-        server_manager.guild_setting.push()
-        database.connection.commit()
+        await server_manager.async_database.transaction(self._push_guild_setting, server_manager.guild_setting)
+    
+    def _push_guild_setting(self, database: DatabaseManager, guild_setting: GuildSetting):
+        guild_setting.set_database(database)
+        guild_setting.push()
 
 async def setup(bot: BotBase):
     await bot.add_cog(GuildManagement(bot))
\ No newline at end of file
@@ -4,6 +4,7 @@ from discord import app_commands
 from datetime import datetime
 
 from py_base import utility
+from py_base.dbmanager import DatabaseManager
 from py_system.tableobj import User
 from py_discord import embeds, views
 from py_discord.bot_base import BotBase
@@ -20,8 +21,6 @@ class UserManagement(GroupCog, name="유저"):
     )
     async def register(self, interaction: discord.Interaction):
         
-        database = self.bot.get_database(interaction.guild_id)
-
         # 이미 등록되어 있는지 확인
         self.bot.check_user_not_exists_or_raise(interaction)
         
@@ -29,8 +28,7 @@ class UserManagement(GroupCog, name="유저"):
             discord_id=interaction.user.id, 
             discord_name=interaction.user.name, 
             register_date=datetime.now().strftime(utility.DATE_FORMAT))
-        user.set_database(database)
-        user.push()
+        await self.bot.get_async_database(interaction.guild_id).transaction(self._push_user, user)
 
         # 유저에게 "주인"이라는 이름의 역할 부여
         # id로 말고 이름으로 찾아야 함
@@ -49,8 +47,6 @@ class UserManagement(GroupCog, name="유저"):
         # id, 이름, 등록일 출력
 
         await interaction.response.send_message(embed=embeds.register(user), ephemeral=True)
-        
-        database.connection.commit()
 
     @app_commands.command(
         name = "열람",
@@ -94,12 +90,13 @@ class UserManagement(GroupCog, name="유저"):
     )
     async def sync(self, interaction: discord.Interaction):
         
-        user = User.fetch_or_raise(self.bot.get_database(interaction.guild_id), warnings.NotRegistered(interaction.user.display_name), discord_id=interaction.user.id)
+        database = self.bot.get_database(interaction.guild_id)
+        user = User.fetch_or_raise(database, warnings.NotRegistered(interaction.user.display_name), discord_id=interaction.user.id)
         
         # 닉네임 동기화
         if user.discord_name != interaction.user.name:
             user.discord_name = interaction.user.name
-            user.push()
+            await self.bot.get_async_database(interaction.guild_id).transaction(self._push_user, user)
         
         # 동기화 완료 엠베드 출력
         await interaction.response.send_message(
@@ -124,7 +121,7 @@ class UserManagement(GroupCog, name="유저"):
         target_user = User.fetch_or_raise(database, warnings.NotRegistered(interaction.user.display_name), discord_id=interaction.user.id)
         
         # 데이터에서 유저 삭제
-        database.delete_with_id("user", target_user.id)
+        await self.bot.get_async_database(interaction.guild_id).transaction(self._delete_user, target_user.id)
         # 유저에게 "주인"이라는 이름의 역할 삭제
         await target_member.remove_roles(
             discord.utils.get(
@@ -135,6 +132,14 @@ class UserManagement(GroupCog, name="유저"):
         
         await interaction.response.send_message(f"**{target_member.display_name}**님을 아리슬레나에서 등록 해제했습니다.", ephemeral=True)
         await self.bot.announce_channel(f"**{target_member.display_name}**님이 아리슬레나에서 등록 해제되었습니다.", self.bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id)
+    
+    # 데이터베이스 쓰기는 이벤트 루프를 막지 않도록 async_database의 쓰기 스레드에서 트랜잭션으로 실행함
+    def _push_user(self, database: DatabaseManager, user: User):
+        user.set_database(database)
+        user.push()
+    
+    def _delete_user(self, database: DatabaseManager, user_id: int):
+        database.delete_with_id(User.table_name, user_id)
         
 
 async def setup(bot: BotBase):
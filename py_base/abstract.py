@@ -37,6 +37,10 @@ class ArislenaEnum(IntEnum):
     def __ne__(self, other) -> bool:
         return not self.__eq__(other)
     
+    def __hash__(self) -> int:
+        # __eq__가 값으로 비교하므로, 같은 값의 int와 같은 해시를 가짐 (dict의 키로 쓸 수 있음)
+        return hash(self.value)
+    
     def express(self) -> str:
         """
         이모지, 번역 이름을 반환함
@@ -1,4 +1,4 @@
-import logging
+import logging, os
 from py_base.utility import CWD, FULL_DATE_FORMAT
 
 formatter = logging.Formatter(
@@ -10,5 +10,7 @@ ari_file_handler = logging.FileHandler(str(CWD / "arislena.log"), encoding="utf-
 ari_file_handler.setFormatter(formatter)
 
 ari_logger = logging.getLogger("arislena")
-ari_logger.setLevel(logging.DEBUG)
+# 로그 수준은 환경 변수 ARISLENA_LOG_LEVEL로 정할 수 있음 (DEBUG, INFO, WARNING 등; 기본값 DEBUG)
+# DEBUG보다 높으면 주사위를 굴릴 때마다 남기는 로그 등을 만들지 않음
+ari_logger.setLevel(os.environ.get("ARISLENA_LOG_LEVEL", "DEBUG").upper())
 ari_logger.addHandler(ari_file_handler)
@@ -1,9 +1,13 @@
 """
 주사위 모듈
 """
-import random
+import random, logging
 from copy import deepcopy
-from typing import Any
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+import numpy as np
 
 from py_base.abstract import ArislenaEnum
 from py_base.ari_enum import D9Judge, D20Judge
@@ -17,6 +21,154 @@ def adjust(value, min_value, max_value) -> int:
     value = max(value, min_value)
     return value
 
+# roll_many가 기본으로 쓰는 난수 생성기
+_rng = np.random.default_rng()
+
+@dataclass(frozen=True)
+class GradeTable:
+    """
+    주사위 설정(dice_min, dice_max, grade_distribution, grade_mod) 하나를 컴파일한 표
+    ---
+    grades : 주사위 눈 - dice_min -> grade_mod가 적용된 등급\n
+    grade_array : grades의 numpy 배열 (읽기 전용, roll_many에서 사용함)\n
+    ranges : {등급: [최소 숫자, 최대 숫자]} (grade_mod가 적용되지 않은 원래 범위)\n
+    ---
+    grade_distribution이 덮지 못한 주사위 눈은 가장 가까운 등급으로 간주함\n
+    같은 설정의 주사위는 get_grade_table로 같은 GradeTable 객체를 공유하므로 값을 바꾸면 안 됨
+    """
+    dice_min: int
+    dice_max: int
+    grade_distribution: tuple[int, ...]
+    grade_mod: int
+    grades: tuple[int, ...] = field(init=False, repr=False)
+    grade_array: np.ndarray = field(init=False, repr=False, compare=False)
+    ranges: dict[str, list[int]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        grade_min, grade_max = 0, len(self.grade_distribution) - 1
+        size = self.dice_max - self.dice_min + 1
+
+        grade_array = np.repeat(np.arange(grade_min, grade_max + 1), self.grade_distribution)
+        grade_array = np.pad(grade_array[:size], (0, max(0, size - len(grade_array))), mode="edge")
+        grade_array = np.clip(grade_array + self.grade_mod, grade_min, grade_max).astype(np.int8)
+        grade_array.flags.writeable = False
+
+        ranges, count = {}, self.dice_min
+        for grade, num in enumerate(self.grade_distribution, start=grade_min):
+            ranges[str(grade)] = [count, count + num - 1]
+            count += num
+
+        object.__setattr__(self, "grades", tuple(grade_array.tolist()))
+        object.__setattr__(self, "grade_array", grade_array)
+        object.__setattr__(self, "ranges", ranges)
+
+    def get_index(self, roll: int) -> int:
+        """
+        주사위 눈에 해당하는 표의 인덱스 (표를 벗어난 눈은 양 끝으로 간주함)
+        """
+        return min(max(roll - self.dice_min, 0), len(self.grades) - 1)
+
+    def get_grade(self, roll: int) -> int:
+        return self.grades[self.get_index(roll)]
+
+    def get_grades(self, rolls: np.ndarray) -> np.ndarray:
+        return self.grade_array[np.clip(rolls - self.dice_min, 0, len(self.grades) - 1)]
+
+@lru_cache(maxsize=256)
+def get_grade_table(
+    dice_min: int, 
+    dice_max: int, 
+    grade_distribution: tuple[int, ...], 
+    grade_mod: int
+) -> GradeTable:
+    """
+    설정마다 한 번만 GradeTable을 만들고, 같은 설정의 주사위끼리 공유함
+    """
+    return GradeTable(dice_min, dice_max, grade_distribution, grade_mod)
+
+class RollBatch(NamedTuple):
+    """
+    Dice.roll_many의 결과
+    ---
+    rolls : 보정값이 적용된 주사위 눈의 배열\n
+    grades : 주사위 눈에 해당하는 등급의 배열 (grade_mod가 적용됨)\n
+    judge_enum : 등급에 대한 판정 enum 리스트\n
+    """
+    rolls: np.ndarray
+    grades: np.ndarray
+    judge_enum: list[ArislenaEnum]
+    
+    def get_judges(self) -> list[ArislenaEnum]:
+        """
+        등급마다의 판정(enum) 리스트를 반환함
+        """
+        return [self.judge_enum[grade] for grade in self.grades.tolist()]
+
+@dataclass(frozen=True, eq=False)
+class RollDistribution:
+    """
+    주사위 설정 하나의 정확한 확률 분포 (dice_mod와 최솟값/최댓값 보정, grade_mod가 적용됨)
+    ---
+    rolls : 나올 수 있는 주사위 눈 (작은 순서)\n
+    roll_probs : rolls의 각 주사위 눈이 나올 확률\n
+    grade_probs : 등급(인덱스)마다 나올 확률\n
+    ---
+    get_roll_distribution으로 설정마다 한 번만 만들어 공유하므로, 배열은 읽기 전용임
+    """
+    rolls: np.ndarray
+    roll_probs: np.ndarray
+    grade_probs: np.ndarray
+
+    def get_expectation(self) -> float:
+        """
+        주사위 눈의 기댓값
+        """
+        return float(self.rolls @ self.roll_probs)
+
+    def get_grade_expectation(self) -> float:
+        """
+        등급의 기댓값
+        """
+        return float(np.arange(len(self.grade_probs)) @ self.grade_probs)
+
+    def get_prob(self, roll: int) -> float:
+        """
+        주사위 눈이 정확히 roll일 확률
+        """
+        return float(self.roll_probs[self.rolls == roll].sum())
+
+    def get_expectation_of(self, func) -> float:
+        """
+        주사위 눈에 func를 적용한 값의 기댓값 (func는 주사위 눈의 배열을 받아 같은 길이의 배열을 반환해야 함)
+        """
+        return float(np.asarray(func(self.rolls)) @ self.roll_probs)
+
+@lru_cache(maxsize=256)
+def get_roll_distribution(
+    table: GradeTable, 
+    dice_mod: int, 
+    enable_min_cap: bool = True, 
+    enable_max_cap: bool = True
+) -> RollDistribution:
+    """
+    주사위 눈이 dice_min ~ dice_max에서 고르게 나온다고 보고, 보정을 적용한 정확한 분포를 계산함
+    """
+    rolls = np.arange(table.dice_min, table.dice_max + 1) + dice_mod
+    rolls = np.clip(
+        rolls,
+        table.dice_min if enable_min_cap else None,
+        table.dice_max if enable_max_cap else None
+    ) if enable_min_cap or enable_max_cap else rolls
+    # 보정으로 같은 눈이 된 경우(최솟값/최댓값)의 확률을 합침
+    values, counts = np.unique(rolls, return_counts=True)
+    roll_probs = counts / counts.sum()
+    grade_probs = np.bincount(
+        table.get_grades(values), weights=roll_probs, minlength=len(table.grade_distribution)
+    )
+    for array in (values, roll_probs, grade_probs):
+        array.flags.writeable = False
+    return RollDistribution(values, roll_probs, grade_probs)
+
 class DiceOption:
     
     def __init__(self):
@@ -80,7 +232,7 @@ class Dice:
         """
         self.dice_min = dice_min
         self.dice_max = dice_max
-        self._grade_distribution = grade_distribution
+        self._grade_distribution = list(grade_distribution)
         self._judge_enum = judge_enum
         self._dice_mod = dice_mod
         self._grade_mod = grade_mod
@@ -88,7 +240,7 @@ class Dice:
         self.name:str = None
         self.option:DiceOption = DiceOption()
         self._grade_min = 0
-        self._grade_table:dict[str, list[int]] = {}
+        self._table: GradeTable | None = None
         self._last_roll: int = None
         self._last_grade = None
         self._last_judge = None
@@ -132,8 +284,8 @@ class Dice:
         return sum(self.roll_multiple_times(other))
     
     @property
-    def grade_table(self):
-        return self._grade_table
+    def grade_table(self) -> dict[str, list[int]]:
+        return self._table.ranges if self._table is not None else {}
     
     @property
     def last_roll(self):
@@ -162,22 +314,14 @@ class Dice:
 
     def _make_grade_table(self):
         """
-        grade_distribution과 grade_mod를 기반으로 grade_table을 생성\n
-        grade_table은 {등급: [최소 숫자, 최대 숫자]} 형식의 딕셔너리
+        grade_distribution과 grade_mod에 맞는 GradeTable을 가져옴 (같은 설정의 주사위끼리 공유함)
         """
-
-        grade_table = {}
-        count = self.dice_min
-        for grade, num in enumerate(self._grade_distribution, start=self._grade_min):
-            grade_table[str(grade)] = [count, count + num - 1]
-            count += num
-        
-        self._grade_table = grade_table
-        
-        # count = self.dice_min
-        # for grade, num in enumerate(self.grade_distribution, start=self.grade_min):
-        #     self.grade_table[grade] = [count, count + num - 1]
-        #     count += num
+        self._table = get_grade_table(
+            self.dice_min, 
+            self.dice_max, 
+            tuple(self._grade_distribution), 
+            self._grade_mod
+        )
     
     def _resize_grade(self, grade_expand, grade_reduce, value):
         """
@@ -190,22 +334,32 @@ class Dice:
         self._make_grade_table()
 
     def _check_grade_table(self):
-        if len(self._grade_table) == 0: return False
-        else: return True
+        return self._table is not None
     
     def _adjust_dice(self, value) -> int:
         """
         value가 min_value보다 작으면 min_value로, max_value보다 크면 max_value로 보정\n
         """
         if self.option.enable_min_cap:
-            value = min(value, self.dice_min)
+            value = max(value, self.dice_min)
         if self.option.enable_max_cap:
-            value = max(value, self.dice_max)
+            value = min(value, self.dice_max)
         return value
     
+    def _adjust_dice_many(self, values: np.ndarray) -> np.ndarray:
+        """
+        _adjust_dice를 배열의 모든 원소에 적용함
+        """
+        return np.clip(
+            values,
+            self.dice_min if self.option.enable_min_cap else None,
+            self.dice_max if self.option.enable_max_cap else None
+        ) if self.option.enable_min_cap or self.option.enable_max_cap else values
+    
     def _roll_core(self):
         roll = random.randint(self.dice_min, self.dice_max) + self._dice_mod
-        ari_logger.debug(f"{self.name} dice roll: {self.dice_min} ~ {self.dice_max} + {self._dice_mod}; {roll}")
+        if ari_logger.isEnabledFor(logging.DEBUG):
+            ari_logger.debug(f"{self.name} dice roll: {self.dice_min} ~ {self.dice_max} + {self._dice_mod}; {roll}")
         return self._adjust_dice(roll)
         
     def _update(self):
@@ -250,33 +404,67 @@ class Dice:
         """
         return (self._roll_core() for _ in range(times))
     
+    def roll_many(
+        self, 
+        size: int, 
+        dice_mods: int | np.ndarray | None = None, 
+        rng: np.random.Generator | None = None
+    ) -> RollBatch:
+        """
+        주사위 size개를 numpy로 한 번에 굴리고, 주사위 눈과 등급의 배열을 반환\n
+        last_roll, last_grade, last_judge는 바뀌지 않음\n
+        ---
+        dice_mods : 주사위마다의 보정값. 정수나 길이가 size인 배열 (None이면 이 주사위의 dice_mod)\n
+        rng : 사용할 난수 생성기 (None이면 모듈의 난수 생성기)\n
+        ---
+        예시) 대원마다 경험치 레벨을 보정값으로 하는 D20을 한 번에 굴리는 경우
+        ```
+        batch = D20().roll_many(len(levels), dice_mods=levels)
+        batch.rolls, batch.grades, batch.get_judges()
+        ```
+        """
+        if rng is None: rng = _rng
+        mods = self._dice_mod if dice_mods is None else np.asarray(dice_mods)
+        rolls = self._adjust_dice_many(rng.integers(self.dice_min, self.dice_max + 1, size=size) + mods).astype(np.int16)
+        return RollBatch(rolls, self._table.get_grades(rolls), self._judge_enum)
+    
+    def get_distribution(self) -> RollDistribution:
+        """
+        이 주사위의 정확한 확률 분포를 반환 (설정이 같은 주사위끼리 공유함)
+        """
+        return get_roll_distribution(
+            self._table, self._dice_mod, self.option.enable_min_cap, self.option.enable_max_cap
+        )
+    
+    def get_judge_distribution(self) -> dict[ArislenaEnum, float]:
+        """
+        판정(enum)마다 나올 확률을 반환
+        """
+        return {
+            judge: float(prob) 
+            for judge, prob in zip(self._judge_enum, self.get_distribution().grade_probs)
+        }
+    
+    def get_expectation(self) -> float:
+        """
+        주사위 눈의 기댓값
+        """
+        return self.get_distribution().get_expectation()
+    
     def get_grade(self) -> int:
         """
-        self.grade_table에 따라 주사위 숫자에 해당하는 등급을 반환\n
-        grade_table은 {등급: [최소 숫자, 최대 숫자]} 형식의 딕셔너리여야 함\n
+        GradeTable에 따라 주사위 숫자에 해당하는 등급(grade_mod가 적용됨)을 반환\n
         """
         if not self._check_grade_table(): return
         if self._last_roll is None: return
-
-        grade_result = 0
-        for grade, num_range in self._grade_table.items():
-            if num_range[0] <= self._last_roll <= num_range[1]: grade_result = grade
-        
-        if self._grade_mod != 0:
-            grade_result = adjust(
-                grade_result + self._grade_mod, 
-                self._grade_min, 
-                len(self._grade_table) - 1
-            )
-        
-        return int(grade_result)
+        return self._table.get_grade(self._last_roll)
 
     def get_judge(self) -> ArislenaEnum | None:
         """
         주사위 숫자에 따른 판정(enum)을 반환\n
         """
-        if self._last_grade is None: return
-        return self._judge_enum[self._last_grade]
+        if self._last_roll is None or not self._check_grade_table(): return
+        return self._judge_enum[self._table.get_grade(self._last_roll)]
 
 
 
@@ -0,0 +1,165 @@
+"""
+DatabaseManager를 이벤트 루프 밖에서 실행하는 비동기 인터페이스
+
+sqlite3의 호출은 모두 블로킹이므로, 코루틴 안에서 DatabaseManager를 직접 호출하면 그동안 봇의 모든 길드가 멈춤
+AsyncDatabase는 쓰기를 길드 데이터베이스마다 하나인 쓰기 스레드에서, 읽기를 작은 읽기 스레드 풀에서 실행함
+"""
+import sqlite3, asyncio, threading, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from py_base.dbmanager import DatabaseManager, get_select_statement, get_scalar_statement, STATEMENT_CACHE_SIZE, EXISTS, COUNT
+from py_base.sqltrace import TracedConnection
+
+T = TypeVar("T")
+
+# 데이터베이스마다 사용하는 읽기 스레드(연결)의 수
+READER_COUNT = 2
+
+class AsyncDatabase:
+    """
+    사용법:
+    ```
+    adb = AsyncDatabase(database)
+    row = await adb.fetch(Faction.table_name, user_id=user_id)
+
+    def recruit(database: DatabaseManager) -> int:
+        ...
+    count = await adb.transaction(recruit)
+    ```
+
+    쓰기(run, transaction)는 하나의 쓰기 스레드에서 순서대로 실행됨
+    DatabaseManager의 연결과 transaction()의 목록은 스레드마다 따로 있으므로, 쓰기 스레드의 트랜잭션은 이벤트 루프 스레드의 쓰기와 섞이지 않음
+    (같은 DatabaseManager를 이벤트 루프 스레드에서 직접 쓰면, 쓰기 스레드의 트랜잭션이 끝날 때까지 sqlite의 잠금을 기다림)
+    여러 쓰기를 하나의 트랜잭션으로 묶으려면, 그 쓰기를 모두 하나의 func 안에서 실행함 (transaction을 여러 번 await하면 각각 commit됨)
+    읽기(fetch, fetch_many, fetch_all, fetch_column)는 읽기 전용 연결을 가진 스레드 풀에서 실행되므로, commit되지 않은 변경 사항은 보이지 않음
+    (WAL 모드에서는 읽기가 쓰기 트랜잭션을 기다리지 않음)
+    """
+
+    def __init__(self, database: DatabaseManager, reader_count: int = READER_COUNT):
+        self.database = database
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"db-writer-{database.stem}")
+        self._readers = ThreadPoolExecutor(max_workers=reader_count, thread_name_prefix=f"db-reader-{database.stem}")
+
+        self._local = threading.local()
+        self._reader_connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _get_reader_connection(self) -> sqlite3.Connection:
+        """
+        현재 읽기 스레드의 읽기 전용 연결을 반환함 (없으면 새로 만듦)
+        """
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                f"{self.database.file_path.as_uri()}?mode=ro",
+                uri=True,
+                # close()는 다른 스레드에서 호출되므로 같은 스레드인지 확인하지 않음
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                factory=TracedConnection
+            )
+            connection.row_factory = sqlite3.Row
+            self.database.profile.apply(connection, read_only=True)
+            self._local.connection = connection
+            with self._lock:
+                self._reader_connections.append(connection)
+        return connection
+
+    def _read(self, sql: str, parameters: list, fetch_one: bool) -> sqlite3.Row | list[sqlite3.Row] | None:
+        cursor = self._get_reader_connection().execute(sql, parameters)
+        try:
+            return cursor.fetchone() if fetch_one else cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    async def _submit(executor: ThreadPoolExecutor, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        func를 executor에서 실행함
+
+        호출한 코루틴의 컨텍스트(contextvars)를 복사해 실행하므로, sqlcounter의 상호작용별 집계가 스레드에서도 유지됨
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(contextvars.copy_context().run, func, *args, **kwargs)
+        )
+
+    async def _run_reader(self, sql: str, parameters: list, fetch_one: bool):
+        return await self._submit(self._readers, self._read, sql, parameters, fetch_one)
+
+    async def fetch(self, table: str, *raw_statements, **statements) -> sqlite3.Row | None:
+        """
+        DatabaseManager.fetch와 같지만, 읽기 스레드에서 실행됨
+        """
+        if not (raw_statements or statements): raise ValueError("At least one statement is required.")
+        return await self._run_reader(*get_select_statement(table, raw_statements, statements), True)
+
+    async def fetch_many(self, table: str, *raw_statements, **statements) -> list[sqlite3.Row]:
+        """
+        DatabaseManager.fetch_many와 같지만, 읽기 스레드에서 실행됨
+        """
+        if not (raw_statements or statements): raise ValueError("At least one statement is required.")
+        return await self._run_reader(*get_select_statement(table, raw_statements, statements), False)
+
+    async def fetch_all(self, table: str) -> list[sqlite3.Row]:
+        """
+        DatabaseManager.fetch_all과 같지만, 읽기 스레드에서 실행됨
+        """
+        return await self._run_reader(*get_select_statement(table), False)
+
+    async def fetch_column(self, table: str, column: str, *raw_statements, **statements) -> list[Any]:
+        """
+        DatabaseManager.fetch_column과 같지만, 읽기 스레드에서 실행됨
+        """
+        rows = await self._run_reader(*get_select_statement(table, raw_statements, statements, (column,)), False)
+        return [row[0] for row in rows]
+
+    async def exists(self, table: str, *raw_statements, **statements) -> bool:
+        """
+        DatabaseManager.exists와 같지만, 읽기 스레드에서 실행됨
+        """
+        row = await self._run_reader(*get_scalar_statement(EXISTS, table, raw_statements, statements), True)
+        return bool(row[0])
+
+    async def count(self, table: str, *raw_statements, **statements) -> int:
+        """
+        DatabaseManager.count와 같지만, 읽기 스레드에서 실행됨
+        """
+        row = await self._run_reader(*get_scalar_statement(COUNT, table, raw_statements, statements), True)
+        return row[0]
+
+    async def _run_writer(self, func: Callable[..., T], *args, **kwargs) -> T:
+        return await self._submit(self._writer, func, *args, **kwargs)
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        func(database, *args, **kwargs)를 쓰기 스레드에서 실행하고 그 결과를 반환함 (commit하지 않음)
+
+        TableObject의 메소드처럼 DatabaseManager를 직접 쓰는 동기 코드를 이벤트 루프 밖에서 실행할 때 사용함
+        """
+        return await self._run_writer(func, self.database, *args, **kwargs)
+
+    def _transaction(self, func: Callable[..., T], *args, **kwargs) -> T:
+        with self.database.transaction():
+            return func(self.database, *args, **kwargs)
+
+    async def transaction(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        func(database, *args, **kwargs)를 쓰기 스레드에서 하나의 트랜잭션(DatabaseManager.transaction)으로 실행함
+
+        func에서 예외가 발생하면 rollback하고 예외를 다시 발생시킴
+        """
+        return await self._run_writer(self._transaction, func, *args, **kwargs)
+
+    def close(self):
+        """
+        스레드를 종료하고 읽기 전용 연결을 닫음
+        """
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for connection in self._reader_connections:
+                connection.close()
+            self._reader_connections.clear()
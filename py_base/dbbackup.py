@@ -0,0 +1,131 @@
+"""
+sqlite3의 online backup API로 .db 파일의 백업을 만들고, 보존 정책에 따라 오래된 백업을 정리하는 모듈
+
+파일을 그대로 복사하지 않으므로, 쓰기 도중에 백업해도 깨진 사본이 만들어지지 않음
+"""
+import sqlite3, gzip, shutil, datetime
+from dataclasses import dataclass
+from pathlib import Path
+
+from py_base.ari_logger import ari_logger
+from py_base.utility import FULL_DATE_FORMAT_NO_SPACE
+
+# backup 한 단계에서 복사하는 페이지 수 (단계 사이에는 원본 데이터베이스의 잠금이 풀려 다른 쓰기가 진행될 수 있음)
+BACKUP_PAGES_PER_STEP = 256
+# backup 단계 사이에 쉬는 시간 (초)
+BACKUP_STEP_SLEEP = 0.005
+
+BACKUP_SUFFIX = "_backup.db"
+COMPRESSED_SUFFIX = ".gz"
+
+@dataclass
+class BackupPolicy:
+    """
+    백업 보존 정책
+
+    keep_last : 날짜와 관계없이 가장 최근 백업을 몇 개 남길지
+    keep_daily : 최근 며칠 동안, 하루마다 가장 최근 백업을 하나씩 남김
+    keep_weekly : 최근 몇 주 동안, 한 주마다 가장 최근 백업을 하나씩 남김
+    compress : 백업 파일을 gzip으로 압축할지
+    """
+    keep_last: int = 3
+    keep_daily: int = 7
+    keep_weekly: int = 4
+    compress: bool = False
+
+def get_backup_path(directory: Path, stem: str, now: datetime.datetime | None = None) -> Path:
+    if now is None: now = datetime.datetime.now()
+    return Path(directory, f"{stem}_{now.strftime(FULL_DATE_FORMAT_NO_SPACE)}{BACKUP_SUFFIX}")
+
+def backup_connection(
+    connection: sqlite3.Connection,
+    backup_path: Path,
+    *,
+    compress: bool = False,
+    pages: int = BACKUP_PAGES_PER_STEP
+) -> Path:
+    """
+    connection의 main 데이터베이스를 backup_path에 백업하고, 백업 파일의 경로를 반환함
+
+    pages개의 페이지씩 나누어 복사하므로, 백업하는 동안에도 같은 데이터베이스에 쓸 수 있음 (백업 도중의 변경 사항도 백업에 반영됨)
+    compress가 True이면 backup_path에 .gz를 붙인 압축 파일을 만듦
+    """
+    backup_path = Path(backup_path)
+    backup_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 미완성 백업 파일이 남지 않도록 임시 파일에 백업한 뒤 이름을 바꿈
+    temp_path = backup_path.with_name(backup_path.name + ".tmp")
+    destination = sqlite3.connect(temp_path)
+    try:
+        connection.backup(destination, pages=pages, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        destination.close()
+
+    if not compress:
+        temp_path.replace(backup_path)
+        return backup_path
+
+    compressed_path = backup_path.with_name(backup_path.name + COMPRESSED_SUFFIX)
+    with open(temp_path, "rb") as src, gzip.open(compressed_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    temp_path.unlink()
+    return compressed_path
+
+def backup_file(
+    database_path: Path,
+    backup_path: Path,
+    *,
+    compress: bool = False,
+    pages: int = BACKUP_PAGES_PER_STEP
+) -> Path:
+    """
+    database_path의 데이터베이스를 읽기 전용으로 새로 연결해 backup_connection으로 백업함
+
+    다른 스레드가 쓰고 있는 연결을 함께 쓰지 않으므로 어느 스레드에서나 호출할 수 있음 (commit된 내용만 백업됨)
+    """
+    source = sqlite3.connect(f"{Path(database_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return backup_connection(source, backup_path, compress=compress, pages=pages)
+    finally:
+        source.close()
+
+def _get_backup_time(path: Path, stem: str) -> datetime.datetime | None:
+    name = path.name.removesuffix(COMPRESSED_SUFFIX)
+    if not (name.startswith(f"{stem}_") and name.endswith(BACKUP_SUFFIX)): return None
+    try:
+        return datetime.datetime.strptime(name[len(stem) + 1:-len(BACKUP_SUFFIX)], FULL_DATE_FORMAT_NO_SPACE)
+    except ValueError:
+        return None
+
+def apply_retention(directory: Path, stem: str, policy: BackupPolicy) -> list[Path]:
+    """
+    directory에 있는 stem의 백업 중 policy에 따라 남길 백업이 아닌 것을 삭제하고, 삭제한 파일의 경로를 반환함
+    """
+    backups: list[tuple[datetime.datetime, Path]] = []
+    for path in Path(directory).glob(f"{stem}_*{BACKUP_SUFFIX}*"):
+        if (backup_time := _get_backup_time(path, stem)) is not None:
+            backups.append((backup_time, path))
+    backups.sort(reverse=True)
+
+    keep: set[Path] = {path for _, path in backups[:policy.keep_last]}
+
+    days: set[datetime.date] = set()
+    weeks: set[tuple[int, int]] = set()
+    for backup_time, path in backups:
+        day = backup_time.date()
+        if day not in days and len(days) < policy.keep_daily:
+            days.add(day)
+            keep.add(path)
+        week = tuple(backup_time.isocalendar())[:2]
+        if week not in weeks and len(weeks) < policy.keep_weekly:
+            weeks.add(week)
+            keep.add(path)
+
+    removed = []
+    for _, path in backups:
+        if path in keep: continue
+        path.unlink(missing_ok=True)
+        removed.append(path)
+    if removed:
+        ari_logger.info(f"{stem}의 오래된 백업 {len(removed)}개를 삭제했습니다.")
+    return removed
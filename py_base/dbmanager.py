@@ -1,51 +1,392 @@
 """
 .db 파일과 sqlite3으로서 상호작용하는 클래스들
 """
-import sqlite3
+import sqlite3, threading, os
 from pathlib import Path
-from typing import Iterable, Any
+from typing import Iterable, Iterator, Any, Callable
 from datetime import datetime
-import shutil
+from functools import lru_cache
+from dataclasses import dataclass
+from contextlib import contextmanager
+import asyncio
 
 from py_base.ari_logger import ari_logger
-from py_base.utility import DATA_DIR, sql_value, FULL_DATE_FORMAT_NO_SPACE
+from py_base.utility import DATA_DIR, sql_parameter
+from py_base.dbbackup import BackupPolicy, backup_file, get_backup_path, apply_retention
+from py_base.sqltrace import TracedConnection
 
 ON_DELETE_CASCADE = "ON DELETE CASCADE"
 ON_DELETE_SET_NULL = "ON DELETE SET NULL"
 ON_UPDATE_CASCADE = "ON UPDATE CASCADE"
 
+SELECT = "SELECT"
+INSERT = "INSERT"
+UPDATE = "UPDATE"
+DELETE = "DELETE"
+UPSERT = "UPSERT"
+EXISTS = "EXISTS"
+COUNT = "COUNT"
 
-def log_query(query:str):
-    ari_logger.debug(f"[SQL]\t{query}")
+# TableObject가 선언한 인덱스의 이름 접두사 (이 접두사가 붙은 인덱스만 자동으로 생성/삭제함)
+INDEX_PREFIX = "ix_"
+
+# sqlite3 연결마다 준비(prepare)된 statement를 보관하는 개수 (기본값 128)
+STATEMENT_CACHE_SIZE = 256
+
+# fetch_in이 한 번의 IN (...)에 넣는 값의 최대 개수 (sqlite3의 바인딩 변수 개수 제한보다 작아야 함)
+IN_CHUNK_SIZE = 512
+# iter_many, iter_all이 한 번에 fetchmany하는 행의 수
+FETCH_CHUNK_SIZE = 256
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """
+    sqlite3 연결마다 적용하는 PRAGMA 설정
+
+    journal_mode : WAL이면 읽기 연결이 쓰기 트랜잭션과 동시에 실행될 수 있음
+    synchronous : WAL에서는 NORMAL이어도 데이터베이스가 깨지지 않음 (전원이 꺼지면 마지막 commit 몇 개만 사라질 수 있음)
+    cache_size_kib : 연결마다의 페이지 캐시 크기 (KiB)
+    mmap_size : 메모리에 매핑해서 읽을 최대 크기 (byte)
+    temp_store : 임시 테이블과 인덱스를 저장하는 곳
+    foreign_keys : 외래 키 제약 조건을 검사할지
+    busy_timeout_ms : 다른 연결이 잠금을 가지고 있을 때 기다리는 시간 (ms)
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 16 * 1024
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    # Faction.user_id에 User.id가 아닌 디스코드 id가 저장되는 등, 아직 외래 키를 지키지 않는 코드가 있어 기본값은 False
+    # 배포마다 환경 변수 ARISLENA_FOREIGN_KEYS=on으로 켤 수 있음 (DEFAULT_CONNECTION_PROFILE)
+    foreign_keys: bool = False
+    busy_timeout_ms: int = 5000
+
+    def apply(self, connection: sqlite3.Connection, read_only: bool = False) -> dict[str, Any]:
+        """
+        connection에 설정을 적용하고, 실제로 적용된 값을 반환함
+
+        read_only이면 journal_mode는 바꾸지 않음 (읽기 전용 연결은 journal_mode를 바꿀 수 없음)
+        """
+        if not read_only:
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        connection.execute(f"PRAGMA cache_size={-self.cache_size_kib}")
+        connection.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        connection.execute(f"PRAGMA temp_store={self.temp_store}")
+        connection.execute(f"PRAGMA foreign_keys={'ON' if self.foreign_keys else 'OFF'}")
+        connection.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        
+        return {
+            pragma: connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "foreign_keys", "busy_timeout")
+        }
+
+# 외래 키 제약 조건은 환경 변수 ARISLENA_FOREIGN_KEYS가 on일 때만 켬
+# 켜져 있으면 migrate는 외래 키 위반이 남아 있는 데이터베이스를 마이그레이션하지 않고 ValueError를 발생시킴
+DEFAULT_CONNECTION_PROFILE = ConnectionProfile(
+    foreign_keys=os.environ.get("ARISLENA_FOREIGN_KEYS", "off").lower() == "on"
+)
+
+@lru_cache(maxsize=None)
+def compile_sql(
+    operation: str, 
+    table: str, 
+    columns: tuple[str, ...] = (), 
+    conditions: tuple[str, ...] = (), 
+    raw_conditions: tuple[str, ...] = ()
+) -> str:
+    """
+    (작업, 테이블, 컬럼 집합) 조합마다 sql 문자열을 한 번만 만들고, 이후에는 캐시된 문자열을 반환함
+    
+    값은 모두 ? 자리표시자로 남겨두므로, 같은 조합의 쿼리는 항상 같은 sql 문자열이 되어 sqlite3의 statement cache를 재사용함
+    ---
+    operation: SELECT, INSERT, UPDATE, DELETE, UPSERT, EXISTS, COUNT 중 하나\n
+    columns: SELECT에서는 가져올 컬럼(비어 있으면 *), INSERT, UPDATE, UPSERT에서는 값을 넣을 컬럼\n
+    conditions: WHERE 절에 `컬럼 = ?` 꼴로 들어갈 컬럼. UPSERT에서는 ON CONFLICT의 대상 컬럼\n
+    raw_conditions: WHERE 절에 그대로 들어갈 조건문
+    """
+    where = [f"{column} = ?" for column in conditions] + list(raw_conditions)
+    where_clause = f" WHERE {' AND '.join(where)}" if where else ""
+    
+    match operation:
+        case "SELECT":
+            return f"SELECT {', '.join(columns) if columns else '*'} FROM {table}{where_clause}"
+        case "INSERT":
+            if not columns: return f"INSERT INTO {table} DEFAULT VALUES"
+            return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        case "UPDATE":
+            return f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)}{where_clause}"
+        case "DELETE":
+            return f"DELETE FROM {table}{where_clause}"
+        case "EXISTS":
+            # 조건에 맞는 첫 행을 찾으면 바로 멈추고, 행이 없어도 0을 담은 행 하나를 반환함
+            return f"SELECT EXISTS (SELECT 1 FROM {table}{where_clause})"
+        case "COUNT":
+            return f"SELECT COUNT(*) FROM {table}{where_clause}"
+        case "UPSERT":
+            insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+            updates = [f"{column} = excluded.{column}" for column in columns if column not in conditions]
+            if not updates: return f"{insert} ON CONFLICT({', '.join(conditions)}) DO NOTHING"
+            return f"{insert} ON CONFLICT({', '.join(conditions)}) DO UPDATE SET {', '.join(updates)}"
+        case _:
+            raise ValueError(f"지원하지 않는 sql 작업입니다: {operation}")
+
+def get_select_statement(
+    table: str, 
+    raw_statements: tuple[str, ...] = (), 
+    statements: dict[str, Any] | None = None, 
+    columns: tuple[str, ...] = ()
+) -> tuple[str, list]:
+    """
+    SELECT 문과 바인딩할 값을 반환함
+    
+    statements의 값은 ? 자리표시자로 바인딩되며, raw_statements는 sql 문자열에 그대로 들어감
+    """
+    if statements is None: statements = {}
+    sql = compile_sql(SELECT, table, tuple(columns), tuple(statements.keys()), tuple(raw_statements))
+    return sql, [sql_parameter(value) for value in statements.values()]
+
+def get_scalar_statement(
+    operation: str, 
+    table: str, 
+    raw_statements: tuple[str, ...] = (), 
+    statements: dict[str, Any] | None = None
+) -> tuple[str, list]:
+    """
+    값 하나만 반환하는 EXISTS, COUNT 문과 바인딩할 값을 반환함
+    """
+    if statements is None: statements = {}
+    sql = compile_sql(operation, table, (), tuple(statements.keys()), tuple(raw_statements))
+    return sql, [sql_parameter(value) for value in statements.values()]
+
+class Transaction:
+    """
+    DatabaseManager.transaction()이 반환하는 트랜잭션(또는 savepoint) 하나
+    
+    defer로 넣은 sql 문은 바로 실행하지 않고 모아 두었다가, flush하거나 트랜잭션이 끝날 때
+    같은 sql 문끼리 executemany로 한 번에 실행함 (그 전에는 SELECT로 조회되지 않음)
+    
+    on_rollback으로 넣은 함수는 이 트랜잭션(savepoint)이 되돌려질 때 나중에 넣은 것부터 실행됨
+    savepoint가 RELEASE되면 바깥 트랜잭션으로 넘어가, 바깥 트랜잭션이 되돌려질 때 실행됨
+    """
+    
+    def __init__(self, database: "DatabaseManager", depth: int):
+        self.database = database
+        # 0이면 가장 바깥의 트랜잭션, 1 이상이면 savepoint
+        self.depth = depth
+        self._deferred: list[tuple[str, list]] = []
+        self._rollback_callbacks: list[Callable[[], Any]] = []
+    
+    @property
+    def savepoint_name(self) -> str:
+        return f"sp_{self.depth}"
+    
+    def defer(self, sql: str, parameters: Iterable[Any] = ()):
+        self._deferred.append((sql, [sql_parameter(value) for value in parameters]))
+    
+    def flush(self):
+        """
+        모아 둔 sql 문을 실행함 (연달아 들어온 같은 sql 문은 executemany 한 번으로 실행함)
+        """
+        deferred, self._deferred = self._deferred, []
+        start = 0
+        while start < len(deferred):
+            sql = deferred[start][0]
+            end = start + 1
+            while end < len(deferred) and deferred[end][0] == sql: end += 1
+            if end - start == 1:
+                self.database.cursor.execute(sql, deferred[start][1])
+            else:
+                self.database.cursor.executemany(sql, [parameters for _, parameters in deferred[start:end]])
+            start = end
+    
+    def discard(self):
+        self._deferred.clear()
+    
+    def on_rollback(self, callback: Callable[[], Any]):
+        self._rollback_callbacks.append(callback)
+    
+    def run_rollback_callbacks(self):
+        callbacks, self._rollback_callbacks = self._rollback_callbacks, []
+        for callback in reversed(callbacks):
+            callback()
 
 class DatabaseManager:
+    """
+    connection, cursor와 transaction()의 목록은 스레드마다 따로 있음
+    
+    이벤트 루프 스레드와 AsyncDatabase의 쓰기 스레드가 같은 DatabaseManager를 써도 서로의 트랜잭션에 섞이지 않으며,
+    쓰기끼리는 sqlite의 잠금으로 순서가 정해짐 (다른 연결이 쓰는 중이면 profile.busy_timeout_ms까지 기다림)
+    """
 
-    def __init__(self, stem: str):
+    def __init__(self, stem: str, profile: ConnectionProfile = DEFAULT_CONNECTION_PROFILE):
         """
         stem: 확장자를 포함하지 않은 파일 이름
+        profile: 연결에 적용할 PRAGMA 설정
         """
         self.stem = stem
         self.file_path = Path(DATA_DIR, stem + ".db")
-        self.connection = sqlite3.connect(
+        self.profile = profile
+        
+        self._local = threading.local()
+        # 모든 스레드의 연결 (close에서 닫음)
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # 처음 만든 연결에 실제로 적용된 PRAGMA 값
+        self.pragmas: dict[str, Any] = {}
+        # 생성한 스레드의 연결을 바로 열어, 잘못된 경로나 설정은 생성할 때 오류가 나도록 함
+        self._connect()
+    
+    def __del__(self):
+        self.close()
+    
+    def close(self):
+        """
+        모든 스레드의 연결을 닫음
+        """
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
             self.file_path, 
-            check_same_thread=False 
+            # close()는 다른 스레드에서 호출될 수 있으므로 같은 스레드인지 확인하지 않음
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            # 실행한 sql 문은 sqltrace.sql_tracer의 추적 모드에 따라 기록됨
+            factory=TracedConnection
             # isolation_level=None
         )
-        self.connection.set_trace_callback(log_query)
-        self.connection.row_factory = sqlite3.Row
-        self.cursor = self.connection.cursor()
+        pragmas = self.profile.apply(connection)
+        if not self.pragmas:
+            self.pragmas = pragmas
+            ari_logger.info(f"{self.stem} 데이터베이스 연결 설정: {', '.join(f'{k}={v}' for k, v in pragmas.items())}")
+        connection.row_factory = sqlite3.Row
+        with self._connections_lock:
+            self._connections.append(connection)
+        
+        self._local.connection = connection
+        self._local.cursor = connection.cursor()
+        # 이 스레드에서 열려 있는 transaction()의 목록 (바깥부터)
+        self._local.transactions = []
+        return connection
     
-    def __del__(self):
-        self.connection.close()
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        현재 스레드의 연결 (없으면 새로 만듦)
+        """
+        connection = getattr(self._local, "connection", None)
+        return connection if connection is not None else self._connect()
+    
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """
+        현재 스레드의 연결의 커서
+        """
+        if getattr(self._local, "cursor", None) is None: self._connect()
+        return self._local.cursor
+    
+    @property
+    def _transactions(self) -> list[Transaction]:
+        if getattr(self._local, "transactions", None) is None: self._connect()
+        return self._local.transactions
+    
+    @property
+    def in_transaction(self) -> bool:
+        """
+        현재 스레드에서 transaction() 안에서 실행 중인지 여부
+        """
+        return bool(self._transactions)
+    
+    @property
+    def current_transaction(self) -> Transaction | None:
+        """
+        현재 스레드에서 가장 안쪽에 열려 있는 transaction() (없으면 None)
+        """
+        transactions = self._transactions
+        return transactions[-1] if transactions else None
+    
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        with 블록 안의 sql 문을 하나의 트랜잭션으로 묶음
+        
+        블록이 예외 없이 끝나면 한 번만 commit하고, 예외가 발생하면 rollback한 뒤 예외를 다시 발생시킴
+        transaction() 안에서 다시 transaction()을 열면 SAVEPOINT가 되어, 안쪽 블록의 예외는 안쪽 블록의 변경 사항만 되돌림
+        트랜잭션의 목록은 스레드마다 따로 있으므로, 다른 스레드의 transaction()과 중첩되지 않음
+        
+        사용법:
+        ```
+        with database.transaction():
+            crew.push()
+            with database.transaction():
+                ...
+        ```
+        """
+        transactions = self._transactions
+        connection = self.connection
+        transaction = Transaction(self, len(transactions))
+        if transaction.depth == 0:
+            # legacy 트랜잭션 모드에서 암묵적으로 열린 트랜잭션이 있으면 그 변경 사항도 함께 commit됨
+            # 처음부터 쓰기 잠금을 잡아, 다른 연결과 읽기 잠금에서 쓰기 잠금으로 올리다 교착되지 않도록 함
+            if not connection.in_transaction: connection.execute("BEGIN IMMEDIATE")
+        else:
+            connection.execute(f"SAVEPOINT {transaction.savepoint_name}")
+        transactions.append(transaction)
+        
+        try:
+            yield transaction
+            transaction.flush()
+        except BaseException:
+            self._pop_transaction(transaction)
+            transaction.discard()
+            if transaction.depth == 0:
+                connection.rollback()
+            else:
+                connection.execute(f"ROLLBACK TO {transaction.savepoint_name}")
+                connection.execute(f"RELEASE {transaction.savepoint_name}")
+            transaction.run_rollback_callbacks()
+            raise
+        
+        self._pop_transaction(transaction)
+        if transaction.depth == 0:
+            try:
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                transaction.run_rollback_callbacks()
+                raise
+        else:
+            connection.execute(f"RELEASE {transaction.savepoint_name}")
+            # savepoint의 변경 사항은 바깥 트랜잭션이 되돌려지면 함께 되돌려짐
+            transactions[-1]._rollback_callbacks.extend(transaction._rollback_callbacks)
+    
+    def _pop_transaction(self, transaction: Transaction):
+        transactions = self._transactions
+        if not transactions or transactions[-1] is not transaction:
+            raise RuntimeError(f"{self.stem}: transaction()이 열린 순서대로 닫히지 않았습니다. (depth {transaction.depth})")
+        transactions.pop()
+    
+    def commit(self):
+        """
+        transaction() 밖이면 commit함
+        
+        transaction() 안에서는 아무것도 하지 않음 (가장 바깥의 transaction()이 끝날 때 한 번에 commit됨)
+        """
+        if not self.in_transaction: self.connection.commit()
         
     def fetch_core(self, table: str, *raw_statements, **statements) -> sqlite3.Cursor:
-        if not (raw_statements or statements): raise ValueError("At least one statement is required.")
+        """
+        조건에 맞는 행을 SELECT한 커서를 반환함
         
-        s = [f"{key} = {sql_value(value)}" for key, value in statements.items()]
-        s += list(raw_statements)
+        statements의 값은 ? 자리표시자로 바인딩되며, raw_statements는 sql 문자열에 그대로 들어감
+        """
+        if not (raw_statements or statements): raise ValueError("At least one statement is required.")
         
-        sql = f"SELECT * FROM {table} WHERE {' AND '.join(s)}"
-        self.cursor.execute(sql)
+        return self.cursor.execute(*get_select_statement(table, raw_statements, statements))
 
     def fetch(self, table:str, *raw_statements, **statements) -> sqlite3.Row | None:
         """
@@ -57,10 +398,25 @@ class DatabaseManager:
 
     def is_exist(self, table:str, *raw_statements, **statements) -> bool:
         """
-        조건에 맞는 데이터가 있는지 확인
+        조건에 맞는 데이터가 있는지 확인 (exists와 같음)
         """
-        return self.fetch(table, *raw_statements, **statements) is not None
+        return self.exists(table, *raw_statements, **statements)
 
+    def exists(self, table:str, *raw_statements, **statements) -> bool:
+        """
+        조건에 맞는 행이 있는지 확인함 (행을 가져오지 않고, 첫 행을 찾으면 멈춤)
+        
+        조건이 없으면 테이블에 행이 있는지 확인함
+        """
+        return bool(self.cursor.execute(*get_scalar_statement(EXISTS, table, raw_statements, statements)).fetchone()[0])
+
+    def count(self, table:str, *raw_statements, **statements) -> int:
+        """
+        조건에 맞는 행의 수를 반환함 (행을 가져오지 않음)
+        
+        조건이 없으면 테이블의 모든 행의 수를 반환함
+        """
+        return self.cursor.execute(*get_scalar_statement(COUNT, table, raw_statements, statements)).fetchone()[0]
     
     def fetch_many(self, table:str, *raw_statements, **statements) -> list[sqlite3.Row]:
         """
@@ -69,6 +425,60 @@ class DatabaseManager:
 
         return self.fetch_core(table, *raw_statements, **statements).fetchall()
 
+    def _iter_rows(self, sql: str, parameters: list, chunk_size: int) -> Iterator[sqlite3.Row]:
+        # self.cursor를 쓰면 순회하는 도중에 다른 쿼리가 실행될 때 결과가 바뀌므로, 순회마다 새 커서를 씀
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, parameters)
+            while rows := cursor.fetchmany(chunk_size):
+                yield from rows
+        finally:
+            cursor.close()
+
+    def iter_many(
+        self, 
+        table:str, 
+        *raw_statements, 
+        columns:tuple[str, ...] = (), 
+        chunk_size:int = FETCH_CHUNK_SIZE, 
+        **statements
+    ) -> Iterator[sqlite3.Row]:
+        """
+        fetch_many와 같지만, 모든 행을 한 번에 가져오지 않고 chunk_size개씩 가져오며 하나씩 yield함
+        
+        columns가 주어지면 그 컬럼만 가져옴 (비어 있으면 *)
+        순회를 끝까지 하지 않고 멈추면, 제너레이터가 닫힐 때 커서도 닫힘
+        """
+        if not (raw_statements or statements): raise ValueError("At least one statement is required.")
+        return self._iter_rows(*get_select_statement(table, raw_statements, statements, columns), chunk_size)
+
+    def iter_all(self, table:str, columns:tuple[str, ...] = (), chunk_size:int = FETCH_CHUNK_SIZE) -> Iterator[sqlite3.Row]:
+        """
+        fetch_all과 같지만, 모든 행을 한 번에 가져오지 않고 chunk_size개씩 가져오며 하나씩 yield함
+        
+        columns가 주어지면 그 컬럼만 가져옴 (비어 있으면 *)
+        """
+        return self._iter_rows(*get_select_statement(table, columns=columns), chunk_size)
+
+    def fetch_in(self, table:str, column:str, values:Iterable[Any], *raw_statements, **statements) -> list[sqlite3.Row]:
+        """
+        column의 값이 values 중 하나이고, 나머지 조건에도 맞는 행을 모두 가져옴
+        
+        values는 중복을 없앤 뒤 IN_CHUNK_SIZE개씩 나누어 조회함
+        IN 목록의 길이는 2의 거듭제곱으로 맞추어(마지막 값을 반복), 길이마다 다른 sql 문이 만들어지지 않도록 함
+        """
+        values = list(dict.fromkeys(sql_parameter(value) for value in values))
+        rows = []
+        for start in range(0, len(values), IN_CHUNK_SIZE):
+            chunk = values[start:start + IN_CHUNK_SIZE]
+            size = 1 << (len(chunk) - 1).bit_length()
+            chunk += chunk[-1:] * (size - len(chunk))
+            sql, parameters = get_select_statement(
+                table, (*raw_statements, f"{column} IN ({', '.join('?' * size)})"), statements
+            )
+            rows += self.cursor.execute(sql, parameters + chunk).fetchall()
+        return rows
+
     def fetch_all(self, table:str) -> list[sqlite3.Row]:
         """
         Fetches all rows from the specified table in the database.
@@ -79,30 +489,20 @@ class DatabaseManager:
         Returns:
             list[sqlite3.Row]: A list of rows fetched from the table.
         """
-        sql = f"SELECT * FROM {table}"
-        self.cursor.execute(sql)
+        self.cursor.execute(compile_sql(SELECT, table))
         return self.cursor.fetchall()
     
-    def fetch_column(self, table:str, column:str, *statements) -> list[sqlite3.Row]:
+    def fetch_column(self, table:str, column:str, *raw_statements, **statements) -> list[Any]:
         """
         sql 공용 검색 함수
         ---
         table을 받고, statements에 해당하는 데이터를 리스트 형태로 출력\n
-        데이터가 없으면 None을 반환\n
         반환값을 받는 변수 타입은 따로 지정해야 함\n
         statements가 없으면 추가 조건 없이 모든 행의 데이터를 가져옴
         """
-        if len(statements) == 0:
-            sql = f"SELECT {column} FROM {table}"
-        else:
-            sql = f"SELECT {column} FROM {table} WHERE "
-            sql += " AND ".join(statements)
-        self.cursor.execute(sql)
-        data = self.cursor.fetchall()
-        if data is None:
-            return None
+        self.cursor.execute(*get_select_statement(table, raw_statements, statements, (column,)))
 
-        return [d[0] for d in data]
+        return [d[0] for d in self.cursor.fetchall()]
 
     def update_with_id(self, table:str, ID:int, **kwargs):
         """
@@ -110,10 +510,15 @@ class DatabaseManager:
         ---
         : table을 받고, ID로 데이터를 검색한 후, kwargs에 있는 데이터를 수정하기
         """
-        keys_iter = [f"{key} = ?" for key in kwargs.keys()]
-        values_iter = list(kwargs.values()) + [ID]
-        sql = f"UPDATE {table} SET {', '.join(keys_iter)} WHERE ID = ?"
-        self.cursor.execute(sql, values_iter)
+        sql = compile_sql(UPDATE, table, tuple(kwargs.keys()), ("id",))
+        self.cursor.execute(sql, [sql_parameter(value) for value in kwargs.values()] + [ID])
+
+    def update_many_with_id(self, table:str, keys_iter:Iterable[str], rows_iter:Iterable[Iterable[Any]]):
+        """
+        update_with_id와 같지만, rows_iter의 각 원소(keys_iter 순서의 값들 뒤에 id)를 하나의 executemany로 수정함
+        """
+        sql = compile_sql(UPDATE, table, tuple(keys_iter), ("id",))
+        self.cursor.executemany(sql, ([sql_parameter(value) for value in row] for row in rows_iter))
 
     def delete_with_id(self, table:str, ID:int):
         """
@@ -121,8 +526,7 @@ class DatabaseManager:
         ---
         : table을 받고, ID로 데이터를 검색한 후, 해당 데이터를 삭제하기
         """
-        sql = f"DELETE FROM {table} WHERE ID = ?"
-        self.cursor.execute(sql, (ID,))
+        self.cursor.execute(compile_sql(DELETE, table, conditions=("id",)), (ID,))
     
     def insert(self, table_name:str, keys_iter:Iterable[str], values_iter:Iterable[Any]):
         """
@@ -133,11 +537,31 @@ class DatabaseManager:
             keys_iter (Iterable): An iterable containing the column names.
             values_iter (Iterable): An iterable containing the values to be inserted.
 
+        keys_iter가 비어 있으면 기본값으로 행을 추가함
+
         Returns:
             None
         """
-        sql = f"INSERT INTO {table_name} ({', '.join(keys_iter)}) VALUES ({', '.join('?' for _ in values_iter)})"
-        self.cursor.execute(sql, values_iter)
+        sql = compile_sql(INSERT, table_name, tuple(keys_iter))
+        self.cursor.execute(sql, [sql_parameter(value) for value in values_iter])
+    
+    def upsert(self, table_name:str, keys_iter:Iterable[str], values_iter:Iterable[Any]):
+        """
+        keys_iter의 첫 번째 컬럼(id)을 기준으로, 행이 없으면 추가하고 있으면 수정함
+        
+        SELECT로 존재 여부를 확인하지 않고 `INSERT ... ON CONFLICT DO UPDATE` 하나로 처리함
+        """
+        keys_iter = tuple(keys_iter)
+        sql = compile_sql(UPSERT, table_name, keys_iter, keys_iter[:1])
+        self.cursor.execute(sql, [sql_parameter(value) for value in values_iter])
+    
+    def upsert_many(self, table_name:str, keys_iter:Iterable[str], rows_iter:Iterable[Iterable[Any]]):
+        """
+        upsert와 같지만, rows_iter의 각 원소(keys_iter 순서의 값들)를 하나의 executemany로 기록함
+        """
+        keys_iter = tuple(keys_iter)
+        sql = compile_sql(UPSERT, table_name, keys_iter, keys_iter[:1])
+        self.cursor.executemany(sql, ([sql_parameter(value) for value in row] for row in rows_iter))
     
     def get_table_column_set(self, table_name:str) -> set:
         """
@@ -149,25 +573,65 @@ class DatabaseManager:
     
     def get_all_table_names(self) -> set[str]:
         """
-        데이터베이스에 있는 모든 테이블 이름을 반환함
+        데이터베이스에 있는 모든 테이블 이름을 반환함 (sqlite_sequence, sqlite_stat1 등 sqlite의 내부 테이블은 제외함)
         """
-        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        return {table_info["name"] for table_info in self.cursor.fetchall() if table_info["name"] != "sqlite_sequence"}
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'")
+        return {table_info["name"] for table_info in self.cursor.fetchall()}
+
+    def get_index_names(self, table_name:str) -> set[str]:
+        """
+        테이블에 만들어진 인덱스 중, INDEX_PREFIX로 시작하는 인덱스의 이름을 반환함
+        
+        (sqlite가 UNIQUE, PRIMARY KEY를 위해 자동으로 만든 인덱스는 포함하지 않음)
+        """
+        self.cursor.execute(
+            # LIKE는 _를 아무 글자로 취급하므로, 앞부분을 직접 비교함
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name = ? AND substr(name, 1, ?) = ?", 
+            (table_name, len(INDEX_PREFIX), INDEX_PREFIX)
+        )
+        return {index_info["name"] for index_info in self.cursor.fetchall()}
+
+    def check_foreign_keys(self) -> dict[tuple[str, str], list[int]]:
+        """
+        PRAGMA foreign_key_check로 외래 키를 지키지 않는 행을 찾음 (foreign_keys가 꺼져 있어도 검사함)
+        
+        반환값: (테이블, 참조하는 테이블) -> 위반한 행의 rowid 리스트
+        """
+        violations: dict[tuple[str, str], list[int]] = {}
+        for row in self.cursor.execute("PRAGMA foreign_key_check").fetchall():
+            violations.setdefault((row["table"], row["parent"]), []).append(row["rowid"])
+        return violations
 
     def has_row(self, table_name:str) -> bool:
         """
         테이블에 데이터가 있는지 확인
         """
-        self.cursor.execute(f"SELECT * FROM {table_name}")
-        return len(self.cursor.fetchall()) > 0
+        return self.exists(table_name)
     
-    def backup(self, directory: Path) -> str:
+    def backup(self, directory: Path, policy: BackupPolicy | None = None) -> Path:
         """
         지정된 디렉토리에 백업을 생성하고, 백업 파일의 경로를 반환함.
+        
+        파일을 복사하지 않고 sqlite3의 online backup API로 페이지를 나누어 복사하므로, 쓰기 도중에도 안전함
+        self.connection이 아닌 새 읽기 전용 연결로 백업하므로, commit된 내용만 백업됨
+        policy가 주어지면 압축 여부를 따르고, 백업 후 보존 정책에 맞지 않는 오래된 백업을 삭제함
         """
-        backup_path = Path(directory, f"{self.stem}_{datetime.now().strftime(FULL_DATE_FORMAT_NO_SPACE)}_backup.db")
-        shutil.copy2(self.file_path, backup_path)
+        backup_path = backup_file(
+            self.file_path, 
+            get_backup_path(directory, self.stem, now=datetime.now()),
+            compress=policy.compress if policy is not None else False
+        )
+        if policy is not None:
+            apply_retention(directory, self.stem, policy)
         return backup_path
+    
+    async def backup_async(self, directory: Path, policy: BackupPolicy | None = None) -> Path:
+        """
+        backup을 별도의 스레드에서 실행하여, 백업하는 동안 이벤트 루프를 막지 않음
+        
+        백업은 자체 연결로 하므로, 이벤트 루프가 self.connection으로 쓰는 것과 겹쳐도 안전함
+        """
+        return await asyncio.to_thread(self.backup, directory, policy)
 
 
 
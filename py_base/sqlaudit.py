@@ -0,0 +1,233 @@
+"""
+느린 sql 문과 전체 테이블 스캔을 찾는 진단 모듈
+
+SqlTracer의 관찰자로 등록되어 모든 sql 문의 실행 시간을 sql 문별로 집계함
+- 임계값보다 오래 걸린 sql 문은 EXPLAIN QUERY PLAN 결과와 함께 로그로 남김
+- 큰 테이블(Crew, WorkerExperience, Deployment 등)을 인덱스 없이 스캔하는 sql 문은 처음 실행될 때 경고함
+- report_interval마다 총 실행 시간이 긴 상위 sql 문을 로그로 남기고 집계를 초기화함
+
+EXPLAIN QUERY PLAN은 sql 문을 실행한 연결이 아니라, 별도의 스레드에서 추적되지 않는 읽기 전용 연결로 실행함
+(sql 문을 실행한 스레드를 기다리게 하지 않고, 진행 중인 트랜잭션에 끼어들지 않으며, sqlcounter의 집계에도 잡히지 않음)
+
+환경 변수 ARISLENA_SQL_AUDIT에 임계값(밀리초)을 지정하면 봇이 시작될 때 켜짐
+"""
+import queue, re, sqlite3, threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+
+from py_base.ari_logger import ari_logger
+from py_base.sqltrace import SqlTracer, StatementRecord, sql_tracer
+
+# 행이 많아 전체 스캔을 피해야 하는 테이블
+LARGE_TABLES = ("Crew", "WorkerExperience", "Deployment")
+# 주기적인 보고서의 간격 (초)
+REPORT_INTERVAL = 3600.0
+# 보고서에 남길 sql 문의 수
+REPORT_TOP_N = 10
+
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_PATTERN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# 쿼리 계획을 확인할 sql 문의 종류
+_PLANNED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    sql 문에 직접 들어간 값(숫자, 문자열)과 IN 목록을 ?로 바꾸어, 값만 다른 sql 문을 같은 문자열로 만듦
+    """
+    sql = _LITERAL_PATTERN.sub("?", " ".join(sql.split()))
+    return _IN_LIST_PATTERN.sub("IN (?)", sql)
+
+def explain_query_plan(connection: sqlite3.Connection, sql: str) -> list[str]:
+    """
+    sql 문의 EXPLAIN QUERY PLAN 결과를 반환함
+
+    자리표시자에는 NULL을 바인딩함 (쿼리 계획은 바인딩된 값에 따라 바뀌지 않음)
+    """
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+    return [row[-1] for row in rows]
+
+def find_large_table_scans(plan: list[str], large_tables: tuple[str, ...] = LARGE_TABLES) -> list[str]:
+    """
+    쿼리 계획에서 큰 테이블을 인덱스 없이 스캔하는 테이블의 이름을 반환함
+    """
+    scans = []
+    for detail in plan:
+        if (match := _SCAN_PATTERN.match(detail)) and match.group(1) in large_tables:
+            scans.append(match.group(1))
+    return scans
+
+@dataclass
+class QueryStats:
+    sql: str
+    count: int = 0
+    total: float = 0.0
+    max_elapsed: float = 0.0
+    rows: int = 0
+
+    @property
+    def average_ms(self) -> float:
+        return self.total * 1000 / self.count if self.count else 0.0
+
+class QueryAuditor:
+    """
+    sql 문의 실행 기록을 집계하고, 느린 sql 문과 큰 테이블의 스캔을 찾는 SqlTracer 관찰자
+
+    사용법:
+    ```
+    auditor = enable_diagnostics(threshold_ms=50)
+    ...
+    ari_logger.info(auditor.report())
+    ```
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 50.0,
+        *,
+        large_tables: tuple[str, ...] = LARGE_TABLES,
+        report_interval: float = REPORT_INTERVAL,
+        top_n: int = REPORT_TOP_N
+    ):
+        self.threshold_ms = threshold_ms
+        self.large_tables = large_tables
+        self.report_interval = report_interval
+        self.top_n = top_n
+
+        self._stats: dict[str, QueryStats] = {}
+        # 정규화된 sql 문 -> 쿼리 계획 (같은 sql 문은 한 번만 EXPLAIN함)
+        self._plans: dict[str, list[str]] = {}
+        # EXPLAIN을 기다리는 정규화된 sql 문
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._last_report = monotonic()
+
+        # (sql 문, 정규화된 sql 문, 데이터베이스 파일 경로, 느린 sql 문이면 그 기록) 
+        self._jobs: queue.SimpleQueue[tuple[str, str, str, StatementRecord | None]] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+        # 데이터베이스 파일 경로 -> EXPLAIN 전용 읽기 연결 (_worker 스레드에서만 사용함)
+        self._explain_connections: dict[str, sqlite3.Connection] = {}
+
+    def __call__(self, record: StatementRecord):
+        if record.sql.lstrip()[:7].upper() == "EXPLAIN": return
+
+        sql = normalize_sql(record.sql)
+        with self._lock:
+            stats = self._stats.get(sql)
+            if stats is None: stats = self._stats[sql] = QueryStats(sql)
+            stats.count += 1
+            stats.total += record.elapsed
+            stats.max_elapsed = max(stats.max_elapsed, record.elapsed)
+            stats.rows += record.rows
+
+        is_slow = record.elapsed_ms >= self.threshold_ms
+        queued = False
+        if sql not in self._plans and (is_slow or any(table in sql for table in self.large_tables)):
+            queued = self._queue_plan(record, sql, is_slow)
+        if is_slow and not queued:
+            self._warn_slow(record.sql, record.elapsed_ms, record.rows, self._plans.get(sql, ()))
+
+        if monotonic() - self._last_report >= self.report_interval:
+            ari_logger.info(self.report(reset=True))
+
+    def _warn_slow(self, sql: str, elapsed_ms: float, rows: int, plan):
+        ari_logger.warning(f"[SLOW SQL]\t{elapsed_ms:.3f}ms\t{rows} rows\t{sql}\n\t" + "\n\t".join(plan))
+
+    def _queue_plan(self, record: StatementRecord, sql: str, is_slow: bool) -> bool:
+        """
+        sql 문을 처음 보았을 때 쿼리 계획을 구하는 작업을 _worker 스레드에 넘김 (넘겼으면 True)
+
+        느린 sql 문이면 쿼리 계획을 구한 뒤 _worker 스레드에서 경고를 남김
+        """
+        database_path = getattr(record.connection, "database_path", None)
+        if database_path is None or not sql.upper().startswith(_PLANNED_STATEMENTS): return False
+        with self._lock:
+            if sql in self._pending: return False
+            self._pending.add(sql)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._explain_forever, name="sql-audit", daemon=True)
+                self._worker.start()
+        self._jobs.put((record.sql, sql, database_path, record if is_slow else None))
+        return True
+
+    def _get_explain_connection(self, database_path: str) -> sqlite3.Connection:
+        if (connection := self._explain_connections.get(database_path)) is None:
+            # TracedConnection이 아니므로 EXPLAIN 문은 sql_tracer와 sqlcounter에 기록되지 않음
+            connection = sqlite3.connect(f"{Path(database_path).resolve().as_uri()}?mode=ro", uri=True)
+            self._explain_connections[database_path] = connection
+        return connection
+
+    def _explain_forever(self):
+        while True:
+            raw_sql, sql, database_path, slow_record = self._jobs.get()
+            self._audit_plan(raw_sql, sql, database_path)
+            if slow_record is not None:
+                self._warn_slow(raw_sql, slow_record.elapsed_ms, slow_record.rows, self._plans.get(sql, ()))
+
+    def _audit_plan(self, raw_sql: str, sql: str, database_path: str):
+        """
+        쿼리 계획을 구해 저장하고, 큰 테이블의 스캔이 있으면 경고함 (_worker 스레드에서 실행됨)
+        """
+        try:
+            plan = explain_query_plan(self._get_explain_connection(database_path), raw_sql)
+        except sqlite3.Error as e:
+            plan = [f"(EXPLAIN QUERY PLAN 실패: {e})"]
+        with self._lock:
+            self._plans[sql] = plan
+            self._pending.discard(sql)
+
+        if scans := find_large_table_scans(plan, self.large_tables):
+            ari_logger.warning(
+                f"[SQL SCAN]\t{', '.join(scans)} 테이블 전체를 스캔합니다: {sql}\n\t" + "\n\t".join(plan)
+            )
+
+    def get_top_queries(self, top_n: int | None = None) -> list[QueryStats]:
+        """
+        총 실행 시간이 긴 순서로 상위 top_n개의 sql 문 집계를 반환함
+        """
+        with self._lock:
+            stats = sorted(self._stats.values(), key=lambda s: s.total, reverse=True)
+        return stats[:top_n or self.top_n]
+
+    def report(self, top_n: int | None = None, *, reset: bool = False) -> str:
+        """
+        총 실행 시간이 긴 상위 sql 문의 보고서를 반환함 (reset이 True이면 집계를 초기화함)
+        """
+        lines = [f"[SQL REPORT] 총 실행 시간 상위 {top_n or self.top_n}개"]
+        for rank, stats in enumerate(self.get_top_queries(top_n), 1):
+            lines.append(
+                f"{rank}. {stats.total * 1000:.1f}ms / {stats.count}회 (평균 {stats.average_ms:.3f}ms, "
+                f"최대 {stats.max_elapsed * 1000:.3f}ms, {stats.rows} rows)\t{stats.sql}"
+            )
+        if reset: self.reset()
+        return "\n\t".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._last_report = monotonic()
+
+_auditor: QueryAuditor | None = None
+
+def get_auditor() -> QueryAuditor | None:
+    return _auditor
+
+def enable_diagnostics(threshold_ms: float = 50.0, tracer: SqlTracer = sql_tracer, **kwargs) -> QueryAuditor:
+    """
+    QueryAuditor를 만들어 tracer에 등록하고 반환함 (이미 켜져 있으면 기존 QueryAuditor를 교체함)
+    """
+    global _auditor
+    disable_diagnostics(tracer)
+    _auditor = QueryAuditor(threshold_ms, **kwargs)
+    tracer.add_observer(_auditor)
+    ari_logger.info(f"sql 진단 모드를 켰습니다. (임계값: {threshold_ms}ms)")
+    return _auditor
+
+def disable_diagnostics(tracer: SqlTracer = sql_tracer):
+    global _auditor
+    if _auditor is None: return
+    tracer.remove_observer(_auditor)
+    _auditor = None
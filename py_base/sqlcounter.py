@@ -0,0 +1,111 @@
+"""
+상호작용(명령어, 버튼) 하나가 실행한 sql 문을 세고, N+1 패턴을 찾는 모듈
+
+상호작용이 시작될 때 start_interaction으로 집계를 시작하면, 같은 컨텍스트(contextvars)에서 실행된 sql 문이 모두 집계됨
+AsyncDatabase는 컨텍스트를 복사해 스레드에서 실행하므로, 스레드에서 실행된 sql 문도 집계됨
+"""
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+
+from py_base.ari_logger import ari_logger
+from py_base.sqlaudit import normalize_sql
+from py_base.sqltrace import SqlTracer, StatementRecord, sql_tracer
+
+# 한 상호작용에서 같은 꼴의 SELECT 문이 이 횟수보다 많이 실행되면 N+1 경고를 남김
+N_PLUS_ONE_THRESHOLD = 5
+
+@dataclass
+class InteractionStats:
+    """
+    name : 상호작용의 이름 (명령어 이름, 버튼 클래스 이름 등)
+    statements : 실행한 sql 문의 수
+    elapsed : sql 문의 실행 시간의 합 (초)
+    rows : 가져오거나 변경한 행의 수의 합
+    similar : 정규화된 SELECT 문 -> 실행 횟수
+    """
+    name: str
+    statements: int = 0
+    elapsed: float = 0.0
+    rows: int = 0
+    similar: Counter[str] = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, record: StatementRecord):
+        # 진단용 EXPLAIN 문은 상호작용이 실행한 sql 문이 아니므로 세지 않음
+        if record.sql.lstrip()[:7].upper() == "EXPLAIN": return
+        with self._lock:
+            self.statements += 1
+            self.elapsed += record.elapsed
+            self.rows += record.rows
+            if record.sql.lstrip()[:6].upper() == "SELECT":
+                self.similar[normalize_sql(record.sql)] += 1
+
+    def get_repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """
+        threshold번보다 많이 실행된 같은 꼴의 SELECT 문과 실행 횟수를 반환함
+        """
+        return [(sql, count) for sql, count in self.similar.most_common() if count > threshold]
+
+    def get_summary(self) -> str:
+        return f"sql: {self.statements}개, {self.elapsed * 1000:.3f}ms, {self.rows} rows"
+
+_current_interaction: ContextVar[InteractionStats | None] = ContextVar("current_interaction", default=None)
+
+def _observe(record: StatementRecord):
+    if (stats := _current_interaction.get()) is not None:
+        stats.add(record)
+
+def _is_counting() -> bool:
+    return _current_interaction.get() is not None
+
+def install(tracer: SqlTracer = sql_tracer):
+    """
+    tracer에 상호작용별 집계를 등록함 (한 번만 등록됨)
+
+    집계 중인 상호작용 안에서 실행된 sql 문만 기록을 받으므로, 그 밖의 sql 문(턴 종료 등)은 추적 모드가 꺼져 있으면 시간을 재지 않음
+    """
+    tracer.remove_observer(_observe)
+    tracer.add_observer(_observe, when=_is_counting)
+
+def start_interaction(name: str) -> InteractionStats:
+    """
+    현재 컨텍스트에서 새 상호작용의 집계를 시작함
+    """
+    stats = InteractionStats(name)
+    _current_interaction.set(stats)
+    return stats
+
+def finish_interaction(threshold: int = N_PLUS_ONE_THRESHOLD) -> InteractionStats | None:
+    """
+    현재 컨텍스트의 집계를 끝내고 반환함 (집계 중이 아니었으면 None)
+
+    같은 꼴의 SELECT 문이 threshold번보다 많이 실행되었으면 N+1 경고를 남김
+    """
+    stats = _current_interaction.get()
+    if stats is None: return None
+    _current_interaction.set(None)
+
+    for sql, count in stats.get_repeated_statements(threshold):
+        ari_logger.warning(f"[N+1]\t{stats.name}에서 같은 꼴의 sql 문이 {count}번 실행되었습니다: {sql}")
+    return stats
+
+def track_interaction(func):
+    """
+    버튼의 callback처럼 (self, interaction)을 받는 코루틴 메소드를 하나의 상호작용으로 집계하는 데코레이터
+
+    이미 집계 중인 컨텍스트에서 호출되면(super().callback 등) 집계를 새로 시작하지 않음
+    """
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if _current_interaction.get() is not None:
+            return await func(self, *args, **kwargs)
+        start_interaction(f"{type(self).__name__}.{func.__name__}")
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            stats = finish_interaction()
+            ari_logger.debug(f"{stats.name}\t{stats.get_summary()}")
+    return wrapper
@@ -0,0 +1,232 @@
+"""
+sqlite3 연결에서 실행되는 sql 문을 추적하는 모듈
+
+sql 문마다 실행 시간과 행 수를 기록하고, 추적 모드에 따라 고른 기록만 별도의 스레드에서 로그로 남김
+로그를 남기는 동안 sql을 실행한 스레드(이벤트 루프 등)는 기다리지 않음
+
+추적 모드는 환경 변수 ARISLENA_SQL_TRACE로 정할 수 있음
+- off : 로그를 남기지 않음 (기본값; 기록을 원하는 관찰자도 없으면 시간을 재지 않음)
+- sampled:N : N개 중 1개만 로그로 남김
+- slow:MS : 실행 시간이 MS 밀리초 이상인 sql 문만 로그로 남김
+- full : 모든 sql 문을 로그로 남김
+"""
+import itertools, os, queue, sqlite3, threading
+from dataclasses import dataclass, field
+from enum import Enum
+from time import perf_counter
+from typing import Any, Callable
+
+from py_base.ari_logger import ari_logger
+
+class TraceMode(Enum):
+    OFF = "off"
+    SAMPLED = "sampled"
+    SLOW = "slow"
+    FULL = "full"
+
+@dataclass
+class StatementRecord:
+    """
+    sql 문 하나의 실행 기록
+
+    elapsed : execute와 fetch에 걸린 시간의 합 (초)
+    rows : 가져온 행의 수 (SELECT) 또는 변경된 행의 수 (INSERT, UPDATE, DELETE)
+    many : executemany로 실행되었는지
+    connection : sql 문을 실행한 연결 (관찰자가 같은 연결로 EXPLAIN 등을 실행할 때 사용)
+    """
+    sql: str
+    elapsed: float = 0.0
+    rows: int = 0
+    many: bool = False
+    connection: sqlite3.Connection | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.elapsed * 1000
+
+class SqlTracer:
+    """
+    TracedConnection에서 실행된 sql 문의 기록을 받아, 관찰자에게 전달하고 추적 모드에 맞는 기록을 로그로 남기는 클래스
+
+    관찰자(add_observer)는 sql을 실행한 스레드에서 기록을 받으므로, 가벼운 집계만 해야 함
+    관찰자는 when으로 기록이 필요한 때만 받겠다고 할 수 있고, 추적 모드가 꺼져 있고 기록을 원하는 관찰자도 없으면 시간을 재지 않음
+    로그는 큐에 넣어 두고 별도의 스레드에서 기록함
+    """
+
+    def __init__(self, mode: TraceMode = TraceMode.OFF, *, sample_rate: int = 100, slow_threshold_ms: float = 100.0):
+        self.mode = mode
+        self.sample_rate = max(1, sample_rate)
+        self.slow_threshold_ms = slow_threshold_ms
+
+        # (관찰자, 기록이 필요한지 알려 주는 함수 또는 None(항상 필요함))
+        self._observers: list[tuple[Callable[[StatementRecord], Any], Callable[[], bool] | None]] = []
+        # SAMPLED 모드에서 여러 스레드가 함께 세므로, 잠금 없이 원자적으로 증가하는 itertools.count를 씀
+        self._counter = itertools.count(1)
+        self._queue: queue.SimpleQueue[StatementRecord] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "SqlTracer":
+        """
+        "off", "full", "sampled:N", "slow:MS" 형식의 문자열로 SqlTracer를 만듦
+        """
+        mode_name, _, value = spec.strip().lower().partition(":")
+        mode = TraceMode(mode_name)
+        match mode:
+            case TraceMode.SAMPLED:
+                return cls(mode, sample_rate=int(value) if value else 100)
+            case TraceMode.SLOW:
+                return cls(mode, slow_threshold_ms=float(value) if value else 100.0)
+            case _:
+                return cls(mode)
+
+    @property
+    def active(self) -> bool:
+        """
+        기록을 만들어야 하는지 여부 (꺼져 있고 지금 기록을 원하는 관찰자도 없으면 시간을 재지 않음)
+        """
+        return self.mode is not TraceMode.OFF or any(when is None or when() for _, when in self._observers)
+
+    def add_observer(self, observer: Callable[[StatementRecord], Any], when: Callable[[], bool] | None = None):
+        """
+        observer를 등록함
+
+        when이 주어지면 when()이 True일 때만 기록을 받음 (sql 문마다 호출되므로 가벼워야 함)
+        """
+        self._observers.append((observer, when))
+
+    def remove_observer(self, observer: Callable[[StatementRecord], Any]):
+        self._observers = [(o, when) for o, when in self._observers if o is not observer]
+
+    def _should_log(self, record: StatementRecord) -> bool:
+        match self.mode:
+            case TraceMode.OFF:
+                return False
+            case TraceMode.FULL:
+                return True
+            case TraceMode.SLOW:
+                return record.elapsed_ms >= self.slow_threshold_ms
+            case TraceMode.SAMPLED:
+                return next(self._counter) % self.sample_rate == 0
+
+    def submit(self, record: StatementRecord):
+        for observer, when in self._observers:
+            if when is None or when(): observer(record)
+
+        if not self._should_log(record): return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._write_forever, name="sql-trace", daemon=True)
+            self._worker.start()
+        self._queue.put(record)
+
+    def _write_forever(self):
+        while True:
+            record = self._queue.get()
+            ari_logger.debug(
+                f"[SQL]\t{record.elapsed_ms:.3f}ms\t{record.rows} rows{' (many)' if record.many else ''}\t{record.sql}"
+            )
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    실행 시간과 행 수를 재어 연결의 SqlTracer에 전달하는 커서
+
+    SELECT의 기록은 fetchone/fetchall이 끝나거나, 같은 커서로 다음 sql 문을 실행할 때 전달됨
+    """
+
+    _record: StatementRecord | None = None
+
+    def _finish(self):
+        if self._record is not None:
+            record, self._record = self._record, None
+            self.connection.tracer.submit(record)
+
+    def _traced(self, method: Callable, sql: str, parameters, many: bool):
+        self._finish()
+        start = perf_counter()
+        method(sql, parameters)
+        self._record = StatementRecord(sql, perf_counter() - start, max(self.rowcount, 0), many, self.connection)
+        # 결과 행이 없는 sql 문(INSERT, UPDATE 등)은 바로 기록을 전달함
+        if self.description is None: self._finish()
+        return self
+
+    def execute(self, sql: str, parameters=()):
+        if not self.connection.tracer.active: return super().execute(sql, parameters)
+        return self._traced(super().execute, sql, parameters, False)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        if not self.connection.tracer.active: return super().executemany(sql, seq_of_parameters)
+        return self._traced(super().executemany, sql, seq_of_parameters, True)
+
+    def fetchone(self):
+        if self._record is None: return super().fetchone()
+        start = perf_counter()
+        row = super().fetchone()
+        self._record.elapsed += perf_counter() - start
+        if row is not None: self._record.rows += 1
+        self._finish()
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        if self._record is None: return super().fetchmany(size) if size is not None else super().fetchmany()
+        start = perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        self._record.elapsed += perf_counter() - start
+        self._record.rows += len(rows)
+        if not rows: self._finish()
+        return rows
+
+    def fetchall(self):
+        if self._record is None: return super().fetchall()
+        start = perf_counter()
+        rows = super().fetchall()
+        self._record.elapsed += perf_counter() - start
+        self._record.rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        if self._record is None: return super().__next__()
+        start = perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._record.elapsed += perf_counter() - start
+            self._finish()
+            raise
+        self._record.elapsed += perf_counter() - start
+        self._record.rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+class TracedConnection(sqlite3.Connection):
+    """
+    sqlite3.connect(factory=TracedConnection)로 만드는 연결
+
+    connection.execute를 포함해 모든 커서가 TracedCursor가 되어, 실행한 sql 문이 tracer에 전달됨
+    """
+
+    tracer: SqlTracer
+    # 연결한 데이터베이스 파일의 경로 (관찰자가 별도의 연결을 열 때 사용함)
+    database_path: str | None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tracer = sql_tracer
+        database = args[0] if args else kwargs.get("database")
+        self.database_path = None if database is None or str(database) == ":memory:" else str(database)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+# 모든 TracedConnection이 기본으로 사용하는 tracer
+# 느린 sql 문을 찾을 때만 ARISLENA_SQL_TRACE=slow:100 등으로 켜서, 평소에는 sql 문마다 시간을 재지 않음
+sql_tracer = SqlTracer.from_spec(os.environ.get("ARISLENA_SQL_TRACE", "off"))
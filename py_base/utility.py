@@ -103,6 +103,25 @@ def sql_value(value: str | Enum | None | int | float | bool) -> str:
     else:
         return str(value)
 
+def sql_parameter(value: str | Enum | None | int | float | bool) -> str | int | float | None:
+    """
+    Convert a Python value to a value that can be bound to a `?` placeholder.
+
+    ArislenaEnum members are bound with their `value` (their int() is always 0), unlike plain int subclasses.
+
+    Examples:
+        >>> sql_parameter(ResourceCategory.SPADES)
+        1
+        >>> sql_parameter(True)
+        1
+    """
+    if isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, bool):
+        return int(value)
+    else:
+        return value
+
 def select_from_subclasses(_class: type, **query) -> type:
     """
     _class의 서브클래스 중 클래스 변수로 a=b 꼴의 query식 중 하나라도 만족하는 서브클래스를 반환합니다.
@@ -116,8 +135,17 @@ def select_from_subclasses(_class: type, **query) -> type:
                 return subclass
     raise ValueError(f"No subclass of {_class} matches the query {query}; {_class.__subclasses__()}")
 
+MINUS4_TO_4 = [-4, -3, -2, -1, 0, 1, 2, 3, 4]
+MINUS4_TO_4_WEIGHTS = [0.04, 0.07, 0.12, 0.17, 0.20, 0.17, 0.12, 0.07, 0.04]
+
 def get_minus4_to_4() -> int:
     """
     -4 ~ 4 사이의 정수를 대한민국 수능 9등급식 정규분포 근사 논리로 반환합니다.
     """
-    return np_random.choice([-4, -3, -2, -1, 0, 1, 2, 3, 4], p=[0.04, 0.07, 0.12, 0.17, 0.20, 0.17, 0.12, 0.07, 0.04])
\ No newline at end of file
+    return int(np_random.choice(MINUS4_TO_4, p=MINUS4_TO_4_WEIGHTS))
+
+def get_many_minus4_to_4(size: int) -> list[int]:
+    """
+    get_minus4_to_4를 size번 한 것과 같은 분포의 정수 리스트를 한 번의 numpy 호출로 반환합니다.
+    """
+    return np_random.choice(MINUS4_TO_4, size=size, p=MINUS4_TO_4_WEIGHTS).tolist()
\ No newline at end of file
@@ -6,6 +6,8 @@ from copy import deepcopy
 
 
 from py_base.dbmanager import DatabaseManager
+from py_base.asyncdb import AsyncDatabase
+from py_base.sqlcounter import track_interaction
 from py_base.yamlobj import TableObjTranslator
 from py_system.tableobj import TableObject
 from py_discord import embeds
@@ -53,9 +55,17 @@ class TableObjectButton(Button, BuilderPattern, metaclass=ABCMeta):
         self._table_object: TableObject = None
         self._bot: BotBase = bot
         self._database: DatabaseManager = bot.get_database(interaction_for_this.guild_id)
+        # callback에서는 이벤트 루프를 막지 않도록 _async_database를 사용함
+        self._async_database: AsyncDatabase = bot.get_async_database(interaction_for_this.guild_id)
         self._interaction_for_this: discord.Interaction = interaction_for_this
         
         self.label_complementary: str = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 하위 클래스의 callback도 하나의 상호작용으로 sql 문을 집계함
+        if "callback" in cls.__dict__:
+            cls.callback = track_interaction(cls.__dict__["callback"])
         
     @abstractmethod
     def clone(self):
@@ -107,6 +117,7 @@ class TableObjectButton(Button, BuilderPattern, metaclass=ABCMeta):
         """
         pass
     
+    @track_interaction
     async def callback(self, interaction:discord.Interaction):
         await interaction.response.send_message(
             embed = self._get_basic_embed(),
@@ -1,14 +1,19 @@
 import discord, logging, json, os
+from discord import app_commands
 from discord.ext import commands
 from copy import deepcopy
 
 from py_base.ari_logger import ari_logger
 from py_base.dbmanager import DatabaseManager
+from py_base.asyncdb import AsyncDatabase
+from py_base.sqlaudit import enable_diagnostics
+from py_base import sqlcounter
 from py_base.utility import JSON_DIR
 from py_base.jsonobj import BotSetting
-from py_system.tableobj import form_database_from_tableobjects
+from py_system.migration import migrate
 from py_base import warnings
 from py_discord.server_manager import ServerManager
+from py_discord.turn_scheduler import TurnScheduler
 
 # 봇 권한 설정
 intents = discord.Intents.default()
@@ -20,6 +25,15 @@ def exit_bot():
     ari_logger.critical("봇을 종료합니다.")
     exit(1)
 
+class AriCommandTree(app_commands.CommandTree):
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """
+        명령어가 실행되기 전에, 명령어가 실행하는 sql 문의 집계를 시작함 (on_app_command_completion에서 끝남)
+        """
+        sqlcounter.start_interaction(interaction.command.qualified_name if interaction.command else str(interaction.data.get("name")))
+        return True
+
 class BotBase(commands.Bot):
 
     def __init__(
@@ -30,7 +44,8 @@ class BotBase(commands.Bot):
         super().__init__(
             command_prefix="/",
             intents=intents,
-            application_id=bot_setting.application_id
+            application_id=bot_setting.application_id,
+            tree_cls=AriCommandTree
         )
         
         self.bot_setting = bot_setting
@@ -42,20 +57,39 @@ class BotBase(commands.Bot):
         self._log_handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
         
         self._guild_server_manager: dict[str, ServerManager] = {}
+        # 모든 길드의 턴 종료 작업을 봇의 이벤트 루프에서 실행하는 스케줄러 (setup_hook에서 시작됨)
+        self.turn_scheduler = TurnScheduler()
+
+        # 상호작용(명령어, 버튼)마다 sql 문의 수와 시간을 집계함 (환경 변수 ARISLENA_SQL_COUNT가 off이면 집계하지 않음)
+        if os.environ.get("ARISLENA_SQL_COUNT", "on").lower() != "off":
+            sqlcounter.install()
+        # 느린 sql 문과 큰 테이블의 스캔을 찾는 진단 모드 (임계값은 밀리초)
+        if (audit_threshold := os.environ.get("ARISLENA_SQL_AUDIT")) is not None:
+            enable_diagnostics(float(audit_threshold))
     
     def run(self):
         super().run(self._token, log_handler=self._log_handler, log_level=logging.INFO)
+    
+    async def setup_hook(self):
+        self.turn_scheduler.start()
+    
+    async def close(self):
+        self.turn_scheduler.shutdown()
+        await super().close()
         
     def _add_server_manager(self, guild_id: int | str):
         """
         길드 id별로 데이터베이스를 추가함.
         
         데이터베이스는 최종적으로 ./data/{guild_id}.db 위치에 생성됨
+        이미 추가된 길드는 다시 추가하지 않음 (on_ready는 다시 연결될 때마다 호출됨)
         """
         if isinstance(guild_id, int): guild_id = str(guild_id)
+        if guild_id in self._guild_server_manager: return
         db = DatabaseManager(guild_id)
-        form_database_from_tableobjects(db)
-        self._guild_server_manager[guild_id] = ServerManager(self, deepcopy(self.bot_setting), db, guild_id)
+        # 스키마가 바뀌지 않았으면 버전 확인만 하고 넘어감
+        migrate(db)
+        self._guild_server_manager[guild_id] = ServerManager(self, deepcopy(self.bot_setting), db, guild_id, self.turn_scheduler)
     
     def _get_token_or_exit(self, environ_get_result: str | None) -> str:
         """
@@ -89,6 +123,15 @@ class BotBase(commands.Bot):
         """
         return self._guild_server_manager[str(guild_id)].database
     
+    def get_async_database(self, guild_id: int | str) -> AsyncDatabase:
+        """
+        usage example:
+        ```
+        row = await bot.get_async_database(interaction.guild_id).fetch(...)
+        ```
+        """
+        return self._guild_server_manager[str(guild_id)].async_database
+    
     def get_server_manager(self, guild_id: int | str) -> ServerManager:
         """
         usage example:
@@ -5,7 +5,8 @@ from py_base.dbmanager import DatabaseManager
 from py_base.yamlobj import TableObjTranslator
 from py_system.abstract import TableObject
 from py_system.tableobj import Facility
-from py_system.tableobj import User, Deployment, WorkerDescription
+from py_system.tableobj import User, Deployment, WorkerDescription, WorkerExperience
+from py_system.session import Session
 from py_system.systemobj import GeneralResource
 from py_system.worker import Crew
 
@@ -93,22 +94,21 @@ class ResourceConsumeEmbed(ArislenaEmbed):
 
 class CrewLookupEmbed(ArislenaEmbed):
     
-    def __init__(self, crew: Crew, database: DatabaseManager, translator: TableObjTranslator):
+    def __init__(self, crew: Crew, database: DatabaseManager, translator: TableObjTranslator, session: Session | None = None):
         super().__init__(title="대원 정보", colour=Colour.green())
         self.crew = crew
         self.database = database
         self.translator = translator
+        # 여러 field에서 같은 행을 다시 조회하지 않도록 하나의 session으로 불러옴
+        self.session = session if session is not None else Session(database)
         
     def add_basic_field(self):
         self.add_field(name="기본 정보", value=self.crew.to_embed_value(self.translator))
         return self
     
     def add_location_field(self):
-        if (d_data := self.database.fetch(
-            Deployment.table_name, worker_id = self.crew.id
-        )):
-            d_obj = Deployment.from_data(d_data)
-            b_obj = Facility.from_database(self.database, id=d_obj.facility_id)
+        if (d_obj := self.session.find(Deployment, worker_id = self.crew.id)):
+            b_obj = self.session.get(Facility, d_obj.facility_id)
             self.add_field(
                 name="위치 정보",
                 value=f"{b_obj.name} ({b_obj.category.express()})"
@@ -134,15 +134,21 @@ class CrewLookupEmbed(ArislenaEmbed):
     def add_description_field(self):
         self.add_field(
             name="상태와 특징",
-            value=WorkerDescription.from_database(self.database, worker_id = self.crew.id).to_embed_value(self.translator)
+            value=(
+                self.session.find(WorkerDescription, worker_id = self.crew.id) or WorkerDescription(worker_id = self.crew.id)
+            ).to_embed_value(self.translator)
             
         )
         return self
     
     def add_experience_field(self):
         value_text_list = []
+        # 경험치는 카테고리마다 조회하지 않고 한 번에 불러옴
+        experiences = {
+            exp.category: exp for exp in self.session.find_many(WorkerExperience, worker_id = self.crew.id)
+        }
         for category in ExperienceCategory.to_list():
-            exp = self.crew.get_experience(category)
+            exp = experiences.get(category) or WorkerExperience(worker_id = self.crew.id, category = category)
             value_text_list.append(
                 exp.to_embed_value()
             )
@@ -52,7 +52,8 @@ def make_and_push_new_faction(database: DatabaseManager, new_faction: Faction):
     new_faction.set_database(database)
     new_faction.push()
     
-    database.connection.commit()
+    # transaction() 안에서 호출되면 트랜잭션이 끝날 때 commit됨
+    database.commit()
     
     del new_faction
     new_faction = Faction.from_database(database, user_id=user_id)
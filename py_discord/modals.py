@@ -2,6 +2,8 @@ import discord
 from discord.ui import Modal, TextInput
 
 from py_base.koreanstring import objective, instrumental
+from py_base.dbmanager import DatabaseManager
+from py_base.yamlobj import Detail
 from py_base.ari_enum import FacilityCategory, ResourceCategory
 from py_system.tableobj import Facility
 from py_system.worker import Livestock
@@ -69,18 +71,23 @@ class FactionCreateModal(ArislenaGeneralModal):
         # 특수문자가 포함되어 있는지 확인
         func.check_special_character_and_raise(faction_name)
         
-        database = self.bot.get_database(interaction.guild_id)
+        # 세력과 대원, 자원을 쓰기 스레드에서 하나의 트랜잭션으로 추가함 (중간에 실패하면 세력도 추가되지 않음)
+        await self.bot.get_async_database(interaction.guild_id).transaction(
+            self._create_faction, interaction.user.id, faction_name, self.bot.get_server_manager(interaction.guild_id).detail
+        )
 
+        await interaction.response.send_message(f"성공적으로 세력을 창설했습니다!", ephemeral=True)
+        
+        await self.bot.announce_channel(f"**{interaction.user.display_name}**님께서 **{self.faction_name}** 세력을 창설했어요!", self.bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id)
+    
+    def _create_faction(self, database: DatabaseManager, user_id: int, faction_name: str, detail: Detail):
         # 세력 데이터베이스에 추가
-        new_faction = func.make_and_push_new_faction(database, Faction(user_id=interaction.user.id, name=faction_name))
+        new_faction = func.make_and_push_new_faction(database, Faction(user_id=user_id, name=faction_name))
         
         # 경험치가 12인 대원 2명 추가
         # TODO 리팩토링으로 인해 이 부분을 다시 작성해야 함
         for _ in range(2):
-            func.make_and_push_new_crew_package(
-                database, Crew.new(new_faction.id),
-                self.bot.get_server_manager(interaction.guild_id).detail
-            )
+            func.make_and_push_new_crew_package(database, Crew.new(new_faction.id), detail)
         
         # 자원 추가: 식량 6, 식수 6
         Resource(faction_id=new_faction.id, category=ResourceCategory.FOOD, amount=6)\
@@ -92,12 +99,6 @@ class FactionCreateModal(ArislenaGeneralModal):
             
         # 기본 영토와 시설(담수원, 수렵지, 목초지, 채집지) 추가
         # TODO 리팩토링으로 인해 이 부분을 다시 작성해야 함
-        
-        database.connection.commit()
-
-        await interaction.response.send_message(f"성공적으로 세력을 창설했습니다!", ephemeral=True)
-        
-        await self.bot.announce_channel(f"**{interaction.user.display_name}**님께서 **{self.faction_name}** 세력을 창설했어요!", self.bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id)
 
 class NewTerritoryModal(ArislenaGeneralModal):
 
@@ -113,10 +114,17 @@ class NewTerritoryModal(ArislenaGeneralModal):
         # 특수문자가 포함되어 있는지 확인
         func.check_special_character_and_raise(territory_name)
         
-        database = self.bot.get_database(interaction.guild_id)
+        await self.bot.get_async_database(interaction.guild_id).transaction(
+            self._create_territory, interaction.user.id, territory_name
+        )
+
+        await interaction.response.send_message(f"성공적으로 **{territory_name}** 영토를 생성했습니다!", ephemeral=True)
 
+        await self.bot.announce_channel(f"**{interaction.user.display_name}**님께서 새로운 영토, {objective(territory_name, '**')} 얻었어요!", self.bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id)
+    
+    def _create_territory(self, database: DatabaseManager, user_id: int, territory_name: str):
         # 세력 데이터베이스에 추가
-        faction = Faction.from_database(database, user_id=interaction.user.id)
+        faction = Faction.from_database(database, user_id=user_id)
         # 새 영토 생성
         t = Territory.new(faction_id=faction.id, name=territory_name)\
             .set_database(database)
@@ -134,12 +142,6 @@ class NewTerritoryModal(ArislenaGeneralModal):
         b.set_database(database)
         b.push()
 
-        await interaction.response.send_message(f"성공적으로 **{territory_name}** 영토를 생성했습니다!", ephemeral=True)
-
-        await self.bot.announce_channel(f"**{interaction.user.display_name}**님께서 새로운 영토, {objective(territory_name, '**')} 얻었어요!", self.bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id)
-
-        database.connection.commit()
-
 class NewFacilityModal(ArislenaGeneralModal):
     
     facility_name = ArislenaTextInput("시설 이름")
@@ -162,17 +164,22 @@ class NameCrewModal(ArislenaGeneralModal):
     
     async def on_submit(self, interaction: discord.Interaction) -> None:
         
-        database = self.bot.get_database(interaction.guild_id)
+        before_crew_name = await self.bot.get_async_database(interaction.guild_id).transaction(
+            self._rename_crew, interaction.user.id
+        )
         
-        faction = Faction.from_database(database, user_id=interaction.user.id)
+        await interaction.response.send_message(f"대원 이름을 **{before_crew_name}**에서 {instrumental(self.new_crew_name.value, '**')} 변경했습니다.\n버튼 내용은 변경되지 않으므로, 확인을 위해서는 새로 정보를 열람하셔야 합니다.", ephemeral=True)
+    
+    def _rename_crew(self, database: DatabaseManager, user_id: int) -> str:
+        """
+        대원의 이름을 바꾸고, 바꾸기 전의 이름을 반환함
+        """
+        faction = Faction.from_database(database, user_id=user_id)
         crew = Crew.from_database(database, faction_id=faction.id, name=self.previous_crew_name)
         before_crew_name = crew.name
         crew.name = self.new_crew_name.value
         crew.push()
-        
-        await interaction.response.send_message(f"대원 이름을 **{before_crew_name}**에서 {instrumental(self.new_crew_name.value, '**')} 변경했습니다.\n버튼 내용은 변경되지 않으므로, 확인을 위해서는 새로 정보를 열람하셔야 합니다.", ephemeral=True)
-        
-        database.connection.commit()
+        return before_crew_name
 
 class TrainLivestockModal(ArislenaGeneralModal):
     
@@ -183,15 +190,18 @@ class TrainLivestockModal(ArislenaGeneralModal):
         self.bot = bot
         
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        database = self.bot.get_database(interaction.guild_id)
+        await self.bot.get_async_database(interaction.guild_id).transaction(
+            self._train_livestock, interaction.user.id
+        )
         
-        faction = Faction.from_database(database, user_id=interaction.user.id)
+        await interaction.response.send_message(f"가축 이름을 {instrumental(self.new_livestock_name.value, '**')} 정하고, 노동에 활용할 수 있도록 새로 훈련했습니다.", ephemeral=True)
+    
+    def _train_livestock(self, database: DatabaseManager, user_id: int):
+        faction = Faction.from_database(database, user_id=user_id)
         livestock = Livestock(
             faction_id=faction.id,
             name=self.new_livestock_name.value
         )
         livestock.set_database(database)
         livestock.push()
-        
-        await interaction.response.send_message(f"가축 이름을 {instrumental(self.new_livestock_name.value, '**')} 정하고, 노동에 활용할 수 있도록 새로 훈련했습니다.", ephemeral=True)
         
\ No newline at end of file
@@ -1,36 +1,40 @@
-import discord, shutil, datetime, asyncio
+import discord, datetime
 from discord.ext import commands
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from threading import Thread
-from pathlib import Path
 
 from py_base import ari_enum, yamlobj
 from py_base.ari_logger import ari_logger
 from py_base.dbmanager import DatabaseManager
+from py_base.asyncdb import AsyncDatabase
 from py_base.ari_enum import ScheduleState
-from py_base.utility import get_date, DATE_FORMAT, BACKUP_DIR, FULL_DATE_FORMAT_NO_SPACE
+from py_base.utility import get_date, DATE_FORMAT, BACKUP_DIR
+from py_base.dbbackup import BackupPolicy
 from py_base.jsonobj import BotSetting
-from py_system.tableobj import Chalkboard, Deployment, CommandCounter, JobSetting, GuildSetting
-from py_system.worker import Livestock
+from py_system.tableobj import Chalkboard, JobSetting, GuildSetting
 
 from py_discord import turn_progress
-from py_system.worker import Crew
+from py_discord.turn_scheduler import TurnScheduler
+from py_system.turn_resolution import TurnResolver
 
 class ServerManager:
     
-    def __init__(self, bot:commands.Bot, bot_setting:BotSetting, database:DatabaseManager, guild_id: int):
+    def __init__(self, bot:commands.Bot, bot_setting:BotSetting, database:DatabaseManager, guild_id: int, turn_scheduler: TurnScheduler):
         """
         main_db: 게임의 메인 데이터베이스\n
         schedule: 스케줄 json 데이터\n
+        turn_scheduler: 모든 길드가 함께 쓰는 턴 종료 스케줄러\n
         """
         self.bot = bot
         self.bot_setting = bot_setting
         self.database = database
+        # 코루틴에서 데이터베이스를 쓸 때는 이벤트 루프를 막지 않도록 async_database를 사용함
+        self.async_database = AsyncDatabase(database)
         self.guild_id = guild_id
         
         self.detail = yamlobj.Detail()
         self.table_obj_translator = yamlobj.TableObjTranslator()
         self.event_text = yamlobj.EventText()
+        # 턴 종료 백업의 보존 정책
+        self.backup_policy = BackupPolicy(compress=True)
 
         self.job_setting = JobSetting.from_database(self.database)
         self.guild_setting = GuildSetting.from_database(self.database)
@@ -39,36 +43,14 @@ class ServerManager:
         
         self.announce_channel = self.bot.get_channel(self.guild_setting.announce_channel_id)
 
-        # 스케줄러 생성
-        self.event_loop = asyncio.new_event_loop()
-        self.scheduler = AsyncIOScheduler(timezone='Asia/Seoul', event_loop=self.event_loop)
-        self.scheduler_add_job()
-        self.event_loop.create_task(self.scheduler_run())
+        # 턴 종료 작업은 봇 전체의 스케줄러에 등록되어 봇의 이벤트 루프에서 실행됨
+        self.turn_scheduler = turn_scheduler
+        self.turn_scheduler.add_guild(self)
         
-        self.execute_thread = Thread(target=self.run_loop_forever)
-        self.execute_thread.start()
-        
-        ari_logger.info(f"길드 {guild_id}의 스케줄러가 생성되었습니다.")
+        ari_logger.info(f"길드 {guild_id}의 턴 종료 작업이 등록되었습니다.")
 
     def __del__(self):
-        self.scheduler.shutdown()
-
-    def form_schedule_id(self) -> str:
-        return f"arislena-{self.guild_id}"
-
-    def scheduler_add_job(self):
-        self.scheduler.add_job(
-            self.end_turn, 
-            **self.job_setting.get_dict_without_id(),
-            id=self.form_schedule_id()
-        )
-    
-    async def scheduler_run(self):
-        asyncio.set_event_loop(self.event_loop)
-        self.scheduler.start()
-        
-    def run_loop_forever(self):
-        self.event_loop.run_forever()
+        self.async_database.close()
     
     def start_game(self):
         '''
@@ -87,7 +69,7 @@ class ServerManager:
             
             case ScheduleState.WAITING:
                 # 시작 대기 중일 때 (0)
-                self.scheduler_add_job()
+                self.turn_scheduler.add_guild(self)
                 self.chalkboard.push()
                 
                 ari_logger.info(f"길드 {self.guild_id}의 게임 시작 요청({(datetime.date.today() + datetime.timedelta(days=1)).strftime(DATE_FORMAT)} 게임 시작 예정)")
@@ -95,7 +77,7 @@ class ServerManager:
             
             case ScheduleState.PAUSED:
                 # 중단 중일 때 (2)
-                self.scheduler.resume_job(self.form_schedule_id())
+                self.turn_scheduler.resume_guild(self.guild_id)
                 
                 self.chalkboard.schedule_state = ScheduleState.ONGOING
                 self.chalkboard.push()
@@ -117,29 +99,36 @@ class ServerManager:
             content=f"# {self.chalkboard.now_turn}턴 종료 및 {self.chalkboard.now_turn+1}턴 시작 진행 보고"
         )
 
-        # 진행 상황 백업
-        shutil.copy(self.database.file_path, BACKUP_DIR / Path(f"{get_date(FULL_DATE_FORMAT_NO_SPACE)}_" + str(self.database.file_path.name)))
+        # 진행 상황 백업 (별도의 스레드에서 online backup API로 실행되므로 이벤트 루프를 막지 않음)
+        await self.database.backup_async(BACKUP_DIR, self.backup_policy)
 
         if self.chalkboard.schedule_state == ScheduleState.WAITING:
             self.chalkboard.schedule_state = ScheduleState.ONGOING
 
         if self.chalkboard.now_turn >= self.chalkboard.turn_limit:
-            self.end_game()
+            await self.end_game()
             return
         
-        await self.execute_before_turn_end()
+        # 턴 종료 처리는 쓰기 스레드에서 하나의 트랜잭션으로 실행하여 이벤트 루프를 막지 않음
+        # 쓰기 스레드는 self.chalkboard를 건드리지 않고, 새 턴은 commit된 뒤에 이벤트 루프에서 반영함
+        # 공지 전송은 commit 이후에 하여, 메세지를 보내는 동안 데이터베이스 쓰기 잠금을 잡고 있지 않도록 함
+        try:
+            new_turn, facility_embeds, report_lines = await self.async_database.transaction(
+                self._resolve_turn, self.chalkboard.id, self.chalkboard.schedule_state
+            )
         
-        ari_logger.info(f"길드 {self.guild_id}의 {self.chalkboard.now_turn}턴 종료")
-
-        self.chalkboard.now_turn += 1
+        except Exception as e:
+            # 데이터베이스는 transaction()이 rollback하고, self.chalkboard는 바뀌지 않았음
+            ari_logger.error(f"길드 {self.guild_id}의 턴 종료 처리 실패: {e}")
+            raise e
         
-        await self.execute_after_turn_end()
+        self.chalkboard.now_turn = new_turn
         
         ari_logger.info(f"길드 {self.guild_id}의 {self.chalkboard.now_turn}턴 시작")
-                
-        self.chalkboard.push()
         
-        self.database.connection.commit()
+        for embed in facility_embeds:
+            await self.announce_channel.send(embed=embed)
+        await self.announce_channel.send(content="\n".join(report_lines))
 
     def stop_game(self):
         '''
@@ -150,16 +139,16 @@ class ServerManager:
             return "게임이 진행 중이 아닙니다."
         
         self.chalkboard.schedule_state = ScheduleState.PAUSED
-        self.chalkboard.push()
+        with self.database.transaction():
+            self.chalkboard.push()
 
-        self.scheduler.pause_job(self.form_schedule_id())
+        self.turn_scheduler.pause_guild(self.guild_id)
 
         ari_logger.info(f"길드 {self.guild_id}의 게임 중단 요청 | 현재 {self.chalkboard.now_turn}턴")
         
-        self.database.connection.commit()
         return f"게임이 중단 되었습니다. | 현재 {self.chalkboard.now_turn}턴"
 
-    def end_game(self):
+    async def end_game(self):
         '''
         게임 종료 함수
         '''
@@ -167,78 +156,78 @@ class ServerManager:
         self.chalkboard.schedule_state = ScheduleState.ENDED
         self.chalkboard.end_date = get_date()
 
-        self.scheduler.remove_job(self.form_schedule_id())
+        self.turn_scheduler.remove_guild(self.guild_id)
 
-        self.chalkboard.push()
+        await self.async_database.transaction(self._push_chalkboard)
 
         ari_logger.info(f"길드 {self.guild_id}의 게임 종료 요청 | 현재 {self.chalkboard.now_turn}턴")
         
-        self.database.connection.commit()
         # 게임 종료 메시지 추가 예정
         return "게임이 종료 되었습니다."
     
+    def _push_chalkboard(self, database: DatabaseManager):
+        self.chalkboard.push()
+    
     def crew_consume(self) -> list[discord.Embed]:
         pass
 
-    async def execute_before_turn_end(self):
+    def _resolve_turn(self, database: DatabaseManager, chalkboard_id: int, schedule_state: ScheduleState) -> tuple[int, list[discord.Embed], list[str]]:
+        '''
+        턴 종료와 다음 턴 시작을 처리함 (async_database의 쓰기 스레드에서 트랜잭션 안에서 실행됨)
+        
+        이벤트 루프의 self.chalkboard 대신 트랜잭션 안에서 불러온 Chalkboard를 사용함\n
+        새 턴 수, 시설마다의 활동 보고 embed, 보고할 문장 목록을 반환함
+        '''
+        # 턴 종료에 필요한 상태를 한 번에 불러오고, 모든 변경 사항을 한 번에 기록함
+        chalkboard = Chalkboard.from_database(database, id=chalkboard_id)
+        resolver = TurnResolver(database).load()
+        
+        facility_embeds = self.execute_before_turn_end(resolver, chalkboard.now_turn)
+        
+        ari_logger.info(f"길드 {self.guild_id}의 {chalkboard.now_turn}턴 종료")
+
+        chalkboard.now_turn += 1
+        chalkboard.schedule_state = schedule_state
+        
+        report_lines = self.execute_after_turn_end(resolver)
+        
+        resolver.flush()
+        chalkboard.push()
+        return chalkboard.now_turn, facility_embeds, report_lines
+
+    def execute_before_turn_end(self, resolver: TurnResolver, ended_turn: int) -> list[discord.Embed]:
         '''
         턴 종료 시 실행 함수
+        
+        시설마다의 활동 보고 embed를 반환함
         '''
-        ari_logger.info(f"길드 {self.guild_id}의 {self.chalkboard.now_turn}턴 종료 진행")
-        for facility_id in Deployment.get_unique_facility_ids(self.database):
-            await self.announce_channel.send(embed=turn_progress.facility_progress(self.database, facility_id))
+        ari_logger.info(f"길드 {self.guild_id}의 {ended_turn}턴 종료 진행")
+        return [
+            turn_progress.facility_progress(resolver.database, facility_id, deployment_list, resolver.session)
+            for facility_id, deployment_list in resolver.deployments_by_facility.items()
+        ]
     
-    async def execute_after_turn_end(self):
+    def execute_after_turn_end(self, resolver: TurnResolver) -> list[str]:
         '''
         턴 시작 시 실행 함수
+        
+        변경 사항은 resolver에만 기록되며, 보고할 문장 목록을 반환함
         '''
         
         report_lines = []
         
-        # availablity가 STANDBY인 모든 Crew, Livestock을 IDLE로 변경하고, labor를 설정함
-        worker_types = [Crew, Livestock]
-        for laborable_table in worker_types:
-            laborable_table: Crew|Livestock
-            for row in self.database.fetch_many(laborable_table.table_name, availability=ari_enum.Availability.UNAVAILABLE.value):
-                obj = laborable_table.from_data(row)
-                obj.set_database(self.database)
-                obj.availability = ari_enum.Availability.STANDBY
-                
-                obj.push()
-        
-        self.database.connection.commit()
+        # availablity가 UNAVAILABLE인 모든 노동원을 STANDBY로 변경하고, STANDBY인 모든 노동원의 노동력을 설정함
+        # 모든 CommandCounter 0으로 설정
+        resolver.resolve_turn_start()
         
         report_lines.append(
             f"- **{ari_enum.Availability.UNAVAILABLE.express()}** 상태인 모든 대원과 가축이 **{ari_enum.Availability.STANDBY.express()}** 상태로 변경되었습니다."
         )
-        for laborable_table in worker_types:
-            for row in self.database.fetch_many(laborable_table.table_name, availability=ari_enum.Availability.STANDBY.value):
-                obj = laborable_table.from_data(row)
-                obj.set_database(self.database)\
-                    .set_efficiency()
-                
-                # Crew의 경우 기본 노동력에 따른 efficiency_detail을 설정
-                if isinstance(obj, Crew):
-                    desc = obj.get_description()\
-                        .set_database(self.database)\
-                        .set_worker_efficiency_detail(obj.efficiency_dice.last_judge.name, self.detail)
-                    desc.push()
-
-                obj.push()
-        
         report_lines.append(
             f"- **{ari_enum.Availability.STANDBY.express()}** 상태인 모든 대원과 가축의 노동력이 설정되었습니다."
         )
-
-        # 모든 CommandCounter 0으로 설정
-        cc_list = [CommandCounter.from_data(cc) for cc in self.database.fetch_all(CommandCounter.table_name)]
-        for cc in cc_list:
-            cc.set_database(self.database)
-            cc.reset()
-            cc.push()
-            
         report_lines.append(
             f"- 모든 명령 카운터가 초기화 되었습니다."
         )
         
-        await self.announce_channel.send(content="\n".join(report_lines))
+        return report_lines
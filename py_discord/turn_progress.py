@@ -5,19 +5,35 @@ from py_base.dbmanager import DatabaseManager
 from py_system.tableobj import Facility
 from py_system.tableobj import Deployment, Resource
 from py_system.facility import facility_to_concrete_facility
+from py_system.session import Session
 
 
 
 
-def facility_progress(database: DatabaseManager, facility_id: int) -> Embed:
+def facility_progress(
+    database: DatabaseManager, 
+    facility_id: int, 
+    deployment_list: list[Deployment] | None = None,
+    session: Session | None = None
+) -> Embed:
     # 모든 시설이 생산을 실행
     # TODO 코드 작성
-
-    deployment_row_list = database.fetch_many(Deployment.table_name, facility_id=facility_id)
-    deployment_list = Deployment.from_data_iter(deployment_row_list, database)
+    
+    # session이 주어지면(턴 종료 엔진의 session) 이미 불러온 행은 다시 조회하지 않고,
+    # 변경 사항은 턴 종료 엔진이 마지막에 한 번에 기록함
+    own_session = session is None
+    if own_session:
+        session = Session(database)
+    
+    # deployment_list가 주어지면(턴 종료 엔진이 미리 불러온 경우) 다시 조회하지 않음
+    if deployment_list is None:
+        deployment_list = session.find_many(Deployment, facility_id=facility_id)
+    
+    # 배치된 노동원과 경험치는 배치마다 조회하지 않고 한 번에 불러옴
+    session.prefetch(deployment_list, "worker", "worker.experience")
     
     # 시설과 대원, 가축 불러오기
-    facility = Facility.from_database(database, id=facility_id)
+    facility = session.get(Facility, facility_id)
     facility = facility_to_concrete_facility(facility)
     deployed_crews = facility.get_deployed_crews(deployment_list)
     deployed_livestocks = facility.get_deployed_livestocks(deployment_list)
@@ -47,14 +63,16 @@ def facility_progress(database: DatabaseManager, facility_id: int) -> Embed:
         
         facility.push()
     
+    # 변경된 자원은 session에 모아서 마지막에 한 번에 기록함
     # 시설에 배치된 노동원마다 실행
     for sys_worker in deployed_crews + deployed_livestocks:
         # 자원 소모
         embed_value_list = [f"- 배치 노동원: {sys_worker.name}", f"- 노동력: {sys_worker.efficiency}"]
         for consume_resource in production_recipe.consume:
             
-            r_data = database.fetch(Resource.table_name, faction_id=facility.faction_id, category=consume_resource.category)
-            r = Resource.from_data(r_data)
+            r = session.find(Resource, faction_id=facility.faction_id, category=consume_resource.category)
+            if r is None:
+                r = Resource(faction_id=facility.faction_id, category=consume_resource.category)
             
             if r < consume_resource:
                 embed_value_list.append("자원이 부족해 생산을 진행할 수 없습니다.")
@@ -65,12 +83,12 @@ def facility_progress(database: DatabaseManager, facility_id: int) -> Embed:
                 continue
             else:
                 r.amount -= consume_resource.amount
+                session.add(r)
                 embed_value_list.append(f"- 소모량: {consume_resource.amount}")
                 result_embed.add_field(
                     name=f"{consume_resource.category.express()}",
                     value="\n".join(embed_value_list)
                 )
-                r.push()
         
     # 자원 생산
     for worker in deployed_crews + deployed_livestocks:
@@ -82,7 +100,10 @@ def facility_progress(database: DatabaseManager, facility_id: int) -> Embed:
                 name=f"{produce_resource.category.express()}",
                 value=f"- 배치 노동원: {worker.name}({worker.category.express()})\n- 노동력: {worker.efficiency}\n- 생산량: **{produce_resource.amount}**"
             )
-            produce_resource.push()
+            session.add(produce_resource)
+    
+    if own_session:
+        session.flush()
     
     return result_embed
 
@@ -0,0 +1,87 @@
+"""
+모든 길드의 턴 종료 작업을 봇의 이벤트 루프에서 실행하는 스케줄러
+
+길드마다 이벤트 루프와 스레드를 만들지 않고, 봇 전체에서 하나의 AsyncIOScheduler에 길드마다 작업 하나를 등록함
+턴 종료는 봇의 이벤트 루프에서 실행되므로, 디스코드 클라이언트(announce_channel.send 등)를 그대로 쓸 수 있음
+"""
+import asyncio
+from typing import TYPE_CHECKING
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from py_base.ari_logger import ari_logger
+
+if TYPE_CHECKING:
+    from py_discord.server_manager import ServerManager
+
+# 동시에 진행할 수 있는 턴 종료의 수 (같은 시각에 턴이 끝나는 길드가 많아도 이 수만큼만 동시에 실행됨)
+MAX_CONCURRENT_TURN_ENDS = 2
+TIMEZONE = "Asia/Seoul"
+
+class TurnScheduler:
+    """
+    길드마다의 턴 종료 작업(JobSetting)을 관리하는 스케줄러
+
+    사용법:
+    ```
+    turn_scheduler = TurnScheduler()
+    turn_scheduler.start() # 봇의 이벤트 루프가 실행 중일 때 (setup_hook 등)
+    turn_scheduler.add_guild(server_manager)
+    ```
+    """
+
+    def __init__(self, max_concurrent_turn_ends: int = MAX_CONCURRENT_TURN_ENDS, timezone: str = TIMEZONE):
+        self.scheduler = AsyncIOScheduler(timezone=timezone)
+        self._turn_end_slots = asyncio.Semaphore(max_concurrent_turn_ends)
+        # 길드 id -> 턴 종료 잠금 (같은 길드의 턴 종료가 예약 작업과 /턴넘기기로 겹쳐 실행되지 않도록 함)
+        self._guild_locks: dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def form_job_id(guild_id: int | str) -> str:
+        return f"arislena-{guild_id}"
+
+    def start(self):
+        """
+        실행 중인 이벤트 루프(봇의 이벤트 루프)에서 스케줄러를 시작함
+        """
+        if not self.scheduler.running: self.scheduler.start()
+
+    def shutdown(self):
+        if self.scheduler.running: self.scheduler.shutdown(wait=False)
+
+    def add_guild(self, server_manager: "ServerManager"):
+        """
+        길드의 JobSetting대로 턴 종료 작업을 등록함 (이미 등록되어 있으면 교체함)
+        """
+        self.scheduler.add_job(
+            self.run_turn_end,
+            args=(server_manager,),
+            id=self.form_job_id(server_manager.guild_id),
+            replace_existing=True,
+            # 봇이 멈춰 있어 놓친 턴 종료는 한 번만 실행함
+            coalesce=True,
+            max_instances=1,
+            **server_manager.job_setting.get_dict_without_id()
+        )
+
+    def pause_guild(self, guild_id: int | str):
+        if self.scheduler.get_job(self.form_job_id(guild_id)): self.scheduler.pause_job(self.form_job_id(guild_id))
+
+    def resume_guild(self, guild_id: int | str):
+        if self.scheduler.get_job(self.form_job_id(guild_id)): self.scheduler.resume_job(self.form_job_id(guild_id))
+
+    def remove_guild(self, guild_id: int | str):
+        if self.scheduler.get_job(self.form_job_id(guild_id)): self.scheduler.remove_job(self.form_job_id(guild_id))
+
+    async def run_turn_end(self, server_manager: "ServerManager"):
+        """
+        동시 실행 제한 안에서 길드의 턴 종료를 실행함
+
+        같은 길드의 턴 종료가 이미 진행 중이면 끝날 때까지 기다린 뒤 실행함
+        """
+        lock = self._guild_locks.setdefault(str(server_manager.guild_id), asyncio.Lock())
+        async with lock:
+            if self._turn_end_slots.locked():
+                ari_logger.info(f"길드 {server_manager.guild_id}의 턴 종료가 다른 길드의 턴 종료를 기다립니다.")
+            async with self._turn_end_slots:
+                await server_manager.end_turn()
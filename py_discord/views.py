@@ -12,6 +12,7 @@ from py_discord import modals, embeds
 from py_discord.bot_base import BotBase
 from py_discord.abstract import TableObjectButton
 from py_base import warnings
+from py_base.dbmanager import DatabaseManager
 from py_system.worker import Crew
 
 # /유저 설정 - 설정 정보 출력
@@ -113,12 +114,14 @@ class FactionLookupButton(TableObjectButton):
     async def callback(self, interaction: discord.Interaction[discord.Client]):
         embed = self._get_basic_embed()
         
-        # 자원 상황 출력
+        # 자원 상황 출력 (카테고리마다 조회하지 않고 한 번에 불러옴)
+        resources = {
+            resource.category: resource for resource in 
+            (Resource.from_data(data) for data in await self._async_database.fetch_many(Resource.table_name, faction_id = self.faction.id))
+        }
         field_values = []
         for resource_category in ResourceCategory.to_list():
-            resource = Resource.from_database(
-                self._database, faction_id = self.faction.id, category = resource_category
-            )
+            resource = resources.get(resource_category) or Resource(faction_id = self.faction.id, category = resource_category)
             field_values.append(resource.to_embed_value())
         
         embed.add_field(
@@ -158,7 +161,7 @@ class TerritoryLookupButton(TableObjectButton):
         field_value = ""
         # 시설 정보 추가
         
-        if (b_datas := self._database.fetch_many(Facility.table_name, territory_id = self._territory.id)):
+        if (b_datas := await self._async_database.fetch_many(Facility.table_name, territory_id = self._territory.id)):
             for b_data in b_datas:
                 b_obj = Facility.from_data(b_data)
                 field_value += f"- {b_obj.name} ({b_obj.category.emoji} {b_obj.category.local_name})\n"
@@ -197,16 +200,19 @@ class CrewLookupButton(TableObjectButton):
         self._crew.set_database(self._database)
         return super().set_table_object(crew)
     
-    async def callback(self, interaction:discord.Interaction):
-        embed = embeds.CrewLookupEmbed(
+    def _get_lookup_embed(self, database: DatabaseManager) -> embeds.CrewLookupEmbed:
+        return embeds.CrewLookupEmbed(
             self._crew, 
-            self._database, 
+            database, 
             self._bot.get_server_manager(self._interaction_for_this.guild_id).table_obj_translator
         )\
             .add_basic_field()\
             .add_location_field()\
             .add_experience_field()\
             .add_description_field()
+    
+    async def callback(self, interaction:discord.Interaction):
+        embed = await self._async_database.run(self._get_lookup_embed)
         
         await interaction.response.send_message(
             embed = embed,
@@ -224,17 +230,20 @@ class CrewDismissButton(CrewLookupButton):
     def clone(self):
         return CrewDismissButton(self._bot, self.interaction_for_this)
     
-    async def callback(self, interaction:discord.Interaction):
-        self.check_interruption(interaction)
-        self._crew.set_database(self._database)
+    def _dismiss(self, database: DatabaseManager):
+        self._crew.set_database(database)
         desc = self._crew.get_description()
-        desc.set_database(self._database)
+        desc.set_database(database)
         exp_list = self._crew.get_every_experience()
         for exp in exp_list:
-            exp.set_database(self._database)
+            exp.set_database(database)
             exp.delete()
         desc.delete()
         self._crew.delete()
+    
+    async def callback(self, interaction:discord.Interaction):
+        self.check_interruption(interaction)
+        await self._async_database.transaction(self._dismiss)
         
         # 누른 버튼 비활성화
         self.disabled = True
@@ -245,8 +254,6 @@ class CrewDismissButton(CrewLookupButton):
             f"{interaction.user.display_name}님께서 **{self._crew.name}** 대원을 해고했습니다.", 
             self._bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id
         )
-        
-        self._database.connection.commit()
 
 class FacilityLookupButton(TableObjectButton):
     
@@ -263,7 +270,7 @@ class FacilityLookupButton(TableObjectButton):
         super()._check_type(facility)
         
     def _set_label_complementary(self, facility: Facility):
-        t_name = self._database.connection.execute(f"SELECT {Territory.name.name} FROM {Territory.table_name} WHERE id = {facility.territory_id}").fetchone()[0]
+        t_name = self._database.fetch_column(Territory.table_name, Territory.name.name, id=facility.territory_id)[0]
         self.label_complementary = t_name
     
     def set_table_object(self, facility: Facility):
@@ -305,7 +312,7 @@ class SelectCrewToDeployButton(CrewLookupButton):
         self.check_interruption(interaction)
         # deployment 가져오기
         view = TableObjectView(
-            fetch_list = [Facility.from_data(data) for data in self._database.fetch_many("facility", faction_id = self._faction.id)],
+            fetch_list = [Facility.from_data(data) for data in await self._async_database.fetch_many(Facility.table_name, faction_id = self._faction.id)],
             sample_button = DeployToFacilityButton(self._bot, interaction, self._crew, self._faction)
         )
         view.add_item(CancelButton())
@@ -329,17 +336,18 @@ class DeployToFacilityButton(FacilityLookupButton):
     def disable_or_not(self):
         self.disabled = not self.facility.is_deployable()
     
+    def _deploy(self, database: DatabaseManager):
+        self.facility.set_database(database)
+        self.facility.deploy(self._crew)
+    
     async def callback(self, interaction: discord.Interaction):
         self.check_interruption(interaction)
         
-        self.facility.set_database(self._database)
-        self.facility.deploy(self._crew)
+        await self._async_database.transaction(self._deploy)
         
         await interaction.response.send_message(
             f"**{self._crew.name}** 대원을 **{self.facility.name}** ({self.facility.category.express()}) 시설에 배치했습니다!"
         )
-        
-        self._database.connection.commit()
 
 class PurifyButton(TerritoryLookupButton):
     
@@ -352,19 +360,20 @@ class PurifyButton(TerritoryLookupButton):
     def disable_or_not(self):
         if self._territory.safety == TerritorySafety.get_max_safety(): self.disabled = True
     
-    async def callback(self, interaction:discord.Interaction):
-        self.check_interruption(interaction)
-        self._territory.set_database(self._database)
+    def _purify(self, database: DatabaseManager):
+        self._territory.set_database(database)
         
         # if self.territory.safety.value == TerritorySafety.max_value():
         #     await interaction.response.send_message("이미 최대 정화 단계입니다.", ephemeral=True)
         #     return
         self._territory.safety = TerritorySafety(self._territory.safety.value + 1)
         self._territory.push()
+    
+    async def callback(self, interaction:discord.Interaction):
+        self.check_interruption(interaction)
+        await self._async_database.transaction(self._purify)
         
         await interaction.response.send_message(f"성공적으로 **{self._territory.name}** 영토를 정화했습니다!", ephemeral=True)
-        
-        self._database.connection.commit()
 
 class BuildButton(TerritoryLookupButton):
     
@@ -377,11 +386,11 @@ class BuildButton(TerritoryLookupButton):
     def clone(self):
         return BuildButton(self._bot, self._interaction_for_this, self._faction, self.facility_category, self.facility_name)
         
-    async def callback(self, interaction:discord.Interaction):
-        
-        self.check_interruption(interaction)
-        
-        self._territory.set_database(self._database)
+    def _build(self, database: DatabaseManager) -> type[SystemFacility]:
+        """
+        시설을 추가하고, 추가한 시설의 시스템 클래스를 반환함
+        """
+        self._territory.set_database(database)
         
         if self._territory.get_remaining_space() == 0: raise warnings.NoSpace()
 
@@ -396,12 +405,17 @@ class BuildButton(TerritoryLookupButton):
             remaining_cost=sys_facility_type.production_requirement
         )
         
-        facility.set_database(self._database)
+        facility.set_database(database)
         facility.push()
+        return sys_facility_type
         
-        await interaction.response.send_message(f"**{self.facility_name}** 시설의 터를 잡았습니다! **{sys_facility_type.production_requirement}**만큼의 주사위 총량이 요구됩니다.", ephemeral=True)
+    async def callback(self, interaction:discord.Interaction):
+        
+        self.check_interruption(interaction)
+        
+        sys_facility_type = await self._async_database.transaction(self._build)
         
-        self._database.connection.commit()
+        await interaction.response.send_message(f"**{self.facility_name}** 시설의 터를 잡았습니다! **{sys_facility_type.production_requirement}**만큼의 주사위 총량이 요구됩니다.", ephemeral=True)
 
 # 세력 해산 버튼
 class FactionDeleteButton(FactionLookupButton):
@@ -413,14 +427,18 @@ class FactionDeleteButton(FactionLookupButton):
     def clone(self):
         return FactionDeleteButton(self._bot, self._interaction_for_this)
     
-    async def callback(self, interaction:discord.Interaction):
+    def _delete_faction(self, database: DatabaseManager):
         # hierarchy 제거
-        self._database.connection.execute(
-            f"DELETE FROM FactionHierarchyNode WHERE higher = {self.faction.id} OR lower = {self.faction.id}"
+        database.connection.execute(
+            "DELETE FROM FactionHierarchyNode WHERE higher = ? OR lower = ?", (self.faction.id, self.faction.id)
         )
 
         # 세력 해산
+        self.faction.set_database(database)
         self.faction.delete()
+    
+    async def callback(self, interaction:discord.Interaction):
+        await self._async_database.transaction(self._delete_faction)
 
         self.disabled = True
 
@@ -432,7 +450,6 @@ class FactionDeleteButton(FactionLookupButton):
             f"**{interaction.user.display_name}**님께서 **{self.faction.name}** 세력을 해산하셨습니다.",
             self._bot.get_server_manager(interaction.guild_id).guild_setting.announce_channel_id
         )
-        self._database.connection.commit()
 
 
 # 범용 열람 버튼 ui
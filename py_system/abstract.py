@@ -1,19 +1,34 @@
 
 from abc import ABCMeta, abstractmethod
 from sqlite3 import Row
-from typing import Iterable, Iterator, Self, Any
+from typing import Iterable, Iterator, Self, Any, Callable, Mapping
+from types import MappingProxyType
+from dataclasses import dataclass
 from enum import IntEnum
 from math import sqrt
+from operator import attrgetter
 
-from py_base.ari_enum import get_intenum, ResourceCategory, ExperienceCategory
+from py_base.ari_enum import ResourceCategory, ExperienceCategory
 from py_base.datatype import ExtInt, AbsentValue
-from py_base.dbmanager import DatabaseManager
+from py_base.dbmanager import DatabaseManager, compile_sql, UPDATE, INDEX_PREFIX
 from py_base.abstract import ArislenaEnum, DetailEnum
 from py_base.yamlobj import TableObjTranslator, ConcreteObjectDescription
-from py_base.utility import sql_value
+from py_base.utility import sql_value, sql_parameter
 from py_base.arislena_dice import D20
 
-class Column:
+# 컬럼의 값을 저장하는 속성(slotted 클래스에서는 slot) 이름의 접두사
+STORAGE_PREFIX = "_col_"
+# 바뀐 컬럼이 없는 객체의 _changed_columns
+NO_CHANGES: frozenset[str] = frozenset()
+
+class Column(property):
+    """
+    A column of a TableObject.
+
+    Column is a property: reading a column goes through the C implementation of property and `operator.attrgetter` only,
+    and the value is stored in the attribute `_col_<name>` (a slot, if the class is slotted).
+    Writing a column checks the type and records the column as changed.
+    """
     
     def __init__(
         self,
@@ -27,7 +42,8 @@ class Column:
         default: Any = None,
         referenced_table: str = "",
         referenced_column: str = "",
-        foreign_key_options: list[str] = []
+        foreign_key_options: list[str] = [],
+        index: bool | None = None
     ):
         """
         name : name of the column
@@ -42,10 +58,13 @@ class Column:
         referenced_table : the table that the column references (foreign key)
         referenced_column : the column that the column references (foreign key)
         foreign_key_options : options for the foreign key
+        index : whether to create an index on the column (if None, foreign key columns are indexed)
         
         ex) foregn_key_options = ["ON DELETE CASCADE", "ON UPDATE CASCADE"]
         """
+        super().__init__()
         self._name: str = ""
+        self.storage_name: str = ""
         self._value: annotation | AbsentValue | None = None
         # _value를 Column 외부에서 활용하면 예상치 못한 결과(보통 알 수 없는 에러)를 초래할 수 있음
         self.annotation = annotation
@@ -59,6 +78,7 @@ class Column:
         self.referenced_table = referenced_table
         self.referenced_column = referenced_column
         self.foreign_key_options = foreign_key_options
+        self.index = bool(referenced_table) if index is None else index
         
         self.whitelist = self._get_whitelist()
         if default is not None and not isinstance(default, self.annotation):
@@ -72,20 +92,41 @@ class Column:
     def __str__(self):
         return str(self._value)
     
-    def __get__(self, instance: object, owner):
-        if instance is None: return self
-        # print(f"Column {self._name} is accessed; {instance} {owner}")
-        return instance.__dict__[self._name]
-    
-    def __set__(self, instance: object, value):
+    def _set(self, instance: object, value):
+        """
+        The setter of the column, which checks the type and records the column as changed.
+        """
         # print(f"Column {self._name} will set; {instance} with value {value}, which type is {type(value)}")
         if not isinstance(value, self.whitelist):
             raise TypeError(f"Column {self._name} is not {self.annotation} type. The value is '{value}' ({type(value)}).")
-            
-        instance.__dict__[self._name] = value
+        
+        # 값이 실제로 바뀐 컬럼만 기록해 두고, push/update할 때 그 컬럼만 기록함
+        old_value = getattr(instance, self.storage_name, AbsentValue)
+        if old_value is AbsentValue or type(old_value) is not type(value) or old_value != value:
+            try:
+                instance._changed_columns.add(self._name)
+            except AttributeError: # 아직 없거나, 동기화된 직후의 빈 frozenset인 경우
+                instance._changed_columns = {self._name}
+        
+        setattr(instance, self.storage_name, value)
+    
+    def load(self, instance: object, default: Any = None) -> Any:
+        """
+        Returns the stored value of the column without any check, or `default` if the value is not set yet.
+        """
+        return getattr(instance, self.storage_name, default)
+    
+    def store(self, instance: object, value: Any):
+        """
+        Stores the value of the column without any check (neither the type check nor the change tracking).
+        """
+        setattr(instance, self.storage_name, value)
         
     def __set_name__(self, owner, name):
         self._name = name
+        self.storage_name = f"{STORAGE_PREFIX}{name}"
+        # 읽기는 C로 구현된 property와 attrgetter만 거치고, 쓰기만 _set을 거침
+        property.__init__(self, attrgetter(self.storage_name), self._set)
     
     def __delete__(self, instance):
         del self._value
@@ -111,6 +152,25 @@ class Column:
         
         else: raise ValueError(f"Type {self.annotation} is not supported in Arislena's SQL.")
 
+    @property
+    def converter(self) -> tuple[Callable[[Any], Any] | None, bool]:
+        """
+        Returns how a value read from SQL is converted to the annotation.
+
+        Returns:
+            tuple[Callable | None, bool]: The function converting the SQL value (None if the value is used as is),
+            and whether the value is added to the default value of the object (for ExtInt, which keeps its limitations).
+        """
+        if self.annotation.__module__ == "builtins":
+            match self.annotation.__name__:
+                case "str" | "int" | "float": return None, False
+                case "bool": return bool, False
+                case "NoneType": return (lambda value: None), False
+        elif self.annotation is ExtInt: return None, True
+        elif issubclass(self.annotation, IntEnum): return self.annotation, False
+        
+        raise ValueError(f"Type {self.annotation} is not supported in Arislena's SQL.")
+
     @property
     def creator(self) -> str:
         """
@@ -148,7 +208,151 @@ class Column:
         """
         self._value = row[self._name]
 
-class TableObject(metaclass=ABCMeta):
+@dataclass(frozen=True)
+class TableSchema:
+    """
+    The column metadata of a TableObject class, computed once when the class is created.
+
+    Attributes:
+        `columns (Mapping[str, Column])`: The columns in declaration order, including the inherited ones.
+        `primary_key (str | None)`: The name of the primary key column.
+        `foreign_keys (tuple[str, ...])`: The names of the columns that reference another table.
+        `sql_types (Mapping[str, str])`: The data types of the columns used in SQL.
+        `showables (tuple[str, ...])`: The names of the columns that are shown in the front-end.
+        `insertables (tuple[str, ...])`: The names of the columns written by INSERT (not the primary key nor auto increment).
+        `updatables (tuple[str, ...])`: The names of the columns written by UPDATE (not the primary key).
+        `converters (Mapping[str, tuple[Callable | None, bool]])`: The converters of the columns, see `Column.converter`.
+    """
+    columns: Mapping[str, Column]
+    primary_key: str | None
+    foreign_keys: tuple[str, ...]
+    sql_types: Mapping[str, str]
+    showables: tuple[str, ...]
+    insertables: tuple[str, ...]
+    updatables: tuple[str, ...]
+    converters: Mapping[str, tuple[Callable[[Any], Any] | None, bool]]
+    
+    @classmethod
+    def from_class(cls, table_class: type) -> "TableSchema":
+        columns: dict[str, Column] = {}
+        # 상속받은 컬럼을 먼저 두고, 하위 클래스에서 다시 선언한 컬럼은 그 자리를 대체함
+        for klass in reversed(table_class.__mro__):
+            columns.update((key, value) for key, value in vars(klass).items() if isinstance(value, Column))
+        
+        return cls(
+            columns=MappingProxyType(columns),
+            primary_key=next((key for key, column in columns.items() if column.primary_key), None),
+            foreign_keys=tuple(key for key, column in columns.items() if column.referenced_table),
+            sql_types=MappingProxyType({key: column.sql_type for key, column in columns.items()}),
+            showables=tuple(key for key, column in columns.items() if column.show_front),
+            insertables=tuple(key for key, column in columns.items() if not (column.primary_key or column.auto_increment)),
+            updatables=tuple(key for key, column in columns.items() if not column.primary_key),
+            converters=MappingProxyType({key: column.converter for key, column in columns.items()})
+        )
+
+@dataclass(frozen=True)
+class Relation:
+    """
+    A relationship from a TableObject class to another table, resolved from the foreign key columns (`Column.referenced_table`).
+
+    Declared in the `relations` of the class and loaded for many objects at once by `TableObject.prefetch`.
+    If the class has a column referencing `table_name`, each object gets the referenced object or None (many-to-one).
+    Otherwise the column of `table_name` referencing the class is used, and each object gets the referencing objects (one-to-many).
+
+    Attributes:
+        `table_name (str)`: The name of the related table.
+        `attribute (str)`: The attribute of the object that stores the loaded objects.
+        `column (str, optional)`: The foreign key column. Defaults to the only column referencing the other table.
+        `many (bool, optional)`: Whether a one-to-many relation stores a list, or only the first object (or None). Defaults to True.
+        `key (str, optional)`: If given, a one-to-many relation stores a dict keyed by this column instead of a list.
+    """
+    table_name: str
+    attribute: str
+    column: str = ""
+    many: bool = True
+    key: str = ""
+    
+    def resolve(self, owner: "type[TableObject]") -> "tuple[type[TableObject], str, str, bool]":
+        """
+        Returns the related class, the column of the owner, the column of the related class compared to it,
+        and whether the relation is one-to-many.
+        """
+        target = TableObjectMeta.get_table_class(self.table_name)
+        owner_columns, target_columns = owner.get_columns(), target.get_columns()
+        
+        def references(column: Column, table_name: str) -> bool:
+            return column.referenced_table == table_name
+        
+        if self.column:
+            if self.column in owner_columns and references(owner_columns[self.column], target.table_name):
+                local_keys, remote_keys = [self.column], []
+            elif self.column in target_columns and references(target_columns[self.column], owner.table_name):
+                local_keys, remote_keys = [], [self.column]
+            else:
+                raise ValueError(f"{self.column} 컬럼은 {owner.table_name}와 {target.table_name} 사이의 외래 키가 아닙니다.")
+        else:
+            local_keys = [key for key in owner.get_schema().foreign_keys if references(owner_columns[key], target.table_name)]
+            remote_keys = [key for key in target.get_schema().foreign_keys if references(target_columns[key], owner.table_name)]
+        
+        if len(local_keys) == 1:
+            return target, local_keys[0], owner_columns[local_keys[0]].referenced_column or "id", False
+        if not local_keys and len(remote_keys) == 1:
+            return target, target_columns[remote_keys[0]].referenced_column or "id", remote_keys[0], True
+        raise ValueError(f"{owner.table_name}와 {target.table_name} 사이의 외래 키를 하나로 정할 수 없습니다. column을 지정해주세요.")
+
+class TableObjectMeta(ABCMeta):
+    """
+    The metaclass of TableObject, which generates `__slots__` from the columns of the classes declared with `slotted=True`.
+
+    ex)
+    ```
+    class Crew(TableObject, slotted=True):
+        __slots__ = ("_stats",) # private attributes, if any
+        id = Column(int, primary_key=True, auto_increment=True)
+        ...
+    ```
+
+    The values of a slotted class are stored in slots named `_col_<column>` instead of `__dict__`, and the Columns read and write those slots.
+    Instances have no `__dict__` only if every base class also defines `__slots__`, so private attributes must be listed in `__slots__`.
+    
+    The classes declaring their own `table_name` are registered, so that a Relation can find the class of a table by its name.
+    """
+    
+    # 테이블 이름 -> 그 테이블을 선언한 클래스
+    _table_classes: dict[str, type] = {}
+    
+    def __new__(mcs, name: str, bases: tuple[type, ...], namespace: dict[str, Any], slotted: bool = False, **kwargs):
+        if not slotted: return super().__new__(mcs, name, bases, namespace, **kwargs)
+        
+        # 상속받은 컬럼을 포함해, 아직 slot이 없는 컬럼마다 slot을 만듦
+        mro = [klass for base in bases for klass in base.__mro__]
+        columns: dict[str, Column] = {}
+        for klass in reversed(mro):
+            columns.update((key, value) for key, value in vars(klass).items() if isinstance(value, Column))
+        columns.update((key, value) for key, value in namespace.items() if isinstance(value, Column))
+        storage_names = [
+            f"{STORAGE_PREFIX}{key}" for key in columns
+            if not any(f"{STORAGE_PREFIX}{key}" in vars(klass) for klass in mro)
+        ]
+        namespace["__slots__"] = (*storage_names, *namespace.get("__slots__", ()))
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+    
+    def __init__(cls, name: str, bases: tuple[type, ...], namespace: dict[str, Any], slotted: bool = False, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        # 컬럼의 메타데이터는 클래스를 만들 때 한 번만 구하고, 이후에는 바꾸지 않음
+        cls._schema = TableSchema.from_class(cls)
+        # 행의 컬럼 순서 -> 행을 객체에 채우는 함수 (SELECT *의 컬럼 순서는 미리 만들어 둠)
+        cls._row_decoders = {}
+        cls._get_row_decoder(tuple(cls._schema.columns))
+        if namespace.get("table_name"): TableObjectMeta._table_classes[namespace["table_name"]] = cls
+    
+    @staticmethod
+    def get_table_class(table_name: str) -> type:
+        if table_name not in TableObjectMeta._table_classes:
+            raise ValueError(f"{table_name} 테이블을 선언한 클래스가 없습니다.")
+        return TableObjectMeta._table_classes[table_name]
+
+class TableObject(metaclass=TableObjectMeta):
     """
     Initialize the table object.
 
@@ -157,10 +361,11 @@ class TableObject(metaclass=ABCMeta):
     
     Private Attributes:
         `_database (DatabaseManager)`: The main database, which is the only database that the table object and its children can access.
+        `_synced (bool)`: Whether the object is the same as its row in the database, except for the changed columns.
     
     Properties:
         `kr_list (list[str])`: A list of Korean names of the attributes.
-        `__dict__ (dict[str, Any])`: A dictionary containing the values of all attributes defined in the __columns__ list.
+        `__dict__ (dict[str, Any])`: A dictionary containing the values of the columns. Slotted classes (`slotted=True`) have no `__dict__`.
         `table_name (str)`: The name of the table in the database.
         `column_set (set[str])`: A set of attribute names.
         `en_kr_dict (dict[str, str])`: A dictionary that maps the attribute names to their Korean names.
@@ -169,15 +374,27 @@ class TableObject(metaclass=ABCMeta):
         `database (DatabaseManager)`: The main database, which is the only database that the table object and its children can access.
     """
     
+    __slots__ = ("_database", "_synced", "_changed_columns")
+    
+    _schema: TableSchema
+    _row_decoders: dict[tuple[str, ...], Callable[["TableObject", Row], None]]
+    
     table_name: str = ""
+    # 여러 컬럼을 함께 조회하는 경우에 쓰는 복합 인덱스 (예: (("faction_id", "category"),))
+    composite_indexes: tuple[tuple[str, ...], ...] = ()
+    # prefetch로 한 번에 불러올 수 있는 관계 (이름 -> Relation)
+    relations: Mapping[str, Relation] = MappingProxyType({})
     id = Column(int, primary_key=True, auto_increment=True)
     
     def __init__(
         self
     ):  
+        self._changed_columns: set[str] | frozenset[str] = NO_CHANGES
         self.id = 0
         self._database: DatabaseManager | None = None
-        
+        # 데이터베이스의 행과 동기화된 상태인지 여부 (불러오거나 기록한 뒤에 True)
+        self._synced: bool = False
+    
     @property
     def database(self) -> DatabaseManager:
         return self._database
@@ -196,25 +413,88 @@ class TableObject(metaclass=ABCMeta):
     def _check_database(self):
         if self._database is None:
             raise Exception("Database is not set.")
+    
+    def get_changed_columns(self) -> list[str]:
+        """
+        Returns the names of the columns whose values changed since the object was loaded or pushed, in column order.
+
+        The primary key is not included.
+        """
+        changed: set[str] = getattr(self, "_changed_columns", NO_CHANGES)
+        if not changed: return []
+        return [key for key in self._schema.updatables if key in changed]
+    
+    def is_changed(self) -> bool:
+        """
+        Returns whether the object has to be written to the database.
+
+        Objects that are not loaded from (or pushed to) the database are always changed.
+        """
+        return not self._synced or bool(self.get_changed_columns())
+    
+    def mark_synced(self):
+        """
+        Marks the object as being the same as its row in the database, and forgets the changed columns.
+        """
+        # 동기화된 객체는 빈 frozenset을 공유하고, 컬럼이 바뀔 때 새 set을 만듦
+        self._changed_columns = NO_CHANGES
+        self._synced = True
+        return self
+    
+    def _get_sync_state(self) -> tuple[int, bool, set[str] | frozenset[str]]:
+        return self.id, self._synced, self._changed_columns
+    
+    def _mark_written(self, previous: tuple[int, bool, set[str] | frozenset[str]]):
+        """
+        Marks the object as synced after its row was written.
+
+        If the row was written inside a transaction, the sync state before the write (`previous`, from `_get_sync_state`) is restored when the transaction is rolled back,
+        so that the object is written again on the next push.
+        """
+        self.mark_synced()
+        transaction = self._database.current_transaction
+        if transaction is not None:
+            transaction.on_rollback(lambda: self._restore_sync_state(previous))
+    
+    def _restore_sync_state(self, previous: tuple[int, bool, set[str] | frozenset[str]]):
+        id, synced, changed_columns = previous
+        # 되돌린 뒤에 바뀐 컬럼도 함께 기록해 둠
+        changed_columns = set(changed_columns) | self._changed_columns
+        self.id = id
+        self._synced = synced
+        self._changed_columns = changed_columns or NO_CHANGES
+        
+    @classmethod
+    def _get_row_decoder(cls, keys: tuple[str, ...]) -> Callable[["TableObject", Row], None]:
+        """
+        Returns the function that sets the attributes of a table object from a row whose columns are `keys`.
+
+        The function is compiled once for each column order: the column indexes and converters are resolved in advance,
+        and the values are stored without the type check and the change tracking of Column. Columns that the class does not have are ignored.
+        """
+        decoder = cls._row_decoders.get(keys)
+        if decoder is not None: return decoder
+        
+        columns, converters = cls._schema.columns, cls._schema.converters
+        plan = tuple(
+            (index, columns[key].storage_name, *converters[key])
+            for index, key in enumerate(keys) if key in converters
+        )
+        def decoder(table_object: "TableObject", row: Row):
+            for index, storage_name, convert, additive in plan:
+                value = row[index]
+                if convert is not None: value = convert(value)
+                if additive: value = getattr(table_object, storage_name) + value
+                setattr(table_object, storage_name, value)
+        
+        cls._row_decoders[keys] = decoder
+        return decoder
         
     def _set_attributes_from_sqlite_row(self, row:Row):
         """
-        Sets the attributes of the table object from the sqlite3.Row object.
+        Sets the attributes of the table object from the sqlite3.Row object, using the compiled row decoder of the class.
         """
-
-        for key in row.keys():
-            
-            _get = getattr(self.__class__, key, None)
-            if not isinstance(_get, Column): continue
-            
-            if _get.annotation.__module__ == "builtins":
-                match _get.annotation.__name__:
-                    case "str" | "int" | "float": setattr(self, key, row[key])
-                    case "bool": setattr(self, key, bool(row[key]))
-                    case "NoneType": setattr(self, key, None)
-            elif _get.annotation is ExtInt: setattr(self, key, getattr(self, key) + row[key])
-            elif issubclass(_get.annotation, IntEnum): setattr(self, key, get_intenum(_get.annotation.__name__, row[key]))
-            else: raise ValueError(f"Type {_get.annotation} is not supported in Arislena's SQL.")
+        self._get_row_decoder(tuple(row.keys()))(self, row)
     
     @classmethod
     def fetch_or_raise(cls, database:DatabaseManager, _raise: Exception, *raw_statements, **statements):
@@ -256,7 +536,7 @@ class TableObject(metaclass=ABCMeta):
         if sqlite_row is not None:
             new_cls = cls()
             new_cls._set_attributes_from_sqlite_row(sqlite_row)
-            return new_cls
+            return new_cls.mark_synced()
         else:
             return cls(**kwargs)
     
@@ -265,29 +545,113 @@ class TableObject(metaclass=ABCMeta):
         """
         Creates a list of table objects from the database, using the sqlite3.Row object.
         """
-        return iter(cls.from_data(row).set_database(database) for row in sqlite_rows)
+        decoder = None
+        for row in sqlite_rows:
+            # 같은 쿼리의 행은 컬럼 순서가 같으므로, 첫 행에서 구한 decoder를 계속 사용함
+            if decoder is None: decoder = cls._get_row_decoder(tuple(row.keys()))
+            new_obj = cls()
+            decoder(new_obj, row)
+            yield new_obj.mark_synced().set_database(database)
         
     @classmethod
     def from_database_to_iter(cls, database:DatabaseManager, *raw_statements, **statements):
         """
-        Creates a list of table objects from the database.
+        Creates table objects from the database, fetching the rows in chunks while iterating (see `DatabaseManager.iter_many`).
         """
-        rows = database.fetch_many(cls.table_name, *raw_statements, **statements)
+        rows = database.iter_many(cls.table_name, *raw_statements, **statements)
         return cls.from_data_iter(rows, database)
+    
+    @classmethod
+    def prefetch(
+        cls,
+        database: DatabaseManager,
+        table_objects: Iterable[Self],
+        *paths: str,
+        register: Callable[[type, "TableObject"], "TableObject"] | None = None
+    ) -> list[Self]:
+        """
+        Loads the relations of many table objects at once, with one `IN (...)` query per relation (see `Relation`).
+
+        Args:
+            `paths (str)`: The names of the relations in `relations`. Nested relations are joined with dots, such as `"crews.experience"`.
+            `register (Callable, optional)`: Called with the class and each loaded object, and its return value is used instead of the object
+                (`Session._register`, to keep one object per row).
+        
+        Returns:
+            list[TableObject]: The table objects.
+        
+        ex)
+        ```
+        crews = list(Crew.from_database_to_iter(database, faction_id=faction.id))
+        Crew.prefetch(database, crews, "stats", "description", "experience")
+        ```
+        """
+        table_objects = list(table_objects)
+        # 첫 관계 이름 -> 그 관계로 불러온 객체에서 이어서 불러올 경로
+        nested: dict[str, list[str]] = {}
+        for path in paths:
+            name, _, rest = path.partition(".")
+            nested.setdefault(name, [])
+            if rest: nested[name].append(rest)
+        
+        for name, rest in nested.items():
+            if name not in cls.relations:
+                raise ValueError(f"{cls.__name__}에는 {name} 관계가 없습니다.")
+            target, related = cls._load_relation(database, table_objects, cls.relations[name], register)
+            if rest: target.prefetch(database, related, *rest, register=register)
+        return table_objects
+    
+    @classmethod
+    def _load_relation(
+        cls,
+        database: DatabaseManager,
+        table_objects: list["TableObject"],
+        relation: Relation,
+        register: Callable[[type, "TableObject"], "TableObject"] | None
+    ) -> "tuple[type[TableObject], list[TableObject]]":
+        """
+        Loads one relation of the table objects and stores it in `relation.attribute`, returning the related class and the loaded objects.
+        """
+        target, local, remote, to_many = relation.resolve(cls)
+        values = [value for table_object in table_objects if (value := getattr(table_object, local)) is not None]
+        related = list(target.from_data_iter(database.fetch_in(target.table_name, remote, values), database)) if values else []
+        if register is not None: related = [register(target, table_object) for table_object in related]
+        
+        groups: dict[Any, list[TableObject]] = {}
+        for table_object in related:
+            groups.setdefault(getattr(table_object, remote), []).append(table_object)
+        
+        for table_object in table_objects:
+            matches = groups.get(getattr(table_object, local), [])
+            if not to_many or not relation.many:
+                value = matches[0] if matches else None
+            elif relation.key:
+                value = {getattr(match, relation.key): match for match in matches}
+            else:
+                value = list(matches)
+            setattr(table_object, relation.attribute, value)
+        return target, related
             
     @classmethod
-    def get_columns(cls) -> dict[str, Column]:
+    def get_schema(cls) -> TableSchema:
         """
-        Returns the dictionary of the columns.
+        Returns the cached column metadata of the class.
         """
-        return {k: v for k, v in cls.__dict__.items() if isinstance(v, Column)}
+        return cls._schema
     
     @classmethod
-    def get_showables(cls) -> list[str]:
+    def get_columns(cls) -> Mapping[str, Column]:
         """
-        Returns the list of the attributes that are shown in the front-end.
+        Returns the read-only mapping of the columns, including the inherited ones, in declaration order.
         """
-        return [k for k, v in cls.__dict__.items() if isinstance(v, Column) and v.show_front]
+        return cls._schema.columns
+    
+    @classmethod
+    def get_showables(cls) -> tuple[str, ...]:
+        """
+        Returns the names of the attributes that are shown in the front-end.
+        """
+        return cls._schema.showables
     
     @classmethod
     def get_create_table_query(cls) -> str:
@@ -297,53 +661,80 @@ class TableObject(metaclass=ABCMeta):
         Returns:
             str: The SQL string for creating the table.
         """
-        sub_queries: list[str] = []
-        foreign_keys: list[Column] = []
-
-        for v in cls.get_columns().values():
-            sub_queries.append(v.creator)
-            if v.referenced_table: foreign_keys.append(v)
-        
-        if foreign_keys:
-            for foreign_key in foreign_keys:
-                sub_queries.append(foreign_key.foreign_key_creator)
+        columns = cls._schema.columns
+        sub_queries: list[str] = [column.creator for column in columns.values()]
+        sub_queries.extend(columns[key].foreign_key_creator for key in cls._schema.foreign_keys)
 
         return f"CREATE TABLE IF NOT EXISTS {cls.table_name} ({', '.join(sub_queries)})"
     
-    def get_insert_information(self) -> dict[str, str]:
+    @classmethod
+    def get_indexes(cls) -> dict[str, tuple[str, ...]]:
+        """
+        Returns the indexes of the table, which maps the index names to their columns.
+
+        Composite indexes come from `composite_indexes`, and single-column indexes come from the columns with `index=True`.
+        A single-column index is omitted if a composite index already starts with that column.
+        """
+        indexes: dict[str, tuple[str, ...]] = {}
+        for columns in cls.composite_indexes:
+            indexes[f"{INDEX_PREFIX}{cls.table_name}_{'_'.join(columns)}"] = tuple(columns)
+        
+        leading_columns = {columns[0] for columns in indexes.values()}
+        for key, column in cls.get_columns().items():
+            if not column.index or column.primary_key or key in leading_columns: continue
+            indexes[f"{INDEX_PREFIX}{cls.table_name}_{key}"] = (key,)
+        return indexes
+    
+    @classmethod
+    def get_create_index_queries(cls) -> dict[str, str]:
+        """
+        Returns the strings for index creation in SQL, keyed by the index names.
+        """
+        return {
+            name: f"CREATE INDEX IF NOT EXISTS {name} ON {cls.table_name} ({', '.join(columns)})"
+            for name, columns in cls.get_indexes().items()
+        }
+    
+    def get_insert_information(self) -> dict[str, list]:
         """
-        Returns the string for inserting the table in SQL.
+        Returns the column names and the values for inserting the table in SQL.
+
+        The values are bound to `?` placeholders by DatabaseManager.insert, so they are not converted to SQL literals.
 
         Returns:
-            str: The SQL string for inserting the table.
+            dict[str, list]: `keys_iter` and `values_iter`, which can be passed to DatabaseManager.insert as keyword arguments.
         """
         target_columns = []
         values = []
-        for key, column in self.get_columns().items():
-            if column.auto_increment: continue
-            if column.primary_key: continue
-            if isinstance(getattr(self, column.name), AbsentValue): continue
+        for key in self._schema.insertables:
+            value = getattr(self, key)
+            if isinstance(value, AbsentValue): continue
             target_columns.append(key)
-            values.append(sql_value(getattr(self, column.name)))
-        if not target_columns: return f"INSERT INTO {self.table_name} DEFAULT VALUES"
+            values.append(value)
         return {
-            "keys_iter": ", ".join(target_columns),
-            "values_iter": ", ".join(values)
+            "keys_iter": target_columns,
+            "values_iter": values
         }
     
-    def get_update_query(self) -> str:
+    def get_update_query(self, changed_only: bool = False) -> tuple[str, list]:
         """
-        Returns the string for updating the table in SQL.
+        Returns the parameterized string for updating the table in SQL, and its parameters.
+
+        Args:
+            changed_only (bool, optional): If True, only the columns returned by get_changed_columns are updated. Defaults to False.
 
         Returns:
-            str: The SQL string for updating the table.
+            tuple[str, list]: The SQL string with `?` placeholders, and the values to bind.
         """
-        sub_queries = []
-        for key, column in self.get_columns().items():
-            if column.primary_key: continue
-            if isinstance(getattr(self, column.name), AbsentValue): continue
-            sub_queries.append(f"{key} = {sql_value(getattr(self, column.name))}")
-        return f"UPDATE {self.table_name} SET {', '.join(sub_queries)} WHERE id = {self.id}"
+        target_columns = []
+        values = []
+        for key in (self.get_changed_columns() if changed_only else self._schema.updatables):
+            value = getattr(self, key)
+            if isinstance(value, AbsentValue): continue
+            target_columns.append(key)
+            values.append(sql_parameter(value))
+        sql = compile_sql(UPDATE, self.table_name, tuple(target_columns), ("id",))
+        return sql, values + [self.id]
 
     @classmethod
     def get_column_type(cls, column_name: str) -> str:
@@ -361,23 +752,21 @@ class TableObject(metaclass=ABCMeta):
 
         """
 
-        _get = getattr(cls, column_name, None)
-        if isinstance(_get, Column):
-            return _get.sql_type
-        else:
+        if column_name not in cls._schema.sql_types:
             raise ValueError(f"Column {column_name} is not found.")
+        return cls._schema.sql_types[column_name]
 
     def get_dict(self) -> dict[str, Any]:
         """
-        self.__dict__를 호출하나 _로 시작하는 attribute는 제외
+        컬럼의 값을 컬럼 순서대로 반환 (slotted 클래스도 같은 결과를 반환함)
         """
-        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        return {k: column.load(self) for k, column in self.get_columns().items()}
 
     def get_dict_without_id(self) -> dict[str, Any]:
         """
-        self.__dict__를 호출하나 _로 시작하는 attribute와 id는 제외
+        컬럼의 값을 컬럼 순서대로 반환하나 id는 제외
         """
-        return {k: v for k, v in self.__dict__.items() if not k.startswith("_") and k != "id"}
+        return {k: column.load(self) for k, column in self.get_columns().items() if k != "id"}
     
     def get_wildcard_string(self) -> str:
         """
@@ -415,6 +804,7 @@ class TableObject(metaclass=ABCMeta):
         
         if row:
             self._set_attributes_from_sqlite_row(row)
+            self.mark_synced()
         else:
             for k, v in statements.items():
                 setattr(self, k, v)
@@ -423,24 +813,76 @@ class TableObject(metaclass=ABCMeta):
         """
         Pushes the data to the table which has the same name as the object's class name.
 
-        If the data does not exist, it will insert the data.
+        If the object has no id yet (id == 0), it will insert the data and set the new id to the object.
+
+        If the object was loaded from (or already pushed to) the database, only the changed columns are updated, and nothing is written when no column changed.
 
-        If the data exists, it will update the data.
+        Otherwise, it will insert or update the data with a single `INSERT ... ON CONFLICT(id) DO UPDATE` statement.
 
         Raises:
             Exception: If the database is not set.
         """
         self._check_database()
-        if self._database.is_exist(self.table_name, f"id = {self.id}"):
-            self._database.update_with_id(self.table_name, self.id, **self.get_dict_without_id())
+        previous = self._get_sync_state()
+        if not self.id:
+            info = self.get_insert_information()
+            self._database.insert(self.table_name, **info)
+            self.id = self._database.cursor.lastrowid
+        elif not self._synced:
+            info = self.get_insert_information()
+            self._database.upsert(self.table_name, ["id"] + info["keys_iter"], [self.id] + info["values_iter"])
+        elif self.is_changed():
+            self._database.cursor.execute(*self.get_update_query(changed_only=True))
         else:
-            data = self.get_dict_without_id()
-            self._database.insert(self.table_name, **self.get_insert_information())
+            return
+        self._mark_written(previous)
+    
+    @classmethod
+    def push_many(cls, table_objects: Iterable["TableObject"]):
+        """
+        Pushes several table objects at once.
+
+        Objects that were loaded from the database are grouped by their database, table and changed columns, and each group is written with one executemany UPDATE.
+        Unchanged objects are skipped.
+        Other objects that already have an id are grouped in the same way by all of their columns, and each group is written with one executemany UPSERT.
+        Objects without an id are inserted one by one, so that their new ids can be set.
+        The objects are marked as synced only after all the groups are written.
+
+        Raises:
+            Exception: If the database of any object is not set.
+        """
+        updates: dict[tuple[DatabaseManager, str, tuple[str, ...]], list[list[Any]]] = {}
+        upserts: dict[tuple[DatabaseManager, str, tuple[str, ...]], list[list[Any]]] = {}
+        written: list[tuple[TableObject, tuple[int, bool, set[str] | frozenset[str]]]] = []
+        for table_object in table_objects:
+            table_object._check_database()
+            if not table_object.id:
+                table_object.push()
+                continue
+            if table_object._synced:
+                changed = table_object.get_changed_columns()
+                if not changed: continue
+                key = (table_object._database, table_object.table_name, tuple(changed))
+                updates.setdefault(key, []).append([getattr(table_object, k) for k in changed] + [table_object.id])
+            else:
+                info = table_object.get_insert_information()
+                key = (table_object._database, table_object.table_name, ("id", *info["keys_iter"]))
+                upserts.setdefault(key, []).append([table_object.id] + info["values_iter"])
+            written.append((table_object, table_object._get_sync_state()))
+        
+        for (database, table_name, keys), rows in updates.items():
+            database.update_many_with_id(table_name, keys, rows)
+        for (database, table_name, keys), rows in upserts.items():
+            database.upsert_many(table_name, keys, rows)
+        for table_object, previous in written:
+            table_object._mark_written(previous)
             
     def update(self, **kwargs):
         """
         Updates the data to the table which has the same name as the object's class name.
 
+        Only the changed columns are written; if nothing changed since the object was loaded, nothing is written.
+
         Args:
             kwargs (dict[str, Any]): The key-value pairs of the SQL statements.
 
@@ -448,8 +890,12 @@ class TableObject(metaclass=ABCMeta):
             Exception: If the database is not set.
         """
         self._check_database()
-        self.__setattr__(**kwargs)
-        self._database.cursor.execute(self.get_update_query())
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        if not self.is_changed(): return
+        previous = self._get_sync_state()
+        self._database.cursor.execute(*self.get_update_query(changed_only=self._synced))
+        self._mark_written(previous)
     
     def delete(self):
         """
@@ -500,6 +946,9 @@ class ConcreteObject(metaclass=ABCMeta):
 
 class HasCategoryAndAmount(metaclass=ABCMeta):
     
+    # slotted TableObject(Resource 등)가 __dict__ 없이 만들어지도록 빈 __slots__를 선언함
+    __slots__ = ()
+    
     def __init__(self, category:ResourceCategory, amount:int):
         self.category = category
         self.amount = amount
@@ -569,6 +1018,8 @@ class HasCategoryAndAmount(metaclass=ABCMeta):
 
 class ExperienceAbst(HasCategoryAndAmount, metaclass=ABCMeta):
     
+    __slots__ = ()
+    
     def __init__(self, category:ExperienceCategory, amount:int):
         super().__init__(category, amount)
 
@@ -2,11 +2,155 @@
 전투 관련
 """
 from typing import Iterator, ClassVar, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+import operator
+
+import numpy as np
 
 from py_base.ari_enum import Strategy
+from py_base.arislena_dice import Nonahedron, RollDistribution
 from py_system.tableobj import Faction
-from py_system.arislena_dice import Nonahedron
+
+# 전략을 쓰기 위해 소모하는 분야의 주사위 눈이 이 값 이상이어야 함
+STRATEGY_THRESHOLD = 7
+# 전략 -> (소모하는 분야, 증대하는 분야). 분야는 DicePackage의 순서(규모, 기동, 사기)의 인덱스
+STRATEGY_TRANSFERS: dict[Strategy, tuple[int, int]] = {
+    Strategy.SHOCK: (2, 1),
+    Strategy.FIREPOWER: (1, 0),
+    Strategy.FIERCENESS: (1, 2),
+    Strategy.DEFENSE: (0, 2),
+    Strategy.ENCIRCLEMENT: (0, 1),
+}
+# battle_odds의 기본 시행 횟수
+SIMULATION_TRIALS = 1_000_000
+
+def get_survival_rate(flee_roll: int | np.ndarray) -> float | np.ndarray:
+    """
+    도주 주사위 눈에 따른 병력의 생환율 (배열을 주면 원소마다 계산함)
+    """
+    return (35 + (flee_roll * 5)) / 100
+
+@dataclass(frozen=True)
+class BattleOutcome:
+    """
+    전투 인카운터의 결과별 확률 (win, loss는 앞쪽 DicePackage 기준)
+    """
+    win: float
+    draw: float
+    loss: float
+
+@lru_cache(maxsize=1024)
+def get_field_odds(a: RollDistribution, b: RollDistribution) -> tuple[float, float, float]:
+    """
+    분야 하나의 주사위 대결에서 a가 이길, 비길, 질 확률
+    """
+    joint = np.outer(a.roll_probs, b.roll_probs)
+    diff = np.subtract.outer(a.rolls, b.rolls)
+    return float(joint[diff > 0].sum()), float(joint[diff == 0].sum()), float(joint[diff < 0].sum())
+
+@lru_cache(maxsize=1024)
+def get_encounter_outcome(a: tuple[RollDistribution, ...], b: tuple[RollDistribution, ...]) -> BattleOutcome:
+    """
+    분야마다의 주사위 분포로 전투 인카운터의 결과별 확률을 계산함\n
+    두 분야 이상에서 이긴 쪽이 승리하며 (DicePackage.__gt__, __lt__), 그 외에는 무승부
+    """
+    # (이긴 분야의 수, 진 분야의 수) -> 확률
+    counts = {(0, 0): 1.0}
+    for field_a, field_b in zip(a, b):
+        win, draw, loss = get_field_odds(field_a, field_b)
+        convolved: dict[tuple[int, int], float] = {}
+        for (wins, losses), prob in counts.items():
+            for key, field_prob in (((wins + 1, losses), win), ((wins, losses), draw), ((wins, losses + 1), loss)):
+                convolved[key] = convolved.get(key, 0.0) + prob * field_prob
+        counts = convolved
+
+    win = sum(prob for (wins, _), prob in counts.items() if wins > 1)
+    loss = sum(prob for (_, losses), prob in counts.items() if losses > 1)
+    return BattleOutcome(win, 1 - win - loss, loss)
+
+@dataclass(frozen=True)
+class BattleOdds:
+    """
+    battle_odds의 결과 (win, draw, loss는 공격하는 세력 기준)
+    ---
+    a_survival : 공격하는 세력의 생환율 -> 확률 (지지 않은 경우의 생환율은 1.0)\n
+    p_survival : 공격당하는 세력의 생환율 -> 확률\n
+    trials : 시행 횟수\n
+    """
+    win: float
+    draw: float
+    loss: float
+    a_survival: dict[float, float] = field(default_factory=dict)
+    p_survival: dict[float, float] = field(default_factory=dict)
+    trials: int = 0
+
+    def get_expected_survival(self) -> tuple[float, float]:
+        """
+        (공격하는 세력, 공격당하는 세력)의 생환율의 기댓값
+        """
+        return (
+            sum(rate * prob for rate, prob in self.a_survival.items()),
+            sum(rate * prob for rate, prob in self.p_survival.items())
+        )
+
+def apply_strategy(rolls: np.ndarray, strategy: Strategy, amount: int, dice_min: int = 1, dice_max: int = 9) -> np.ndarray:
+    """
+    (규모, 기동, 사기) x 시행 꼴의 주사위 눈 배열에 전략을 적용한 배열을 반환함\n
+    소모하는 분야의 눈이 STRATEGY_THRESHOLD 미만인 시행에는 적용하지 않고, 옮긴 뒤의 눈은 주사위의 범위로 보정함
+    """
+    if strategy not in STRATEGY_TRANSFERS or amount == 0: return rolls
+    source, target = STRATEGY_TRANSFERS[strategy]
+    available = rolls[source] >= STRATEGY_THRESHOLD
+
+    rolls = rolls.copy()
+    rolls[source] = np.where(available, np.clip(rolls[source] - amount, dice_min, dice_max), rolls[source])
+    rolls[target] = np.where(available, np.clip(rolls[target] + amount, dice_min, dice_max), rolls[target])
+    return rolls
+
+def battle_odds(
+    a_dice_mods: tuple[int, int, int] = (0, 0, 0),
+    p_dice_mods: tuple[int, int, int] = (0, 0, 0),
+    strategy: Strategy = Strategy.PASS,
+    amount: int = 0,
+    trials: int = SIMULATION_TRIALS,
+    rng: np.random.Generator | None = None
+) -> BattleOdds:
+    """
+    (규모, 기동, 사기)의 주사위 보정값이 a_dice_mods, p_dice_mods인 두 세력의 전투 인카운터를 trials번 한꺼번에 시뮬레이션함\n
+    공격하는 세력은 전략을 쓸 수 있는 시행마다 strategy를 amount만큼 사용하고, 후퇴하면 패배한 것으로 간주함\n
+    진 쪽은 도주 주사위(1d9)를 굴려 생환율을 정함 (BattleField.get_flee_probablity)
+    ---
+    사용법:
+    ```
+    odds = battle_odds((1, 0, 0), (0, 0, 0), Strategy.SHOCK, 2)
+    odds.win, odds.draw, odds.loss, odds.a_survival
+    ```
+    """
+    a_rolls = np.stack([Nonahedron(mod).roll_many(trials, rng=rng).rolls for mod in a_dice_mods])
+    p_rolls = np.stack([Nonahedron(mod).roll_many(trials, rng=rng).rolls for mod in p_dice_mods])
+    a_rolls = apply_strategy(a_rolls, strategy, amount)
+
+    if strategy == Strategy.RETREAT:
+        a_win = np.zeros(trials, dtype=bool)
+        a_loss = np.ones(trials, dtype=bool)
+    else:
+        # 두 분야 이상에서 이긴 쪽이 승리함 (DicePackage.__gt__, __lt__)
+        a_win = (a_rolls > p_rolls).sum(axis=0) > 1
+        a_loss = (a_rolls < p_rolls).sum(axis=0) > 1
+
+    flee_rates = get_survival_rate(Nonahedron().roll_many(trials, rng=rng).rolls)
+    win, loss = float(a_win.mean()), float(a_loss.mean())
+    return BattleOdds(
+        win, 1 - win - loss, loss,
+        _get_rate_distribution(np.where(a_loss, flee_rates, 1.0)),
+        _get_rate_distribution(np.where(a_win, flee_rates, 1.0)),
+        trials
+    )
+
+def _get_rate_distribution(rates: np.ndarray) -> dict[float, float]:
+    values, counts = np.unique(rates, return_counts=True)
+    return {round(float(value), 2): float(count) / len(rates) for value, count in zip(values, counts)}
 
 @dataclass
 class DicePackage:
@@ -22,25 +166,31 @@ class DicePackage:
         return f"- 규모: {self.scale}\n- 기동: {self.mobility}\n- 사기: {self.morale}"
     
     def __iter__(self) -> Iterator[Nonahedron]:
-        return iter([self.scale, self.mobility, self.morale])
+        return iter((self.scale, self.mobility, self.morale))
+    
+    def _count_fields(self, other: "DicePackage", compare: Callable[[Nonahedron, Nonahedron], bool]) -> int:
+        """
+        compare가 참인 분야(규모, 기동, 사기)의 수 (두 분야 이상에서 이긴 쪽이 승리함; battle_odds의 벡터 계산과 같은 규칙)
+        """
+        return sum(compare(dice, other_dice) for dice, other_dice in zip(self, other))
     
     def __lt__(self, other: "DicePackage") -> bool:
-        return sum([dice < list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 1
+        return self._count_fields(other, operator.lt) > 1
     
     def __le__(self, other: "DicePackage") -> bool:
-        return sum([dice <= list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 1
+        return self._count_fields(other, operator.le) > 1
     
     def __gt__(self, other: "DicePackage") -> bool:
-        return sum([dice > list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 1
+        return self._count_fields(other, operator.gt) > 1
     
     def __ge__(self, other: "DicePackage") -> bool:
-        return sum([dice >= list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 1
+        return self._count_fields(other, operator.ge) > 1
     
     def __eq__(self, other: "DicePackage") -> bool:
-        return sum([dice == list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 0
+        return self._count_fields(other, operator.eq) > 0
     
     def __ne__(self, other: "DicePackage") -> bool:
-        return sum([dice != list(other.__iter__())[i] for i, dice in enumerate(self.__iter__())]) > 0
+        return self._count_fields(other, operator.ne) > 0
     
     def __post_init__(self):
         self.scale = Nonahedron() if self.scale is None else self.scale
@@ -52,6 +202,18 @@ class DicePackage:
     def roll(self):
         for mem in self.__iter__():
             mem.roll()
+    
+    def get_distributions(self) -> tuple[RollDistribution, ...]:
+        """
+        규모, 기동, 사기 주사위의 정확한 분포 (보정값 적용)
+        """
+        return tuple(dice.get_distribution() for dice in self.__iter__())
+    
+    def get_outcome_distribution(self, other: "DicePackage") -> BattleOutcome:
+        """
+        이 DicePackage와 other를 새로 굴렸을 때의 결과별 확률 (설정이 같으면 캐시됨)
+        """
+        return get_encounter_outcome(self.get_distributions(), other.get_distributions())
 
 @dataclass
 class BattleField:
@@ -84,7 +246,23 @@ class BattleField:
         생환율의 최소치는 40%, 최대치는 85%다.
         """
         if flee_dice.last_roll is None: raise ValueError("도주 주사위의 값이 None입니다.")
-        return (35 + (flee_dice.last_roll * 5)) / 100
+        return get_survival_rate(flee_dice.last_roll)
+    
+    def simulate(self, strategy: Strategy = Strategy.PASS, amount: int = 0, trials: int = SIMULATION_TRIALS) -> BattleOdds:
+        """
+        두 세력의 주사위 보정값으로 전투를 trials번 시뮬레이션한 결과별 확률과 생환율 분포 (battle_odds)
+        """
+        return battle_odds(
+            tuple(dice._dice_mod for dice in self.a_dice_pkg),
+            tuple(dice._dice_mod for dice in self.p_dice_pkg),
+            strategy, amount, trials
+        )
+    
+    def get_outcome_distribution(self) -> BattleOutcome:
+        """
+        공격하는 세력 기준으로, 전략을 쓰지 않고 주사위를 새로 굴렸을 때의 결과별 확률
+        """
+        return self.a_dice_pkg.get_outcome_distribution(self.p_dice_pkg)
     
     @property
     def winner(self):
@@ -102,11 +280,11 @@ class BattleField:
     def strategy_availablity_map(self) -> dict[Strategy, bool]:
         rtn = {
             Strategy.PASS: True,
-            Strategy.SHOCK: self.a_dice_pkg.morale.last_roll >= 7,
-            Strategy.FIREPOWER: self.a_dice_pkg.mobility.last_roll >= 7,
-            Strategy.FIERCENESS: self.a_dice_pkg.mobility.last_roll >= 7,
-            Strategy.DEFENSE: self.a_dice_pkg.scale.last_roll >= 7,
-            Strategy.ENCIRCLEMENT: self.a_dice_pkg.scale.last_roll >= 7,
+            Strategy.SHOCK: self.a_dice_pkg.morale.last_roll >= STRATEGY_THRESHOLD,
+            Strategy.FIREPOWER: self.a_dice_pkg.mobility.last_roll >= STRATEGY_THRESHOLD,
+            Strategy.FIERCENESS: self.a_dice_pkg.mobility.last_roll >= STRATEGY_THRESHOLD,
+            Strategy.DEFENSE: self.a_dice_pkg.scale.last_roll >= STRATEGY_THRESHOLD,
+            Strategy.ENCIRCLEMENT: self.a_dice_pkg.scale.last_roll >= STRATEGY_THRESHOLD,
             Strategy.RETREAT: True
         }
         return rtn
@@ -152,40 +330,42 @@ class BattleField:
         
         return self.strategy_availablity_map[strategy]
 
+    def _transfer(self, source: Nonahedron, target: Nonahedron, amount: int):
+        """
+        source의 주사위 눈을 amount만큼 소모해 target의 주사위 눈을 증대함 (주사위의 범위로 보정됨)
+        """
+        target.set_last_roll(target.last_roll + amount)
+        source.set_last_roll(source.last_roll - amount)
+
     def execute_strategy_shock(self, amount: int):
         """
         전략: 충격
         """
-        self.a_dice_pkg.mobility.last_roll += amount
-        self.a_dice_pkg.morale.last_roll -= amount
+        self._transfer(self.a_dice_pkg.morale, self.a_dice_pkg.mobility, amount)
         
     def execute_strategy_firepower(self, amount: int):
         """
         전략: 화공
         """
-        self.a_dice_pkg.scale.last_roll += amount
-        self.a_dice_pkg.mobility.last_roll -= amount
+        self._transfer(self.a_dice_pkg.mobility, self.a_dice_pkg.scale, amount)
         
     def execute_strategy_fierceness(self, amount: int):
         """
         전략: 맹공
         """
-        self.a_dice_pkg.morale.last_roll += amount
-        self.a_dice_pkg.mobility.last_roll -= amount
+        self._transfer(self.a_dice_pkg.mobility, self.a_dice_pkg.morale, amount)
         
     def execute_strategy_defense(self, amount: int):
         """
         전략: 방비
         """
-        self.a_dice_pkg.morale.last_roll += amount
-        self.a_dice_pkg.scale.last_roll -= amount
+        self._transfer(self.a_dice_pkg.scale, self.a_dice_pkg.morale, amount)
         
     def execute_strategy_encirclement(self, amount: int):
         """
         전략: 포위
         """
-        self.a_dice_pkg.mobility.last_roll += amount
-        self.a_dice_pkg.scale.last_roll -= amount
+        self._transfer(self.a_dice_pkg.scale, self.a_dice_pkg.mobility, amount)
     
     def execute_strategy_retreat(self, amount: int):
         """
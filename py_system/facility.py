@@ -149,7 +149,7 @@ class ConcreteFacility(ConcreteObject, Facility, metaclass=ABCMeta):
             )
             return
         self._database.connection.execute(
-            f"DELETE FROM Deployment WHERE worker_id = {worker.id}"
+            "DELETE FROM Deployment WHERE worker_id = ?", (worker.id,)
         )
         deployment = Deployment(worker_id=worker.id, territory_id=self.territory_id, facility_id=self.id)
         deployment.set_database(self._database)
@@ -202,20 +202,23 @@ class ConcreteFacility(ConcreteObject, Facility, metaclass=ABCMeta):
 
         ! database가 필요함
         """
+        if self._deployments is not None: return iter(self._deployments)
         self._check_database()
         deploy_datas = self._database.cursor.execute("SELECT * FROM deployment WHERE facility_id = ?", (self.id,)).fetchall()
         return Deployment.from_data_iter(deploy_datas, self._database)
 
     def get_deployed_workers(self, deployment_list: list["Deployment"] | None = None) -> list[Crew]:
         """
-        시설에 배치된 인원을 가져옴
+        시설에 배치된 인원을 가져옴 (배치마다 조회하지 않고, 한 번의 쿼리로 불러옴)
 
         ! database가 필요함
         """
         self._check_database()
         if deployment_list is None:
             deployment_list = self.get_deployments()
-        return [deployment.get_worker() for deployment in deployment_list if deployment.worker_id is not None]
+        deployment_list = [deployment for deployment in deployment_list if deployment.worker_id is not None]
+        Deployment.prefetch(self._database, deployment_list, "worker")
+        return [deployment.get_worker() for deployment in deployment_list]
 
 class Headquarter(ConcreteFacility):
     
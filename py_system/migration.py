@@ -0,0 +1,284 @@
+"""
+데이터베이스 스키마 마이그레이션 엔진
+
+코드(TableObject)의 스키마에서 해시를 만들어 데이터베이스에 저장해 두고, 부팅할 때는 해시만 비교함
+스키마가 바뀐 경우에만 백업 후 하나의 트랜잭션 안에서 순서대로 마이그레이션을 적용하고, 테이블을 코드의 스키마에 맞게 재구성함
+"""
+import hashlib, re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from py_base.ari_logger import ari_logger
+from py_base.dbbackup import BackupPolicy
+from py_base.dbmanager import DatabaseManager
+from py_base.utility import BACKUP_DIR, sql_value
+from py_system.abstract import TableObject
+from py_system import tableobj # TableObject를 상속하는 클래스를 모두 등록하기 위해 불러옴
+
+# 스키마 버전과 해시를 저장하는 테이블 (TableObject가 아니므로 테이블 정리 대상에서 제외됨)
+SCHEMA_TABLE = "__SchemaInfo__"
+# 마이그레이션 직전 백업을 저장하는 곳과 보존 정책 (턴 종료 백업과 섞이지 않도록 따로 둠)
+MIGRATION_BACKUP_DIR = BACKUP_DIR / "migration"
+MIGRATION_BACKUP_POLICY = BackupPolicy(keep_last=5, keep_daily=0, keep_weekly=0, compress=True)
+
+@dataclass
+class Migration:
+    """
+    version : 마이그레이션 버전 (1부터 시작하며, 순서대로 적용됨)
+    description : 로그에 남길 설명
+    apply : 코드에 새로 생긴 테이블과 컬럼이 추가된 뒤, 컬럼이 삭제되고 테이블이 코드의 스키마로 재구성되기 전에 실행되는 함수
+    (새 컬럼을 옛 컬럼의 데이터로 채울 수 있으며, 트랜잭션 안에서 실행되므로 commit하면 안 됨)
+    drop_columns : 테이블 이름 -> 이 마이그레이션에서 삭제해도 되는 컬럼 (여기에 없는 컬럼은 코드에서 사라져도 삭제하지 않음)
+    """
+    version: int
+    description: str
+    apply: Callable[[DatabaseManager], None]
+    drop_columns: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+MIGRATIONS: list[Migration] = []
+
+def migration(version: int, description: str, drop_columns: dict[str, tuple[str, ...]] | None = None):
+    """
+    마이그레이션 함수를 등록하는 데코레이터
+
+    코드에서 사라진 컬럼의 데이터는, 마이그레이션의 drop_columns에 적어야만 삭제됨
+    코드에 새로 생긴 컬럼은 마이그레이션 함수가 실행되기 전에 추가되어 있으므로, 옛 컬럼의 데이터로 채울 수 있음
+
+    ex)
+    ```
+    @migration(1, "Crew.labor를 Crew.efficiency로 옮김", drop_columns={"Crew": ("labor",)})
+    def _(database: DatabaseManager):
+        database.cursor.execute("UPDATE Crew SET efficiency = labor")
+    ```
+    """
+    def decorator(func: Callable[[DatabaseManager], None]):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"마이그레이션 버전 {version}이(가) 이미 등록되어 있습니다.")
+        MIGRATIONS.append(Migration(version, description, func, dict(drop_columns or {})))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+def get_latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+def get_table_classes() -> list[type[TableObject]]:
+    """
+    테이블을 가지는 TableObject 하위 클래스를 테이블 이름 순서로 반환함
+    """
+    return sorted(
+        (subclass_type for subclass_type in TableObject.__subclasses__() if subclass_type.table_name),
+        key=lambda subclass_type: subclass_type.table_name
+    )
+
+def get_schema_hash(foreign_keys: bool = False) -> str:
+    """
+    코드의 테이블, 인덱스 정의와 최신 마이그레이션 버전으로 만든 해시
+
+    foreign_keys(외래 키 제약 조건을 켠 연결인지)도 해시에 넣어, 제약 조건을 처음 켠 부팅에서 migrate가 외래 키 위반을 검사하도록 함
+    """
+    h = hashlib.sha256(str(get_latest_version()).encode())
+    if foreign_keys: h.update(b"foreign_keys")
+    for subclass_type in get_table_classes():
+        h.update(subclass_type.get_create_table_query().encode())
+        for index_query in sorted(subclass_type.get_create_index_queries().values()):
+            h.update(index_query.encode())
+    return h.hexdigest()
+
+def get_stored_schema(database: DatabaseManager) -> tuple[int, str]:
+    """
+    데이터베이스에 저장된 (버전, 해시)를 반환함 (저장된 적이 없으면 (0, ""))
+    """
+    database.cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (id INTEGER PRIMARY KEY, version INTEGER NOT NULL, schema_hash TEXT NOT NULL)"
+    )
+    row = database.cursor.execute(f"SELECT version, schema_hash FROM {SCHEMA_TABLE} WHERE id = 1").fetchone()
+    if row is None: return 0, ""
+    return row["version"], row["schema_hash"]
+
+# "Crew", `Crew`, [Crew] 꼴로 감싼 식별자
+_QUOTED_IDENTIFIER_PATTERN = re.compile(r'"(\w+)"|`(\w+)`|\[(\w+)\]')
+
+def _normalize_sql(sql: str) -> str:
+    """
+    저장된 CREATE TABLE 문과 코드의 CREATE TABLE 문을 비교할 수 있게 만듦
+
+    ALTER TABLE ... RENAME TO로 이름을 바꾼 테이블은 sqlite가 CREATE TABLE "이름" (...)처럼 식별자를 따옴표로 감싸 저장하므로, 따옴표를 없앰
+    """
+    sql = _QUOTED_IDENTIFIER_PATTERN.sub(lambda match: next(group for group in match.groups() if group), sql)
+    return " ".join(sql.replace("CREATE TABLE IF NOT EXISTS", "CREATE TABLE").split())
+
+def add_missing_columns(database: DatabaseManager):
+    """
+    코드에 있지만 데이터베이스에 없는 테이블과 컬럼을 추가함 (트랜잭션 안에서 호출해야 함)
+
+    컬럼은 타입과 기본값만으로 추가되며, NOT NULL, UNIQUE 같은 나머지 정의는 이후 reconcile_tables의 재구성에서 적용됨
+    """
+    for subclass_type in get_table_classes():
+        table_name = subclass_type.table_name
+        db_columns = database.get_table_column_set(table_name)
+        if not db_columns:
+            database.cursor.execute(subclass_type.get_create_table_query())
+            ari_logger.info(f"{table_name} 테이블이 생성되었습니다.")
+            continue
+        for column_name, column in subclass_type.get_columns().items():
+            if column_name in db_columns: continue
+            definition = f"{column_name} {column.sql_type}"
+            if column.default is not None: definition += f" DEFAULT {sql_value(column.default)}"
+            database.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {definition}")
+            ari_logger.info(f"{table_name} 테이블에 {column_name} 컬럼이 추가되었습니다.")
+
+def rebuild_table(database: DatabaseManager, subclass_type: type[TableObject], drop_columns: tuple[str, ...] = ()):
+    """
+    테이블을 코드의 스키마로 다시 만들고, 코드와 데이터베이스에 모두 있는 컬럼의 데이터를 옮김
+
+    SQLite는 컬럼 삭제와 컬럼 정의 변경을 지원하지 않으므로, manual/table_control.py처럼 새 테이블을 만들어 데이터를 복사한 뒤 이름을 바꿈
+    트랜잭션 안에서 호출해야 하며, 외래 키 제약 조건은 호출한 쪽에서 꺼 두어야 함
+
+    코드에 없는 컬럼은 drop_columns에 있을 때만 삭제하고, 그렇지 않으면 데이터를 지우지 않도록 ValueError를 발생시킴
+    """
+    table_name = subclass_type.table_name
+    temp_table_name = f"{table_name}__migrating"
+
+    db_columns = database.get_table_column_set(table_name)
+    if undeclared := sorted(db_columns - set(subclass_type.get_columns().keys()) - set(drop_columns)):
+        raise ValueError(
+            f"{table_name} 테이블의 {', '.join(undeclared)} 컬럼이 코드에 존재하지 않습니다. "
+            "데이터를 삭제하려면 마이그레이션의 drop_columns에 적어야 합니다."
+        )
+    common_columns = ", ".join(k for k in subclass_type.get_columns().keys() if k in db_columns)
+
+    create_query = subclass_type.get_create_table_query().replace(
+        f"CREATE TABLE IF NOT EXISTS {table_name} (", f"CREATE TABLE {temp_table_name} (", 1
+    )
+    database.cursor.execute(create_query)
+    if common_columns:
+        database.cursor.execute(f"INSERT INTO {temp_table_name} ({common_columns}) SELECT {common_columns} FROM {table_name}")
+    database.cursor.execute(f"DROP TABLE {table_name}")
+    database.cursor.execute(f"ALTER TABLE {temp_table_name} RENAME TO {table_name}")
+
+    for column_name in (db_columns - set(subclass_type.get_columns().keys())):
+        ari_logger.warning(f"{table_name} 테이블의 {column_name} 컬럼이 마이그레이션에 따라 삭제되었습니다.")
+
+def reconcile_tables(database: DatabaseManager, drop_columns: dict[str, set[str]] | None = None):
+    """
+    데이터베이스의 테이블과 인덱스를 코드의 스키마와 같게 만듦 (트랜잭션 안에서 호출해야 함)
+
+    1. 없는 테이블은 생성하고, 정의가 다른 테이블은 rebuild_table로 재구성함 (drop_columns: 테이블 이름 -> 삭제해도 되는 컬럼)
+    2. 선언된 인덱스를 생성하고, 더 이상 선언되지 않은 인덱스를 삭제함
+    3. 코드에 존재하지 않는 테이블을 삭제함
+    """
+    stored_sql: dict[str, str] = {
+        row["name"]: row["sql"] for row in
+        database.cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table'").fetchall()
+    }
+
+    for subclass_type in get_table_classes():
+        table_name = subclass_type.table_name
+        create_query = subclass_type.get_create_table_query()
+
+        if table_name not in stored_sql:
+            database.cursor.execute(create_query)
+            ari_logger.info(f"{table_name} 테이블이 생성되었습니다.")
+        elif _normalize_sql(stored_sql[table_name]) != _normalize_sql(create_query):
+            rebuild_table(database, subclass_type, tuple((drop_columns or {}).get(table_name, ())))
+            ari_logger.info(f"{table_name} 테이블이 코드의 스키마로 재구성되었습니다.")
+
+        # 코드에 선언된 인덱스를 생성하고, 더 이상 선언되지 않은 인덱스를 삭제함
+        index_queries = subclass_type.get_create_index_queries()
+        db_indexes = database.get_index_names(table_name)
+        for index_name in (index_queries.keys() - db_indexes):
+            database.cursor.execute(index_queries[index_name])
+            ari_logger.info(f"{table_name} 테이블에 {index_name} 인덱스가 생성되었습니다.")
+        for index_name in (db_indexes - index_queries.keys()):
+            database.cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+            ari_logger.info(f"{table_name} 테이블의 {index_name} 인덱스가 삭제되었습니다.")
+
+    # 데이터베이스에 존재하지 않는 테이블을 삭제함
+    tableobj_tables: set[str] = {subclass_type.table_name for subclass_type in get_table_classes()}
+    for table in (database.get_all_table_names() - tableobj_tables - {SCHEMA_TABLE}):
+        database.cursor.execute(f"DROP TABLE {table}")
+        ari_logger.info(f"{table} 테이블이 삭제되었습니다.")
+
+def report_foreign_key_violations(database: DatabaseManager):
+    """
+    외래 키를 지키지 않는 행을 테이블마다 로그로 남김
+
+    연결에 외래 키 제약 조건이 켜져 있으면(profile.foreign_keys) 위반이 있을 때 ValueError를 발생시켜 마이그레이션을 되돌림
+    """
+    violations = database.check_foreign_keys()
+    for (table_name, parent), rowids in violations.items():
+        ari_logger.warning(
+            f"[FK]\t{table_name} 테이블의 {len(rowids)}개 행이 {parent} 테이블의 없는 행을 참조합니다. "
+            f"(rowid: {', '.join(map(str, rowids[:10]))}{' ...' if len(rowids) > 10 else ''})"
+        )
+    if not violations:
+        ari_logger.info(f"{database.stem} 데이터베이스에 외래 키 위반이 없습니다.")
+    elif database.profile.foreign_keys:
+        raise ValueError(f"외래 키 위반이 있어 마이그레이션을 적용할 수 없습니다: {sorted(violations)}")
+
+def migrate(
+    database: DatabaseManager, 
+    backup_directory: Path = MIGRATION_BACKUP_DIR, 
+    backup_policy: BackupPolicy = MIGRATION_BACKUP_POLICY
+) -> bool:
+    """
+    데이터베이스의 스키마를 코드의 스키마로 맞춤
+
+    저장된 해시가 코드의 해시와 같으면 아무 작업도 하지 않음
+    다르면 backup_directory에 백업을 만든 뒤(backup_policy에 따라 오래된 백업은 삭제됨), 하나의 트랜잭션 안에서
+    1. add_missing_columns로 새 테이블과 컬럼을 추가하고
+    2. 아직 적용되지 않은 마이그레이션을 버전 순서대로 적용한 뒤
+    3. reconcile_tables로 drop_columns의 컬럼을 삭제하고 테이블을 재구성함
+    실패하면 트랜잭션 전체를 되돌림
+    연결에 외래 키 제약 조건이 켜져 있으면(ARISLENA_FOREIGN_KEYS=on), 외래 키 위반이 남아 있을 때 ValueError로 실패함
+
+    반환값: 마이그레이션을 실행했는지 여부
+    """
+    stored_version, stored_hash = get_stored_schema(database)
+    schema_hash = get_schema_hash(database.profile.foreign_keys)
+    if stored_hash == schema_hash:
+        return False
+
+    database.connection.commit()
+    database.backup(backup_directory, backup_policy)
+    ari_logger.info("데이터베이스 백업 완료")
+
+    # 외래 키 제약 조건은 트랜잭션 밖에서만 바꿀 수 있음
+    foreign_keys = database.cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+    database.cursor.execute("PRAGMA foreign_keys=OFF")
+
+    try:
+        database.cursor.execute("BEGIN")
+
+        add_missing_columns(database)
+
+        drop_columns: dict[str, set[str]] = {}
+        for m in MIGRATIONS:
+            if m.version <= stored_version: continue
+            m.apply(database)
+            for table_name, column_names in m.drop_columns.items():
+                drop_columns.setdefault(table_name, set()).update(column_names)
+            ari_logger.info(f"마이그레이션 {m.version} 적용: {m.description}")
+
+        reconcile_tables(database, drop_columns)
+        report_foreign_key_violations(database)
+
+        database.cursor.execute(
+            f"INSERT INTO {SCHEMA_TABLE} (id, version, schema_hash) VALUES (1, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET version = excluded.version, schema_hash = excluded.schema_hash",
+            (get_latest_version(), schema_hash)
+        )
+        database.connection.commit()
+
+        ari_logger.info(f"데이터베이스 마이그레이션 완료 (버전 {stored_version} -> {get_latest_version()})")
+        return True
+
+    except Exception as e:
+        database.connection.rollback()
+        ari_logger.error(f"데이터베이스 마이그레이션 실패: {e}; {e.__traceback__}")
+        raise e
+
+    finally:
+        database.cursor.execute(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
@@ -55,6 +55,12 @@ class ProductionResource(HasCategoryAndAmount):
 
         return GeneralResource(self.category, self.amount * (dice // self.dice_ratio))
 
+    def get_expected_amount(self, dice: Dice) -> float:
+        """
+        dice를 굴려 생산할 때 생산량의 기댓값 (주사위를 굴리지 않음)
+        """
+        return self.amount * dice.get_distribution().get_expectation_of(lambda rolls: rolls // self.dice_ratio)
+
     def __mul__(self, other: int | Dice) -> GeneralResource:
         dice: int = 0
         if isinstance(other, int):
@@ -0,0 +1,193 @@
+"""
+한 번의 상호작용(명령어, 턴 종료 등) 동안 불러온 TableObject를 (테이블, id)마다 하나씩만 유지하는 세션
+"""
+from contextlib import AbstractContextManager
+from typing import Iterable, TypeVar
+
+from py_base.dbmanager import DatabaseManager, Transaction
+from py_base.utility import sql_parameter
+from py_system.abstract import TableObject
+
+T = TypeVar("T", bound=TableObject)
+
+class Session:
+    """
+    DatabaseManager에 묶인 identity map
+
+    같은 행을 여러 번 찾으면 데이터베이스를 다시 조회하지 않고 처음 불러온 객체를 그대로 반환함
+    불러온 객체의 변경 사항은 flush()(또는 commit())할 때 TableObject.push_many로 한 번에 기록됨
+
+    사용법:
+    ```
+    with Session(database) as session:
+        crew = session.get(Crew, crew_id)
+        crew.hp += 1
+    # 예외 없이 끝나면 commit, 예외가 발생하면 rollback
+    ```
+
+    with 블록은 database.transaction()으로 묶이므로, 다른 transaction() 안에서 열면 savepoint가 됨
+    """
+
+    def __init__(self, database: DatabaseManager):
+        self.database = database
+
+        self._identity_map: dict[tuple[str, int], TableObject] = {}
+        # id가 아직 없는 새 객체 (flush할 때 insert됨)
+        self._new: list[TableObject] = []
+        # (테이블, 조건) -> 찾은 행의 id (없으면 None)
+        self._lookups: dict[tuple[str, tuple], int | None] = {}
+        # with 블록이 연 database.transaction()
+        self._scope: AbstractContextManager[Transaction] | None = None
+
+    def __enter__(self):
+        self._scope = self.database.transaction()
+        self._scope.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        scope, self._scope = self._scope, None
+        if exc_type is None:
+            try:
+                self.flush()
+            except BaseException as e:
+                self.clear()
+                scope.__exit__(type(e), e, e.__traceback__)
+                raise
+            return scope.__exit__(None, None, None)
+        # 되돌린 변경 사항을 들고 있는 객체는 버림
+        self.clear()
+        return scope.__exit__(exc_type, exc_value, traceback)
+
+    def __contains__(self, table_object: TableObject) -> bool:
+        return self._identity_map.get((table_object.table_name, table_object.id)) is table_object
+
+    def _register(self, cls: type[T], table_object: T) -> T:
+        """
+        identity map에 같은 행의 객체가 이미 있으면 그 객체를 반환하고, 없으면 table_object를 등록해 반환함
+        """
+        key = (cls.table_name, table_object.id)
+        if key in self._identity_map:
+            return self._identity_map[key]
+        table_object.set_database(self.database)
+        self._identity_map[key] = table_object
+        return table_object
+
+    def add(self, table_object: T) -> T:
+        """
+        세션이 관리할 객체로 등록함
+
+        id가 없는 객체는 flush할 때 insert되고, 이미 같은 행의 객체가 등록되어 있으면 그 객체를 반환함
+        """
+        table_object.set_database(self.database)
+        # 이 테이블에서 찾지 못했던 조건도 이제는 이 객체와 맞을 수 있음
+        self._forget_misses(table_object.table_name)
+        if not table_object.id:
+            if not any(new is table_object for new in self._new): self._new.append(table_object)
+            return table_object
+        return self._register(type(table_object), table_object)
+
+    def add_all(self, table_objects: Iterable[TableObject]):
+        for table_object in table_objects:
+            self.add(table_object)
+
+    def get(self, cls: type[T], id: int) -> T | None:
+        """
+        id로 객체를 가져옴 (이미 불러온 객체면 데이터베이스를 조회하지 않음)
+        """
+        if (cls.table_name, id) in self._identity_map:
+            return self._identity_map[(cls.table_name, id)]
+        row = self.database.fetch(cls.table_name, id=id)
+        if row is None: return None
+        return self._register(cls, cls.from_data(row))
+
+    def find(self, cls: type[T], **statements) -> T | None:
+        """
+        조건에 맞는 객체 하나를 가져옴
+
+        같은 조건으로 이미 찾은 적이 있고, 그 객체가 여전히 조건에 맞으면 데이터베이스를 조회하지 않음
+        아직 flush하지 않은 새 객체도 조건에 맞으면 반환함
+        """
+        for new in self._new:
+            if new.table_name == cls.table_name and all(getattr(new, k) == v for k, v in statements.items()):
+                return new
+        
+        lookup_key = (cls.table_name, tuple(sorted((k, sql_parameter(v)) for k, v in statements.items())))
+        if lookup_key in self._lookups:
+            found_id = self._lookups[lookup_key]
+            # 찾지 못한 조건은 이 테이블에 객체를 add하거나 flush할 때까지만 기억함
+            if found_id is None: return None
+            cached = self._identity_map.get((cls.table_name, found_id))
+            if cached is not None and all(getattr(cached, k) == v for k, v in statements.items()):
+                return cached
+
+        row = self.database.fetch(cls.table_name, **statements)
+        if row is None:
+            self._lookups[lookup_key] = None
+            return None
+        table_object = self._register(cls, cls.from_data(row))
+        self._lookups[lookup_key] = table_object.id
+        return table_object
+
+    def find_many(self, cls: type[T], *raw_statements, **statements) -> list[T]:
+        """
+        조건에 맞는 객체를 모두 가져옴
+
+        이미 불러온 행은 새 객체를 만들지 않고 기존 객체를 반환함
+        """
+        rows = self.database.fetch_many(cls.table_name, *raw_statements, **statements)
+        return [self._register(cls, cls.from_data(row)) for row in rows]
+
+    def find_all(self, cls: type[T]) -> list[T]:
+        """
+        테이블의 모든 객체를 가져옴
+        """
+        return [self._register(cls, cls.from_data(row)) for row in self.database.fetch_all(cls.table_name)]
+
+    def prefetch(self, table_objects: Iterable[T], *paths: str) -> list[T]:
+        """
+        table_objects의 관계를 TableObject.prefetch로 관계마다 한 번의 쿼리로 불러옴
+
+        불러온 객체는 세션에 등록되고, 이미 불러온 행은 기존 객체가 관계에 들어감
+        """
+        table_objects = list(table_objects)
+        if not table_objects: return table_objects
+        return type(table_objects[0]).prefetch(self.database, table_objects, *paths, register=self._register)
+
+    def flush(self):
+        """
+        새 객체와 변경된 객체를 TableObject.push_many로 한 번에 기록함 (commit하지 않음)
+
+        변경되지 않은 객체는 기록하지 않음
+        """
+        TableObject.push_many([*self._new, *self._identity_map.values()])
+        for table_object in self._new:
+            self._identity_map[(table_object.table_name, table_object.id)] = table_object
+            self._forget_misses(table_object.table_name)
+        self._new.clear()
+    
+    def _forget_misses(self, table_name: str):
+        """
+        table_name 테이블에서 찾지 못했던 조건의 기록을 지움
+        """
+        misses = [key for key, found_id in self._lookups.items() if found_id is None and key[0] == table_name]
+        for key in misses:
+            del self._lookups[key]
+
+    def commit(self):
+        """
+        flush한 뒤 commit함 (database.transaction() 안에서는 트랜잭션이 끝날 때 commit됨)
+        """
+        self.flush()
+        self.database.commit()
+
+    def rollback(self):
+        """
+        트랜잭션을 되돌리고, 세션이 들고 있던 객체를 모두 버림
+        """
+        self.database.connection.rollback()
+        self.clear()
+
+    def clear(self):
+        self._identity_map.clear()
+        self._new.clear()
+        self._lookups.clear()
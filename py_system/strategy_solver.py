@@ -0,0 +1,191 @@
+"""
+전투 전략의 최적해를 구하는 모듈
+
+공격하는 세력은 주사위를 굴린 뒤 전략(충격, 화공, 맹공, 방비, 포위)을 여러 번 사용할 수 있으므로,
+(규모, 기동, 사기)의 주사위 눈 729가지마다 전략으로 도달할 수 있는 모든 주사위 눈과 최소 사용 횟수를 한 번에 계산해 두고,
+상대의 주사위 눈 729가지마다 가장 좋은 결과(승리 > 무승부 > 패배)에 가장 적은 횟수로 도달하는 첫 전략을 정책표로 만듦
+
+정책표는 처음 사용할 때 한 번만 만들어지며 (build_policy_table), 이후의 조회는 배열의 인덱싱 한 번임
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from py_base.ari_enum import Strategy
+from py_base.arislena_dice import Nonahedron
+from py_system.battlefield import STRATEGY_THRESHOLD, STRATEGY_TRANSFERS, BattleField
+
+DICE_MIN, DICE_MAX = 1, 9
+FACES = DICE_MAX - DICE_MIN + 1
+# (규모, 기동, 사기)의 모든 주사위 눈. 인덱스는 get_state_index와 같음
+STATES: tuple[tuple[int, int, int], ...] = tuple(product(range(DICE_MIN, DICE_MAX + 1), repeat=3))
+# 정책표에 저장되는 행동. 0번은 전략을 더 쓰지 않는 것(속행)
+ACTIONS: tuple[tuple[Strategy, int], ...] = ((Strategy.PASS, 0),) + tuple(
+    (strategy, amount) for strategy in STRATEGY_TRANSFERS for amount in range(1, FACES)
+)
+_ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+# 전략으로 도달할 수 없는 주사위 눈의 거리
+_UNREACHABLE = np.iinfo(np.int16).max
+
+def get_state_index(rolls: tuple[int, int, int]) -> int:
+    """
+    (규모, 기동, 사기)의 주사위 눈을 STATES의 인덱스로 바꿈
+    """
+    scale, mobility, morale = rolls
+    return ((scale - DICE_MIN) * FACES + (mobility - DICE_MIN)) * FACES + (morale - DICE_MIN)
+
+def get_legal_actions(rolls: tuple[int, int, int]) -> list[tuple[Strategy, int]]:
+    """
+    주사위 눈이 rolls일 때 사용할 수 있는 (전략, 수치)의 리스트 (속행은 제외)\n
+    소모하는 분야의 눈이 STRATEGY_THRESHOLD 이상이어야 하고, 수치는 소모하는 분야의 눈이 최솟값 아래로 내려가지 않는 만큼까지임
+    """
+    actions = []
+    for strategy, (source, _) in STRATEGY_TRANSFERS.items():
+        if rolls[source] < STRATEGY_THRESHOLD: continue
+        actions.extend((strategy, amount) for amount in range(1, rolls[source] - DICE_MIN + 1))
+    return actions
+
+def apply_action(rolls: tuple[int, int, int], strategy: Strategy, amount: int) -> tuple[int, int, int]:
+    """
+    rolls에 전략을 적용한 주사위 눈 (BattleField._transfer와 같이 주사위의 범위로 보정됨)
+    """
+    if strategy not in STRATEGY_TRANSFERS: return rolls
+    source, target = STRATEGY_TRANSFERS[strategy]
+    result = list(rolls)
+    result[source] = min(max(rolls[source] - amount, DICE_MIN), DICE_MAX)
+    result[target] = min(max(rolls[target] + amount, DICE_MIN), DICE_MAX)
+    return tuple(result)
+
+@dataclass(frozen=True)
+class StrategyAdvice:
+    """
+    strategy, amount : 지금 사용할 전략과 수치 (더 쓸 전략이 없으면 속행, 0)\n
+    outcome : 이후로도 정책을 따랐을 때의 결과 (1: 승리, 0: 무승부, -1: 패배)\n
+    steps : 그 결과까지 필요한 전략의 사용 횟수\n
+    """
+    strategy: Strategy
+    amount: int
+    outcome: int
+    steps: int
+
+@dataclass(frozen=True, eq=False)
+class PolicyTable:
+    """
+    build_policy_table의 결과 (배열은 읽기 전용)
+    ---
+    distances : [내 주사위 눈, 도달할 주사위 눈] -> 전략의 최소 사용 횟수 (도달할 수 없으면 _UNREACHABLE)\n
+    actions : [내 주사위 눈, 상대의 주사위 눈] -> 지금 사용할 ACTIONS의 인덱스\n
+    outcomes : [내 주사위 눈, 상대의 주사위 눈] -> 최선의 결과 (1: 승리, 0: 무승부, -1: 패배)\n
+    steps : [내 주사위 눈, 상대의 주사위 눈] -> 최선의 결과까지 필요한 전략의 사용 횟수\n
+    """
+    distances: np.ndarray
+    actions: np.ndarray
+    outcomes: np.ndarray
+    steps: np.ndarray
+
+    def get_advice(self, a_rolls: tuple[int, int, int], p_rolls: tuple[int, int, int]) -> StrategyAdvice:
+        a, p = get_state_index(a_rolls), get_state_index(p_rolls)
+        strategy, amount = ACTIONS[self.actions[a, p]]
+        return StrategyAdvice(strategy, amount, int(self.outcomes[a, p]), int(self.steps[a, p]))
+
+def _get_encounter_scores() -> np.ndarray:
+    """
+    [내 주사위 눈, 상대의 주사위 눈] -> 전투 인카운터의 결과 (1: 승리, 0: 무승부, -1: 패배)
+    """
+    states = np.array(STATES, dtype=np.int8)
+    a, p = states[:, None, :], states[None, :, :]
+    # 두 분야 이상에서 이긴 쪽이 승리함 (DicePackage.__gt__, __lt__)
+    return ((a > p).sum(axis=2) > 1).astype(np.int8) - ((a < p).sum(axis=2) > 1)
+
+def _get_distances() -> np.ndarray:
+    """
+    전략 한 번으로 이어지는 주사위 눈의 그래프에서, 모든 주사위 눈 쌍의 최소 사용 횟수를 BFS를 행렬 곱으로 한꺼번에 계산함
+    """
+    adjacency = np.zeros((len(STATES), len(STATES)), dtype=np.float32)
+    for index, rolls in enumerate(STATES):
+        for strategy, amount in get_legal_actions(rolls):
+            adjacency[index, get_state_index(apply_action(rolls, strategy, amount))] = 1
+
+    distances = np.full((len(STATES), len(STATES)), _UNREACHABLE, dtype=np.int16)
+    reached = np.eye(len(STATES), dtype=bool)
+    frontier = reached.copy()
+    distances[reached] = 0
+    step = 0
+    while frontier.any():
+        step += 1
+        frontier = ((frontier.astype(np.float32) @ adjacency) > 0) & ~reached
+        distances[frontier] = step
+        reached |= frontier
+    return distances
+
+def _get_first_action(distances: np.ndarray, a: int, goal: int) -> int:
+    """
+    a에서 goal까지 최소 횟수로 가는 경로의 첫 전략 (ACTIONS의 인덱스)
+    """
+    if a == goal: return 0
+    rolls = STATES[a]
+    for strategy, amount in get_legal_actions(rolls):
+        after = get_state_index(apply_action(rolls, strategy, amount))
+        if distances[after, goal] == distances[a, goal] - 1:
+            return _ACTION_INDEX[(strategy, amount)]
+    raise ValueError(f"{rolls}에서 {STATES[goal]}에 도달할 수 없습니다.")
+
+@lru_cache(maxsize=1)
+def build_policy_table() -> PolicyTable:
+    """
+    모든 (내 주사위 눈, 상대의 주사위 눈)에 대한 정책표를 만듦 (한 번만 만들어지고 이후에는 캐시를 반환함)\n
+    봇이 시작될 때 미리 호출해 두면, 첫 조회에서 기다리지 않음
+    """
+    scores = _get_encounter_scores()
+    distances = _get_distances()
+
+    size = len(STATES)
+    actions = np.zeros((size, size), dtype=np.int16)
+    outcomes = np.zeros((size, size), dtype=np.int8)
+    steps = np.zeros((size, size), dtype=np.int16)
+    columns = np.arange(size)
+    for a in range(size):
+        reachable = np.flatnonzero(distances[a] != _UNREACHABLE)
+        # 더 좋은 결과를 먼저, 결과가 같으면 더 적은 횟수를 고름
+        keys = scores[reachable].astype(np.int32) * (size + 1) - distances[a, reachable][:, None]
+        goals = reachable[keys.argmax(axis=0)]
+
+        outcomes[a] = scores[goals, columns]
+        steps[a] = distances[a, goals]
+        first_actions = {goal: _get_first_action(distances, a, goal) for goal in np.unique(goals).tolist()}
+        actions[a] = [first_actions[goal] for goal in goals.tolist()]
+
+    for array in (distances, actions, outcomes, steps):
+        array.flags.writeable = False
+    return PolicyTable(distances, actions, outcomes, steps)
+
+def get_advice(a_rolls: tuple[int, int, int], p_rolls: tuple[int, int, int]) -> StrategyAdvice:
+    """
+    두 세력의 주사위 눈이 정해졌을 때, 공격하는 세력이 지금 사용할 최선의 전략\n
+    주사위 눈이 모두 공개되어 있으므로 결과는 확정적이며, 승리할 수 있으면 승리를, 아니면 무승부를 가장 적은 전략으로 만듦
+    """
+    return build_policy_table().get_advice(tuple(a_rolls), tuple(p_rolls))
+
+def get_battlefield_advice(battle_field: BattleField) -> StrategyAdvice:
+    """
+    BattleField의 현재 주사위 눈으로 get_advice를 구함 (NPC의 전략 선택, 조언 버튼 등)
+    """
+    return get_advice(
+        tuple(dice.last_roll for dice in battle_field.a_dice_pkg),
+        tuple(dice.last_roll for dice in battle_field.p_dice_pkg)
+    )
+
+def get_win_probability(a_rolls: tuple[int, int, int], p_dice_mods: tuple[int, int, int] = (0, 0, 0)) -> float:
+    """
+    내 주사위 눈이 a_rolls이고 상대의 주사위 보정값이 p_dice_mods일 때, 상대가 주사위를 굴린 뒤 정책을 따르면 승리할 확률
+    """
+    probs = np.zeros(len(STATES))
+    distributions = [Nonahedron(mod).get_distribution() for mod in p_dice_mods]
+    for (scale, scale_prob), (mobility, mobility_prob), (morale, morale_prob) in product(
+        *(zip(dist.rolls.tolist(), dist.roll_probs.tolist()) for dist in distributions)
+    ):
+        probs[get_state_index((scale, mobility, morale))] += scale_prob * mobility_prob * morale_prob
+    return float(probs @ (build_policy_table().outcomes[get_state_index(tuple(a_rolls))] == 1))
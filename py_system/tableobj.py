@@ -6,72 +6,14 @@ from abc import ABCMeta
 from typing import Generator
 from math import sqrt
 
-from py_base.utility import sql_value, get_minus4_to_4, DATE_FORMAT
-from py_base.ari_logger import ari_logger
+from py_base.utility import get_minus4_to_4, DATE_FORMAT
 from py_base import ari_enum
 from py_base.datatype import ExtInt, AbsentValue
 from py_base.dbmanager import DatabaseManager, ON_DELETE_CASCADE, ON_UPDATE_CASCADE, ON_DELETE_SET_NULL
 from py_base.yamlobj import Detail, TableObjTranslator
-from py_system.abstract import Column, TableObject, HasCategoryAndAmount, ExperienceAbst
+from py_system.abstract import Column, Relation, TableObject, HasCategoryAndAmount, ExperienceAbst
 from py_base.arislena_dice import D20
 
-def form_database_from_tableobjects(database:DatabaseManager):
-    """
-    TableObject 객체를 상속하는 객체의 수만큼 테이블 생성하고, 테이블을 초기화
-    만약 TableObject를 상속하는 객체의 데이터 형식이 기존의 데이터 형식과 다를 경우, 기존의 데이터를 유지하며 새로운 데이터 형식을 추가
-    """
-    
-    # 데이터베이스가 저장된 폴더에 백업 파일을 생성함
-    database.backup(database.file_path.parent)
-    ari_logger.info("데이터베이스 백업 완료")
-    
-    try:
-    
-        for subclass_type in TableObject.__subclasses__():
-            # TableObject를 상속하는 추상 클래스는 무시함
-            if not subclass_type.table_name: continue
-            
-            # TableObject를 상속하는 객체의 테이블을 생성함 (이미 존재할 경우, 무시함)
-            database.cursor.execute(subclass_type.get_create_table_query())
-
-            # TableObject를 상속하는 객체의 데이터 형식과 main_db의 데이터 형식을 불러와 차이를 판별하기
-            # main_db의 데이터 형식을 불러옴
-            db_columns = database.get_table_column_set(subclass_type.table_name)
-
-            # TableObject를 상속하는 객체의 데이터 형식을 불러옴
-            code_columns = set(subclass_type.get_columns().keys())
-
-            # 데이터베이스 테이블의 데이터 형식과 TableObject를 상속하는 객체의 데이터 형식을 비교
-            
-            # 컬럼 추가
-            for column_name in (code_columns - db_columns):
-                sql_type = subclass_type.get_column_type(column_name)
-                default_value = sql_value(getattr(subclass_type, column_name))
-                database.cursor.execute(
-                    f"ALTER TABLE {subclass_type.table_name} ADD COLUMN {column_name} {sql_type} DEFAULT {default_value}"
-                )
-            
-            # 컬럼을 제거해야 할 때, 대신 경고 발생
-            for column_name in (db_columns - code_columns):
-                # SQLite는 컬럼 삭제를 지원하지 않기 때문에, 삭제가 필요하면 새 테이블을 생성해야 함
-                ari_logger.warning(f"{subclass_type.table_name} 테이블의 {column_name} 컬럼이 코드에 존재하지 않습니다.")
-        
-        # 데이터베이스에 존재하지 않는 테이블을 삭제함
-        existing_tables: set[str] = database.get_all_table_names()
-        tableobj_tables: set[str] = {subclass_type.table_name for subclass_type in TableObject.__subclasses__()}
-        
-        for table in (existing_tables - tableobj_tables):
-            database.cursor.execute(f"DROP TABLE {table}")
-            ari_logger.info(f"{table} 테이블이 삭제되었습니다.")
-        
-        database.connection.commit()
-    
-        ari_logger.info("데이터베이스 초기화 완료")
-    
-    except Exception as e:
-        ari_logger.error(f"데이터베이스 초기화 실패: {e}; {e.__traceback__}")
-        raise e
-
 class Inventory(metaclass=ABCMeta):
     """
     인벤토리처럼 활용되는 객체
@@ -180,7 +122,7 @@ class User(TableObject):
     table_name = "User"
     
     id = Column(int, show_front=False, primary_key=True, auto_increment=True)
-    discord_id = Column(int, not_null=True)
+    discord_id = Column(int, not_null=True, index=True)
     discord_name = Column(str, not_null=True)
     register_date = Column(str, not_null=True)
     
@@ -235,6 +177,13 @@ class Faction(TableObject):
     )
     name = Column(str)
     
+    relations = {
+        "resources": Relation("Resource", "_resources", key="category"),
+        "crews": Relation("Crew", "_crews"),
+        "territories": Relation("Territory", "_territories"),
+        "facilities": Relation("Facility", "_facilities")
+    }
+    
     def __init__(
         self,
         id: int = 0,
@@ -248,6 +197,12 @@ class Faction(TableObject):
         self.team_id = team_id
         self.name = name
         
+        # prefetch로 불러온 관계 (불러오지 않았으면 None)
+        self._resources: dict[ari_enum.ResourceCategory, Resource] | None = None
+        self._crews: list[Crew] | None = None
+        self._territories: list[Territory] | None = None
+        self._facilities: list[Facility] | None = None
+        
     def new(self, user_id: int, name: str, team_id: int = 1):
         return Faction(user_id=user_id, name=name, team_id=team_id)
 
@@ -257,16 +212,24 @@ class Faction(TableObject):
     def get_resource(self, category:ari_enum.ResourceCategory) -> "Resource":
         """
         해당 세력의 자원을 가져옴
+        
+        resources를 prefetch했으면 데이터베이스를 조회하지 않음
         """
-        r = self._database.fetch("resource", faction_id=self.id, category=category.value)
+        if self._resources is not None:
+            return self._resources.get(category) or Resource(faction_id=self.id, category=category)
+        r = self._database.fetch(Resource.table_name, faction_id=self.id, category=category.value)
         if not r: return Resource(faction_id=self.id, category=category)
         return Resource.from_data(r)
     
     def get_worker(self, name:str) -> "Crew":
         """
         해당 세력의 인구를 가져옴
+        
+        crews를 prefetch했으면 데이터베이스를 조회하지 않음
         """
-        worker = self._database.fetch("worker", faction_id=self.id, name=name)
+        if self._crews is not None:
+            return next((crew for crew in self._crews if crew.name == name), None) or Crew(faction_id=self.id, name=name)
+        worker = self._database.fetch(Crew.table_name, faction_id=self.id, name=name)
 
         if not worker: return Crew(faction_id=self.id, name=name)
         return Crew.from_data(worker)
@@ -285,6 +248,7 @@ class Faction(TableObject):
 class CommandCounter(TableObject):
     
     table_name = "CommandCounter"
+    composite_indexes = (("faction_id", "category"),)
     
     id = Column(int, show_front=False, primary_key=True, auto_increment=True)
     faction_id = Column(
@@ -324,9 +288,10 @@ class CommandCounter(TableObject):
         """
         self.amount += 1
 
-class Resource(HasCategoryAndAmount, TableObject):
+class Resource(HasCategoryAndAmount, TableObject, slotted=True):
     
     table_name = "Resource"
+    composite_indexes = (("faction_id", "category"),)
     
     id = Column(int, show_front=False, primary_key=True, auto_increment=True)
     faction_id = Column(
@@ -363,7 +328,9 @@ class Resource(HasCategoryAndAmount, TableObject):
     def is_afford(self, amount: int) -> bool:
         return self.amount >= amount
 
-class Crew(TableObject):
+class Crew(TableObject, slotted=True):
+    
+    __slots__ = ("_efficiency_dice", "_stats", "_description", "_experience", "_deployment")
     
     table_name = "Crew"
     
@@ -380,6 +347,13 @@ class Crew(TableObject):
     hp = Column(int)
     availability = Column(ari_enum.Availability)
     
+    relations = {
+        "stats": Relation("WorkerStats", "_stats", many=False),
+        "description": Relation("WorkerDescription", "_description", many=False),
+        "experience": Relation("WorkerExperience", "_experience", key="category"),
+        "deployment": Relation("Deployment", "_deployment", many=False)
+    }
+    
     def __init__(
         self,
         id: int = 0,
@@ -402,7 +376,12 @@ class Crew(TableObject):
         self._efficiency_dice = None
         self._stats: WorkerStats = None
         self._description: WorkerDescription = None
-        self._experience: dict[ari_enum.ExperienceCategory, WorkerExperience] = {}
+        # 경험치를 불러오지 않았으면 None (불러온 뒤에는 행이 있는 카테고리만 들어 있음)
+        self._experience: dict[ari_enum.ExperienceCategory, WorkerExperience] | None = None
+        self._deployment: Deployment | None = None
+        
+    def get_display_string(self) -> str:
+        return self.name
         
     @property
     def stats(self) -> "WorkerStats":
@@ -414,8 +393,14 @@ class Crew(TableObject):
         
     @property
     def experience(self) -> dict[ari_enum.ExperienceCategory, "WorkerExperience"]:
+        # 불러오지 않았으면 store_experience로 불러와 저장해 둠 (반환한 dict의 변경 사항이 사라지지 않도록)
+        if self._experience is None: self.store_experience()
         return self._experience
     
+    @property
+    def deployment(self) -> "Deployment":
+        return self._deployment
+    
     def store_stats(self):
         self._check_database()
         self._stats = WorkerStats.from_database(self._database, worker_id=self.id)
@@ -427,17 +412,27 @@ class Crew(TableObject):
         self._description = desc
     
     def store_experience(self):
+        """
+        모든 카테고리의 경험치를 한 번의 쿼리로 불러옴 (행이 없는 카테고리는 기본값으로 채움)
+        """
         self._check_database()
+        Crew.prefetch(self._database, [self], "experience")
         for category in ari_enum.ExperienceCategory.to_list():
-            we = WorkerExperience.from_database(self._database, worker_id=self.id, category=category)
-            self._experience[category] = we
+            if category not in self._experience:
+                self._experience[category] = WorkerExperience(worker_id=self.id, category=category).set_database(self._database)
 
-    def set_efficiency(self):
-        # -4 ~ 4
-        self.efficiency = get_minus4_to_4()
+    def set_efficiency(self, efficiency: int | None = None):
+        # -4 ~ 4 (efficiency를 주면 그 값으로 설정함; 여러 노동원의 값을 한 번에 뽑을 때 사용)
+        self.efficiency = get_minus4_to_4() if efficiency is None else efficiency
         return self
     
     def get_experience(self, category: ari_enum.ExperienceCategory) -> "WorkerExperience":
+        """
+        경험치를 가져옴 (experience를 불러왔으면 데이터베이스를 조회하지 않음)
+        """
+        if self._experience is not None:
+            if category in self._experience: return self._experience[category]
+            return WorkerExperience(worker_id=self.id, category=category).set_database(self._database)
         self._check_database()
         we = WorkerExperience.from_database(
             self._database, worker_id=self.id, category=category
@@ -451,9 +446,10 @@ class Crew(TableObject):
         if not self.stats: self.store_stats()
         self.hp = min(self.hp + amount, self.stats.max_hp)
 
-class WorkerExperience(ExperienceAbst, TableObject):
+class WorkerExperience(ExperienceAbst, TableObject, slotted=True):
     
     table_name = "WorkerExperience"
+    composite_indexes = (("worker_id", "category"),)
     
     id = Column(int, show_front=False, primary_key=True, auto_increment=True)
     worker_id = Column(
@@ -590,6 +586,10 @@ class Territory(TableObject):
     safety = Column(ari_enum.TerritorySafety)
     shared = Column(bool)
     
+    relations = {
+        "facilities": Relation("Facility", "_facilities")
+    }
+    
     def __init__(
         self,
         id: int = 0,
@@ -607,6 +607,8 @@ class Territory(TableObject):
         self.safety = safety
         self.shared = shared
         
+        self._facilities: list[Facility] | None = None
+        
     @classmethod
     def new(cls, faction_id:int, name:str):
         new_instance = cls(faction_id=faction_id, name=name)\
@@ -626,9 +628,10 @@ class Territory(TableObject):
     
     def get_remaining_space(self) -> int:
         """
-        남은 공간
+        남은 공간 (facilities를 prefetch했으면 데이터베이스를 조회하지 않음)
         """
-        return self.space_limit - len(self._database.fetch_many(Facility.table_name, territory_id=self.id))
+        if self._facilities is not None: return self.space_limit - len(self._facilities)
+        return self.space_limit - self._database.count(Facility.table_name, territory_id=self.id)
 
 class Facility(TableObject):
     
@@ -653,6 +656,11 @@ class Facility(TableObject):
     remaining_cost = Column(int)
     level = Column(int)
     shared = Column(bool)
+    
+    relations = {
+        "territory": Relation("Territory", "_territory"),
+        "deployments": Relation("Deployment", "_deployments")
+    }
 
     def __init__(
         self,
@@ -675,6 +683,9 @@ class Facility(TableObject):
         self.level = level
         self.shared = shared
         
+        self._territory: Territory | None = None
+        self._deployments: list[Deployment] | None = None
+        
     @property
     def deploy_limit(self) -> int:
         raise NotImplementedError()
@@ -687,7 +698,9 @@ class Facility(TableObject):
         return f"{self.name}: {self.category.express()}"
 
 
-class Deployment(TableObject):
+class Deployment(TableObject, slotted=True):
+    
+    __slots__ = ("_worker", "_territory", "_facility")
     
     table_name = "Deployment"
     
@@ -709,6 +722,12 @@ class Deployment(TableObject):
     )
     deploy_as = Column(ari_enum.DeployAs)
     
+    relations = {
+        "worker": Relation("Crew", "_worker"),
+        "territory": Relation("Territory", "_territory"),
+        "facility": Relation("Facility", "_facility")
+    }
+    
     def __init__(
         self,
         id: int = 0,
@@ -723,21 +742,27 @@ class Deployment(TableObject):
         self.territory_id = territory_id
         self.facility_id = facility_id
         self.deploy_as = deploy_as
+        
+        self._worker: Crew | None = None
+        self._territory: Territory | None = None
+        self._facility: Facility | None = None
     
     def get_display_string(self) -> str:
         return f"배치 현황 {self.id}"
     
     def get_worker(self) -> Crew:
         """
-        배치된 인원을 가져옴
+        배치된 인원을 가져옴 (worker를 prefetch했으면 데이터베이스를 조회하지 않음)
         """
+        if self._worker is not None: return self._worker
         self._check_database()
         return Crew.from_data(self._database.fetch(Crew.table_name, id=self.worker_id))
 
     def get_facility(self) -> "Facility":
         """
-        배치된 시설을 가져옴
+        배치된 시설을 가져옴 (facility를 prefetch했으면 데이터베이스를 조회하지 않음)
         """
+        if self._facility is not None: return self._facility
         self._check_database()
         return Facility.from_data(self._database.fetch(Facility.table_name, id=self.facility_id))
     
@@ -750,5 +775,4 @@ class Deployment(TableObject):
 class Command(TableObject):
     
     # TODO
-    
-
+    pass
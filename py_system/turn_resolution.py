@@ -0,0 +1,93 @@
+"""
+턴 종료 처리 엔진
+
+길드의 상태를 한 번에 불러와 메모리에서 변경 사항을 계산하고, 변경된 행을 턴 하나의 Session으로 한 번에 기록함
+"""
+from py_base import ari_enum
+from py_base.dbmanager import DatabaseManager
+from py_base.utility import get_many_minus4_to_4
+from py_system.tableobj import Crew, CommandCounter, Deployment
+from py_system.session import Session
+
+class TurnResolver:
+    """
+    턴 종료 시 필요한 길드의 상태를 한 번에 불러와 처리하는 클래스
+
+    사용법:
+    ```
+    resolver = TurnResolver(database).load()
+    with database.transaction():
+        resolver.resolve_turn_start()
+        resolver.flush()
+    ```
+
+    flush()는 commit하지 않으므로, 턴 종료 처리 전체를 database.transaction()으로 묶어 한 번만 commit해야 함
+
+    불러온 객체는 모두 resolver.session에 등록되므로, 턴 종료 중의 다른 처리도 같은 session을 쓰면 같은 행을 다시 조회하지 않음
+    """
+
+    # 노동력을 가지는 테이블 (가축 테이블이 생기면 여기에 추가)
+    worker_types: tuple[type[Crew], ...] = (Crew,)
+
+    def __init__(self, database: DatabaseManager):
+        self.database = database
+        self.session = Session(database)
+
+        self.workers: list[Crew] = []
+        self.command_counters: list[CommandCounter] = []
+        self.deployments_by_facility: dict[int, list[Deployment]] = {}
+
+    def load(self):
+        """
+        턴 종료에 필요한 모든 행을 테이블마다 한 번의 쿼리로 불러옴
+        """
+        self.workers = []
+        for worker_type in self.worker_types:
+            self.workers.extend(self.session.find_all(worker_type))
+
+        self.command_counters = self.session.find_all(CommandCounter)
+
+        self.deployments_by_facility = {}
+        for deployment in self.session.find_all(Deployment):
+            self.deployments_by_facility.setdefault(deployment.facility_id, []).append(deployment)
+
+        return self
+
+    def resolve_turn_start(self) -> dict[str, int]:
+        """
+        턴 시작 시의 상태 변화를 메모리에서 계산함
+
+        1. 배치 불가 상태인 모든 노동원을 대기 상태로 변경
+        2. 대기 상태인 모든 노동원의 노동력을 새로 설정
+        3. 모든 명령 카운터를 초기화
+
+        반환값: 각 단계에서 변경된 객체의 수
+        """
+        result = {"standby": 0, "efficiency": 0, "command_counter": 0}
+
+        standby_workers = []
+        for worker in self.workers:
+            if worker.availability == ari_enum.Availability.UNAVAILABLE:
+                worker.availability = ari_enum.Availability.STANDBY
+                result["standby"] += 1
+
+            if worker.availability == ari_enum.Availability.STANDBY:
+                standby_workers.append(worker)
+
+        # 대기 상태인 노동원의 노동력은 한 번에 뽑음
+        for worker, efficiency in zip(standby_workers, get_many_minus4_to_4(len(standby_workers))):
+            worker.set_efficiency(efficiency)
+        result["efficiency"] = len(standby_workers)
+
+        for cc in self.command_counters:
+            if cc.amount == 0: continue
+            cc.reset()
+            result["command_counter"] += 1
+
+        return result
+
+    def flush(self):
+        """
+        session에서 변경된 객체를 한 번에 기록함 (commit하지 않음)
+        """
+        self.session.flush()
@@ -0,0 +1,77 @@
+import _pre
+_pre.add_parent_dir_to_sys_path()
+
+import tempfile
+from pathlib import Path
+
+from py_base import dbmanager
+
+# 임시 폴더의 데이터베이스로 실행함
+temp_dir = Path(tempfile.mkdtemp())
+dbmanager.DATA_DIR = temp_dir
+
+from py_base.dbmanager import DatabaseManager, ConnectionProfile
+from py_system.migration import migrate, migration, SCHEMA_TABLE
+
+db = DatabaseManager("migration_test")
+print("처음 migrate:", migrate(db, backup_directory=temp_dir))
+
+def table_sql(table: str) -> str:
+    return db.cursor.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+
+# 스키마가 같으면 테이블을 다시 만들지 않음 (sqlite_stat1 같은 sqlite의 테이블도 지우지 않음)
+db.cursor.execute("ANALYZE")
+db.connection.commit()
+before = table_sql("Crew")
+db.cursor.execute(f"UPDATE {SCHEMA_TABLE} SET schema_hash = 'changed'")
+db.connection.commit()
+migrate(db, backup_directory=temp_dir)
+assert table_sql("Crew") == before
+assert db.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+print("변경 없는 migrate: 테이블 유지")
+
+# 코드에 없는 컬럼은 drop_columns에 적지 않으면 지우지 않음
+db.cursor.execute("ALTER TABLE Crew ADD COLUMN junk INTEGER")
+db.cursor.execute(f"UPDATE {SCHEMA_TABLE} SET schema_hash = 'changed'")
+db.connection.commit()
+try:
+    migrate(db, backup_directory=temp_dir)
+    raise AssertionError("junk 컬럼이 지워졌습니다.")
+except ValueError as e:
+    print("거부:", e)
+assert "junk" in db.get_table_column_set("Crew")
+
+@migration(1, "junk 컬럼 삭제", drop_columns={"Crew": ("junk",)})
+def drop_junk(database: DatabaseManager):
+    pass
+
+print("drop_columns migrate:", migrate(db, backup_directory=temp_dir))
+assert "junk" not in db.get_table_column_set("Crew")
+
+# 코드에 새로 생긴 컬럼은 마이그레이션 함수가 실행되기 전에 추가되어, 옛 컬럼의 데이터로 채울 수 있음
+db.cursor.execute("INSERT INTO Crew (id, faction_id, hp) VALUES (1, 0, 42)")
+db.cursor.execute("ALTER TABLE Crew RENAME COLUMN hp TO old_hp")
+db.cursor.execute(f"UPDATE {SCHEMA_TABLE} SET schema_hash = 'changed'")
+db.connection.commit()
+
+@migration(2, "Crew.old_hp를 Crew.hp로 옮김", drop_columns={"Crew": ("old_hp",)})
+def move_hp(database: DatabaseManager):
+    database.cursor.execute("UPDATE Crew SET hp = old_hp")
+
+print("새 컬럼 migrate:", migrate(db, backup_directory=temp_dir))
+assert "old_hp" not in db.get_table_column_set("Crew")
+assert db.fetch("Crew", id=1)["hp"] == 42
+
+# 외래 키 위반은 migrate할 때 로그로 남고, 외래 키 제약 조건을 켠 연결에서는 migrate가 실패함
+db.cursor.execute("INSERT INTO Crew (id, faction_id) VALUES (1234, 9999)")
+db.connection.commit()
+print("외래 키 위반:", db.check_foreign_keys())
+fk_db = DatabaseManager("migration_test", ConnectionProfile(foreign_keys=True))
+try:
+    migrate(fk_db, backup_directory=temp_dir)
+    raise AssertionError("외래 키 위반이 있는데 migrate가 성공했습니다.")
+except ValueError as e:
+    print("거부:", e)
+fk_db.close()
+
+print("백업:", sorted(path.name for path in temp_dir.iterdir() if path.suffix == ".gz"))
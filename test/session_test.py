@@ -0,0 +1,40 @@
+import _pre
+_pre.add_parent_dir_to_sys_path()
+
+import tempfile
+from pathlib import Path
+
+from py_base import dbmanager
+
+# 임시 폴더의 데이터베이스로 실행함
+temp_dir = Path(tempfile.mkdtemp())
+dbmanager.DATA_DIR = temp_dir
+
+from py_base.ari_enum import ResourceCategory
+from py_base.dbmanager import DatabaseManager
+from py_system.migration import migrate
+from py_system.session import Session
+from py_system.tableobj import Resource
+
+db = DatabaseManager("session_test")
+migrate(db, backup_directory=temp_dir)
+
+category = next(iter(ResourceCategory))
+
+with Session(db) as session:
+    # 찾지 못한 조건도, 그 뒤에 add한 객체는 flush 전후 모두 찾아야 함
+    assert session.find(Resource, faction_id=1, category=category) is None
+    resource = session.add(Resource(faction_id=1, category=category, amount=3))
+    print("flush 전:", session.find(Resource, faction_id=1, category=category))
+    assert session.find(Resource, faction_id=1, category=category) is resource
+    session.flush()
+    print("flush 후:", session.find(Resource, faction_id=1, category=category))
+    assert session.find(Resource, faction_id=1, category=category) is resource
+
+    # 같은 행은 다시 불러와도 같은 객체
+    assert session.get(Resource, resource.id) is resource
+
+print("Resource 행 수:", db.count(Resource.table_name))
+assert db.count(Resource.table_name) == 1
+
+db.close()
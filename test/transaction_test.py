@@ -0,0 +1,93 @@
+import _pre
+_pre.add_parent_dir_to_sys_path()
+
+import tempfile, threading
+from pathlib import Path
+
+from py_base import dbmanager
+
+# 임시 폴더의 데이터베이스로 실행함
+temp_dir = Path(tempfile.mkdtemp())
+dbmanager.DATA_DIR = temp_dir
+
+from py_base.dbmanager import DatabaseManager
+from py_system.migration import migrate
+from py_system.tableobj import Crew
+
+db = DatabaseManager("transaction_test")
+migrate(db, backup_directory=temp_dir)
+
+def new_crew(**kwargs) -> Crew:
+    crew = Crew(faction_id=0, **kwargs)
+    crew.set_database(db)
+    return crew
+
+# 안쪽 블록(savepoint)의 예외는 안쪽의 변경 사항만 되돌림
+with db.transaction():
+    new_crew(name="outer").push()
+    try:
+        with db.transaction() as savepoint:
+            assert savepoint.depth == 1
+            new_crew(name="inner").push()
+            raise KeyError
+    except KeyError:
+        pass
+print("savepoint rollback:", db.fetch_column("Crew", "name"))
+assert db.fetch_column("Crew", "name") == ["outer"]
+
+# defer한 sql 문은 블록이 끝날 때 한 번에 실행됨
+with db.transaction() as transaction:
+    transaction.defer("UPDATE Crew SET hp = ? WHERE name = ?", (7, "outer"))
+    assert db.fetch("Crew", name="outer")["hp"] != 7
+assert db.fetch("Crew", name="outer")["hp"] == 7
+print("defer: commit할 때 실행됨")
+
+# 바깥 트랜잭션이 rollback되면 push한 객체도 다시 기록해야 하는 상태로 돌아감
+crew = new_crew(name="rollback")
+try:
+    with db.transaction():
+        with db.transaction():
+            crew.push()
+        assert crew.id and not crew.is_changed()
+        raise KeyError
+except KeyError:
+    pass
+print("rollback 후 id:", crew.id, "is_changed:", crew.is_changed())
+assert crew.id == 0 and crew.is_changed()
+
+with db.transaction():
+    crew.push()
+crew.hp = 3
+try:
+    with db.transaction():
+        Crew.push_many([crew])
+        raise KeyError
+except KeyError:
+    pass
+print("push_many rollback 후 바뀐 컬럼:", crew.get_changed_columns())
+assert crew.get_changed_columns() == ["hp"]
+with db.transaction():
+    Crew.push_many([crew])
+assert db.fetch("Crew", id=crew.id)["hp"] == 3 and not crew.is_changed()
+
+# transaction()의 목록과 연결은 스레드마다 따로 있음 (AsyncDatabase의 쓰기 스레드가 이벤트 루프 스레드와 섞이지 않음)
+seen = []
+with db.transaction():
+    thread = threading.Thread(target=lambda: seen.append((db.in_transaction, db.connection)))
+    thread.start()
+    thread.join()
+    print("다른 스레드의 in_transaction:", seen[0][0], "같은 연결:", seen[0][1] is db.connection)
+    assert not seen[0][0] and seen[0][1] is not db.connection
+
+# 열린 순서대로 닫지 않으면 RuntimeError
+outer, inner = db.transaction(), db.transaction()
+outer.__enter__()
+inner.__enter__()
+try:
+    outer.__exit__(None, None, None)
+except RuntimeError as e:
+    print("RuntimeError:", e)
+inner.__exit__(None, None, None)
+db.connection.rollback()
+
+db.close()